@@ -23,6 +23,12 @@ from src.adhd_support import micro_content_divider
 from src.dyslexia_support import syntax_simplifier
 from src.config import SystemConfig
 from src.dashboard_analyzer import analyze_dashboard_data
+from src.utils.text_highlighter import TextHighlighter, span_highlights
+from src.utils.checkpoint_store import get_checkpoint_store
+from src.job_scheduler import JobScheduler, QueueFullError
+from src.support_job import run_support_job
+from src.utils.job_queue import get_job_queue
+from src.utils.corpus_stats import get_corpus_stats
 from translations import get_translation
 
 # Initialize configuration
@@ -37,6 +43,15 @@ app.config['DEBUG'] = True  # Enable debug mode
 # Initialize CSRF protection
 csrf = CSRFProtect(app)
 
+def warm_up_workflows():
+    """Compile the support-system graphs and prompt templates once at startup"""
+    from src.architecture import warm_support_systems
+    try:
+        warm_support_systems()
+    except Exception as e:
+        # Graphs are compiled lazily on first use if warm-up fails
+        print(f"Error warming up support system workflows: {e}")
+
 # Set default language in session
 @app.before_request
 def set_default_language():
@@ -346,12 +361,102 @@ def material_upload():
     language = session.get('language', config.get("system.language"))
     return render_template('material_upload.html', language=language)
 
+# Fixed pool of workers running support jobs, fed by a bounded queue
+job_scheduler = JobScheduler(
+    run_support_job,
+    max_workers=config.get("system.max_concurrent_users") or 10,
+    max_queue_size=config.get("system.max_queued_jobs") or 50
+)
+
+def use_worker_queue():
+    """Whether jobs are handed to out-of-process workers through the durable queue"""
+    return config.get("jobs.backend") == "sqlite"
+
+def job_queue_is_full():
+    """Check whether a new job would exceed the queue capacity of the active backend"""
+    if use_worker_queue():
+        return get_job_queue().count() >= (config.get("system.max_queued_jobs") or 50)
+    return job_scheduler.is_full()
+
+def worker_process_count():
+    """Number of worker processes expected to lease from the durable queue"""
+    return config.get("jobs.worker_processes") or os.cpu_count() or 1
+
+def queue_retry_after():
+    """Estimate the retry delay from the backend that rejects new jobs"""
+    if use_worker_queue():
+        return get_job_queue().retry_after(
+            max_queued=config.get("system.max_queued_jobs") or 50,
+            workers=worker_process_count()
+        )
+    return job_scheduler.retry_after()
+
+def queue_full_response(retry_after):
+    """Build the 429 response returned when the job queue is at capacity"""
+    response = jsonify({
+        "error": "The server is busy processing other materials. Please try again shortly.",
+        "retry_after": retry_after
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def resume_interrupted_jobs():
+    """Restart jobs that were still running when the server stopped, skipping their completed nodes"""
+    checkpoint_store = get_checkpoint_store()
+    stale_after = config.get("jobs.lease_seconds") or 300.0
+    for job in checkpoint_store.get_incomplete_jobs(stale_after):
+        # Several server processes may start together; only the one that claims a job resumes it
+        if not checkpoint_store.claim_job(job["job_id"], stale_after):
+            continue
+        completed_nodes = checkpoint_store.get_completed_nodes(job["job_id"])
+        print(f"Resuming job {job['job_id']} (completed nodes: {completed_nodes})")
+        
+        try:
+            job_scheduler.submit(job["job_id"], job["initial_state"], job["plan"])
+        except QueueFullError:
+            # The job stays marked as running and is picked up again on the next start
+            print(f"Job queue is full, job {job['job_id']} not resumed")
+            continue
+        
+        processing_status_file = job["initial_state"]["metadata"]["processing_status_file"]
+        os.makedirs(os.path.dirname(processing_status_file), exist_ok=True)
+        with open(processing_status_file, 'w') as f:
+            json.dump({
+                "status": "queued",
+                "timestamp": datetime.now().isoformat(),
+                "progress": 0,
+                "message": "Resuming interrupted processing",
+                "completed_nodes": completed_nodes
+            }, f, indent=2)
+
+def sync_corpus_stats():
+    """Count stored materials missing from the corpus statistics in a background thread"""
+    if not config.get("corpus.enabled"):
+        return
+
+    def sync():
+        material_dir = config.get("storage.learning_materials_path") or "data/materials"
+        try:
+            added = get_corpus_stats().sync_directory(material_dir)
+            if added:
+                print(f"Added {added} stored materials to the corpus statistics")
+        except Exception as e:
+            print(f"Error syncing corpus statistics: {e}")
+
+    threading.Thread(target=sync, name="corpus-stats-sync", daemon=True).start()
+
 @app.route('/process-material', methods=['POST'])
 def process_material():
     """Process the uploaded learning material using the AI support system workflow"""
     if 'questionnaire_answers' not in session:
         return redirect(url_for('questionnaire'))
     
+    # Apply backpressure before doing any work when every queue slot is taken
+    # (a cheap early check; submitting or enqueuing the job enforces the limit atomically)
+    if job_queue_is_full():
+        return queue_full_response(queue_retry_after())
+    
     try:
         # Get the material text and title
         material_text = request.form.get('material_text', '')
@@ -372,32 +477,17 @@ def process_material():
         os.makedirs(processing_dir, exist_ok=True)
         os.makedirs(results_dir, exist_ok=True)
         
-        # Save the material to a file
-        material_file_path = os.path.join(material_dir, f"{user_id}_{material_id}.txt")
-        with open(material_file_path, 'w') as f:
-            f.write(material_text)
-        
-        # Store material metadata in session
-        session['current_material'] = {
-            'id': material_id,
-            'user_id': user_id,
-            'title': material_title,
-            'file_path': material_file_path,
-            'word_count': len(material_text.split()),
-            'estimated_reading_time': len(material_text.split()) // 200
-        }
-        
         # Create initial processing status file
         processing_status_file = os.path.join(processing_dir, f"{user_id}_{material_id}_status.json")
         with open(processing_status_file, 'w') as f:
             json.dump({
-                "status": "started",
+                "status": "queued",
                 "timestamp": datetime.now().isoformat(),
                 "progress": 0
             }, f, indent=2)
         
-        # Get user profile data
-        user_analysis = session.get('user_analysis', {})
+        # Get user profile data (fall back to the dashboard analysis when no separate profile analysis exists)
+        user_analysis = session.get('user_analysis') or session.get('dashboard_analysis', {}).get('analysis', {})
         questionnaire_answers = session.get('questionnaire_answers', {})
         
         # Prepare initial state for the support system workflow
@@ -417,6 +507,7 @@ def process_material():
             "interaction_history": [],
             "current_focus": "start",
             "metadata": {
+                "job_id": f"{user_id}_{material_id}",
                 "user_id": user_id,
                 "material_id": material_id,
                 "processing_status_file": processing_status_file,
@@ -425,60 +516,53 @@ def process_material():
             "iteration_count": 0
         }
         
-        # Import and run the support system workflow
-        from src.architecture import build_support_system
+        # Get the execution plan containing only the nodes this learner needs
+        from src.planner import plan_support_pipeline
+        execution_plan = plan_support_pipeline(initial_state["user_profile"])
+        
+        # Persist the job so it can resume from its last completed node after a crash or restart
+        job_id = initial_state["metadata"]["job_id"]
+        checkpoint_store = get_checkpoint_store()
+        checkpoint_store.save_job(job_id, initial_state, execution_plan)
         
-        # Get the workflow
-        workflow = build_support_system()
+        # Queue the workflow for the worker pool to avoid blocking
+        try:
+            if use_worker_queue():
+                # Worker processes (python -m src.worker) pick the job up from the durable queue;
+                # the capacity is checked in the same transaction as the insert
+                get_job_queue().enqueue(job_id, {
+                    "initial_state": initial_state,
+                    "execution_plan": list(execution_plan)
+                }, max_queued=config.get("system.max_queued_jobs") or 50, workers=worker_process_count())
+            else:
+                job_scheduler.submit(job_id, initial_state, execution_plan)
+        except QueueFullError as e:
+            checkpoint_store.delete_job(job_id)
+            os.remove(processing_status_file)
+            return queue_full_response(e.retry_after)
+        
+        # Save the material to a file only once the job is accepted, so a rejected request leaves nothing behind
+        # (the workflow reads the material from its initial state, not from this file)
+        material_file_path = os.path.join(material_dir, f"{user_id}_{material_id}.txt")
+        with open(material_file_path, 'w') as f:
+            f.write(material_text)
         
-        # Run the workflow in a background thread to avoid blocking
-        def process_in_background():
+        # Add the material to the corpus term statistics used by the local keyword extractor
+        if config.get("corpus.enabled"):
             try:
-                print("Building support system workflow graph")
-                # Execute the workflow
-                # The CompiledStateGraph is not directly callable, we need to use the invoke method
-                final_state = workflow.invoke(initial_state)
-                
-                # Print the raw processed content structure for debugging
-                if "processed_content" in final_state:
-                    print(f"Raw processed content from agent: {final_state['processed_content'].keys()}")
-                else:
-                    print("No processed_content in final_state")
-                
-                # Save the final results
-                results_file = os.path.join(results_dir, f"{user_id}_{material_id}_results.json")
-                with open(results_file, 'w') as f:
-                    json.dump(final_state, f, indent=2)
-                
-                print(f"Processing complete, results saved to: {results_file}")
-                
-                # Update processing status to complete
-                with open(processing_status_file, 'w') as f:
-                    json.dump({
-                        "status": "complete",
-                        "timestamp": datetime.now().isoformat(),
-                        "progress": 100,
-                        "message": "Processing complete!",
-                        "results_file": results_file
-                    }, f, indent=2)
-                
+                get_corpus_stats().add_document(f"{user_id}_{material_id}", material_text)
             except Exception as e:
-                print(f"Error in background processing: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                
-                # Update status to error
-                with open(processing_status_file, 'w') as f:
-                    json.dump({
-                        "status": "error",
-                        "timestamp": datetime.now().isoformat(),
-                        "error": str(e)
-                    }, f, indent=2)
-        
-        # Start background processing
-        import threading
-        processing_thread = threading.Thread(target=process_in_background)
-        processing_thread.start()
+                print(f"Error updating corpus statistics: {e}")
+        
+        # Store material metadata in session
+        session['current_material'] = {
+            'id': material_id,
+            'user_id': user_id,
+            'title': material_title,
+            'file_path': material_file_path,
+            'word_count': len(material_text.split()),
+            'estimated_reading_time': len(material_text.split()) // 200
+        }
         
         # Redirect to processing page
         return redirect(url_for('material_processing'))
@@ -546,7 +630,12 @@ def learning_view():
     else:
         material_title = session.get('current_material', {}).get('title', 'Learning Material')
     
-    # Load processed content
+    # Initial highlight style; learning_view.js switches styles in the browser afterwards
+    highlight_style = request.args.get('highlight_style')
+    if highlight_style in TextHighlighter.HIGHLIGHT_STYLE_PRESETS:
+        session['highlight_style'] = highlight_style
+    
+    # Load processed content; highlights are applied and styled by the browser
     processed_content, original_content = load_processed_content(user_id, material_id)
     
     if not processed_content:
@@ -604,7 +693,9 @@ def learning_view():
             user_profile['support_level'] = 'moderate'
     
     # Force difficulty_type to ADHD to ensure micro-units are displayed
-    if user_profile['difficulty_type'] not in ['ADHD', 'Combined']:
+    # (materials processed with a dyslexia-only plan have no micro-units, so keep their type)
+    has_micro_units = any(section.get('micro_units') for section in processed_content.get('sections', []))
+    if user_profile['difficulty_type'] not in ['ADHD', 'Combined'] and has_micro_units:
         user_profile['difficulty_type'] = 'ADHD'
     
     # Get agents used from the interaction history
@@ -662,7 +753,9 @@ def learning_view():
                           processed_content=processed_content,
                           original_content=original_content,
                           agents_used=agents_used,
-                          processed_date=processed_date)
+                          processed_date=processed_date,
+                          highlight_style=get_session_highlight_style(),
+                          highlight_styles=TextHighlighter.get_preset_css_classes())
 
 @app.route('/api/feedback', methods=['POST'])
 def submit_feedback():
@@ -814,6 +907,16 @@ def check_processing_status():
         with open(status_file, 'r') as f:
             status_data = json.load(f)
         
+        # Report the position in the job queue while waiting for a worker
+        job_queue = get_job_queue() if use_worker_queue() else job_scheduler
+        queue_position = job_queue.get_queue_position(f"{user_id}_{material_id}")
+        if status_data.get('status') == 'queued' and queue_position:
+            status_data['queue_position'] = queue_position
+        
+        # Show the micro units published so far while the workflow is still running
+        if status_data.get('status') == 'running':
+            status_data['partial_units'] = get_checkpoint_store().load_units(f"{user_id}_{material_id}")
+        
         # If processing is complete, include agent insights and file references
         if status_data.get('status') == 'complete':
             results_file = status_data.get('results_file')
@@ -859,6 +962,48 @@ def check_processing_status():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/material-highlights')
+def material_highlights():
+    """API endpoint returning the highlighted phrases of every unit and of the simplified text, for rendering in the browser"""
+    material_id = request.args.get('material_id') or session.get('current_material', {}).get('id')
+    user_id = session.get('user_id', 'anonymous')
+    
+    if not material_id:
+        return jsonify({"error": "No material selected"}), 400
+    
+    results_dir = os.path.join(config.get("storage.results_path") or "data/results")
+    results_file = os.path.join(results_dir, f"{user_id}_{material_id}_results.json")
+    if not os.path.exists(results_file):
+        return jsonify({"error": "Results file not found"}), 404
+    
+    try:
+        with open(results_file, 'r') as f:
+            results = json.load(f)
+        
+        raw_processed_content = results.get("processed_content", {})
+        units = [
+            {
+                "unit_number": unit.get("unit_number", index + 1),
+                "highlights": span_highlights(unit.get("content", ""), unit.get("highlight_spans", []))
+            }
+            for index, unit in enumerate(raw_processed_content.get("micro_units", []))
+        ]
+        
+        simplified_text = raw_processed_content.get("simplified_text")
+        simplified_highlights = []
+        if isinstance(simplified_text, dict):
+            simplified_highlights = span_highlights(simplified_text.get("content", ""),
+                                                    simplified_text.get("highlight_spans", []))
+        
+        return jsonify({
+            "material_id": material_id,
+            "units": units,
+            "simplified_text": {"highlights": simplified_highlights}
+        })
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 def convert_markdown_to_html(content):
     """
     Convert markdown content to HTML.
@@ -889,10 +1034,20 @@ def convert_markdown_to_html(content):
             html_content += f"<p>{paragraph.strip()}</p>\n"
     return html_content
 
+def get_session_highlight_style():
+    """Get the name of the current user's highlight style preset (chosen, or derived from their questionnaire)"""
+    if session.get('highlight_style') in TextHighlighter.HIGHLIGHT_STYLE_PRESETS:
+        return session['highlight_style']
+    preferences = TextHighlighter.extract_highlight_preferences(session.get('questionnaire_answers', {}))
+    return preferences.get('highlight_preset', 'default')
+
 def load_processed_content(user_id, material_id):
     """
     Load the processed content and original content for a given material.
     
+    Content is rendered without highlights; learning_view.js fetches the highlighted
+    phrases from /api/material-highlights and applies them in the browser.
+    
     Args:
         user_id: The user ID
         material_id: The material ID
@@ -976,7 +1131,8 @@ def load_processed_content(user_id, material_id):
                     elif "check_points" not in unit and "check_questions" in unit:
                         unit["check_points"] = unit["check_questions"]
                     
-                    # Ensure content is HTML
+                    # Highlights are applied in the browser, so only the plain content is sent
+                    unit.pop("highlight_spans", None)
                     if "content" in unit and unit["content"] and isinstance(unit["content"], str):
                         unit["content"] = convert_markdown_to_html(unit["content"])
                 
@@ -1058,6 +1214,9 @@ def load_processed_content(user_id, material_id):
                 processed_content["detailed_units"] = raw_processed_content["detailed_units"]
                 processed_content["sections"][0]["detailed_units"] = raw_processed_content["detailed_units"]
         
+        # Styles for the rendered highlights
+        processed_content["highlight_css"] = TextHighlighter.CSS_STYLES
+        
         # Add interaction history if available
         if "interaction_history" in raw_processed_content:
             processed_content["interaction_history"] = raw_processed_content["interaction_history"]
@@ -1143,10 +1302,36 @@ def materials_history():
     
     return render_template('materials_history.html', materials=materials, language=language)
 
+def start_background_services():
+    """
+    Warm up the workflows, resume interrupted jobs and sync the corpus statistics
+
+    Called from the startup path of the serving process, never on import; WSGI hosts call it from
+    their startup hook (for example gunicorn's post_worker_init). Interrupted jobs are claimed
+    atomically, so starting several workers resumes each job only once.
+    """
+    # With the debug reloader the parent process only watches files; the child (WERKZEUG_RUN_MAIN) serves requests
+    if __name__ == '__main__' and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return
+    
+    warm_up_workflows()
+    
+    # With the worker queue, expired leases are picked up again by the workers instead
+    if not use_worker_queue():
+        try:
+            resume_interrupted_jobs()
+        except Exception as e:
+            print(f"Error resuming interrupted jobs: {e}")
+    
+    # Count materials stored before the corpus statistics existed
+    sync_corpus_stats()
+
 if __name__ == '__main__':
     # Exempt certain routes from CSRF protection (we'll handle it manually for AJAX)
     csrf.exempt(submit_feedback)
     csrf.exempt(set_language)
     
+    start_background_services()
+    
     # Run the app
     app.run(host='0.0.0.0', port=5000, debug=True)
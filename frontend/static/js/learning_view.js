@@ -1126,6 +1126,96 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Highlights
+    // The content arrives as plain HTML; the highlighted phrases come from /api/material-highlights
+    // and are wrapped here as style-neutral markers (span.hl with data-hl-type). The CSS class of
+    // each highlight type comes from the selected style preset, so switching styles is local.
+    const highlightStyleSelect = document.getElementById('highlight-style-select');
+    const highlightStyleClasses = window.highlightStyleClasses || {};
+    
+    function applyHighlightStyle(styleName) {
+        const classes = highlightStyleClasses[styleName] || highlightStyleClasses['default'];
+        if (!classes) {
+            return;
+        }
+        document.querySelectorAll('.hl[data-hl-type]').forEach(marker => {
+            const highlightType = marker.getAttribute('data-hl-type');
+            marker.className = 'hl ' + (classes[highlightType] || 'highlight-yellow');
+        });
+    }
+    
+    function wrapHighlights(container, highlights) {
+        // Phrases are in text order, so each search continues where the previous phrase ended;
+        // a phrase that is not found (e.g. split by Markdown formatting) is skipped
+        const walker = document.createTreeWalker(container, NodeFilter.SHOW_TEXT);
+        let node = walker.nextNode();
+        let offset = 0;
+        highlights.forEach(highlight => {
+            let current = node;
+            let currentOffset = offset;
+            walker.currentNode = current || container;
+            while (current) {
+                const index = current.nodeValue.indexOf(highlight.text, currentOffset);
+                if (index >= 0) {
+                    const target = current.splitText(index);
+                    const rest = target.splitText(highlight.text.length);
+                    const marker = document.createElement('span');
+                    marker.className = 'hl';
+                    marker.setAttribute('data-hl-type', highlight.type);
+                    if (highlight.definition) {
+                        marker.setAttribute('data-tooltip', highlight.definition);
+                    }
+                    target.parentNode.replaceChild(marker, target);
+                    marker.appendChild(target);
+                    node = rest;
+                    offset = 0;
+                    return;
+                }
+                current = walker.nextNode();
+                currentOffset = 0;
+            }
+        });
+    }
+    
+    function loadHighlights() {
+        const defaultStyle = highlightStyleSelect ? highlightStyleSelect.getAttribute('data-default-style') : null;
+        const styleName = localStorage.getItem('highlightStyle') || defaultStyle || 'default';
+        if (highlightStyleSelect) {
+            highlightStyleSelect.value = styleName;
+        }
+        
+        fetch('/api/material-highlights')
+            .then(response => response.json())
+            .then(data => {
+                if (data.error) {
+                    return;
+                }
+                (data.units || []).forEach(unit => {
+                    const content = document.querySelector(`.micro-unit[data-unit-number="${unit.unit_number}"] .unit-content`);
+                    if (content && unit.highlights.length) {
+                        wrapHighlights(content, unit.highlights);
+                    }
+                });
+                const simplified = document.querySelector('.section-content[data-highlights="simplified"]');
+                if (simplified && data.simplified_text && data.simplified_text.highlights.length) {
+                    wrapHighlights(simplified, data.simplified_text.highlights);
+                }
+                applyHighlightStyle(styleName);
+            })
+            .catch(error => {
+                console.error('Error loading highlights:', error);
+            });
+    }
+    
+    if (highlightStyleSelect) {
+        highlightStyleSelect.addEventListener('change', function() {
+            localStorage.setItem('highlightStyle', this.value);
+            applyHighlightStyle(this.value);
+        });
+    }
+    
+    loadHighlights();
+    
     // Load saved progress on page load
     loadSavedProgress();
 }); 
\ No newline at end of file
@@ -636,6 +636,9 @@ translations = {
             "optimization_text": "The system is generating insights and recommendations to optimize your learning experience.",
             "agent_activity": "AI Agent Activity",
             "agent_insights": "AI Agent Insights",
+            "units_ready": "Learning Units Ready",
+            "unit_label": "Unit",
+            "minutes": "min",
             "profile_analyzer": "Profile Analyzer",
             "focus_enhancer": "Focus Enhancer",
             "text_transformer": "Text Transformer",
@@ -670,6 +673,9 @@ translations = {
             "optimization_text": "系统正在生成见解和建议，以优化您的学习体验。",
             "agent_activity": "AI 代理活动",
             "agent_insights": "AI 代理见解",
+            "units_ready": "已就绪的学习单元",
+            "unit_label": "单元",
+            "minutes": "分钟",
             "profile_analyzer": "档案分析师",
             "focus_enhancer": "专注力增强器",
             "text_transformer": "文本转换器",
@@ -724,6 +730,10 @@ translations = {
             "support_level": "Support Level",
             "content_sections": "Content Sections",
             "learning_tools": "Learning Tools",
+            "highlight_style": "Highlight Style",
+            "highlight_style_default": "Standard",
+            "highlight_style_visual": "Colors",
+            "highlight_style_kinesthetic": "Bold & Underline",
             "focus_mode": "Focus Mode",
             "read_aloud": "Read Aloud",
             "study_timer": "Study Timer",
@@ -782,6 +792,10 @@ translations = {
             "support_level": "支持级别",
             "content_sections": "内容部分",
             "learning_tools": "学习工具",
+            "highlight_style": "高亮样式",
+            "highlight_style_default": "标准",
+            "highlight_style_visual": "颜色",
+            "highlight_style_kinesthetic": "加粗和下划线",
             "focus_mode": "专注模式",
             "read_aloud": "朗读",
             "study_timer": "学习计时器",
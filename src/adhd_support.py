@@ -1,16 +1,185 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Callable, Optional
+import threading
+from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
-from langgraph.graph import StateGraph
 from src.config import SystemConfig
-from src.utils.llm_utils import get_llm
-from src.prompts.prompt_manager import PromptManager
-from src.utils.text_highlighter import TextHighlighter, get_highlighter_for_user
-from src.utils.content_analyzer import get_elements_to_highlight
+from src.utils.llm_utils import get_llm, stream_llm
+from src.utils.structured_output import (
+    invoke_structured, parse_structured, schema_json, JsonArrayStreamParser, StructuredOutputError
+)
+from src.utils.checkpoint_store import get_checkpoint_store
+from src.content_generator import start_unit_generation
+from src.prompts.prompt_manager import get_prompt_manager
+from src.utils.text_highlighter import find_highlight_spans
+from src.utils.content_analyzer import get_elements_for_units, requires_llm_analysis
+from src.utils.segmenter import MaterialSegmenter
+from src.utils.concurrency import bounded_map
 
 # 初始化提示管理器
-prompt_manager = PromptManager()
+prompt_manager = get_prompt_manager()
 config = SystemConfig()
 
+class MicroUnitEnrichment(BaseModel):
+    """为本地切分的单元补充的信息"""
+    learning_objective: str = Field(..., min_length=1, description="一句话说明学完本单元能做到什么")
+    key_points: List[str] = Field(..., min_length=1, description="3-5个关键点，尽量使用单元原文中的词语")
+    check_questions: List[str] = Field(default_factory=list, description="1-2个简短的理解检查问题")
+
+# 单元估计完成时间的上限（分钟）
+MAX_UNIT_MINUTES = 60
+
+class MicroUnit(BaseModel):
+    """由LLM写出的微内容单元"""
+    title: Optional[str] = Field(None, description="单元标题")
+    content: str = Field(..., min_length=1, description="单元内容")
+    learning_objective: str = Field(..., min_length=1, description="一句话说明学完本单元能做到什么")
+    key_points: List[str] = Field(..., min_length=1, description="3-5个关键点")
+    # 不设上限：单个单元超时不应使整个列表校验失败，超出部分在unit_dict中截断
+    estimated_time_minutes: int = Field(..., ge=1, description=f"估计完成时间（分钟，不超过{MAX_UNIT_MINUTES}）")
+    check_questions: List[str] = Field(..., description="1-2个简短的理解检查问题")
+
+class MicroUnitList(BaseModel):
+    """由LLM划分的微内容单元列表"""
+    units: List[MicroUnit] = Field(..., min_length=1, description="按阅读顺序排列的微内容单元")
+
+# 单元补充提示：单元已在本地切分好，LLM只补充学习目标、关键点和理解检查问题
+UNIT_ENRICHMENT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """你是一位专门为ADHD学生提供支持的教育内容适配专家。下面是从学习材料中切分出的一个学习单元，预计{estimated_time_minutes}分钟可完成。
+请不要改写单元内容，只为它补充：
+1. 学习目标：一句话说明学完本单元能做到什么
+2. 关键点：3-5个，尽量使用单元原文中的词语
+3. 理解检查：1-2个简短问题
+
+请只输出一个符合以下JSON Schema的JSON对象，不要输出其他内容：
+{schema}"""),
+    ("human", "单元标题：{title}\n\n单元内容：\n{content}")
+])
+
+def build_segmenter() -> MaterialSegmenter:
+    """按配置的阅读速度创建本地切分器"""
+    return MaterialSegmenter(
+        words_per_minute=config.get("micro_units.words_per_minute") or 200,
+        chars_per_minute=config.get("micro_units.chars_per_minute") or 300
+    )
+
+class UnitPublisher:
+    """
+    将已完成的单元发布到任务的检查点存储，处理页面在任务完成前即可显示，
+    同时提前开始生成该单元的详细内容
+    
+    只对带有job_id且启用了检查点存储的任务生效，否则所有发布都被忽略。
+    """
+    
+    def __init__(self, state: Dict, budget: threading.Semaphore, node: str = "micro_content_divider"):
+        """
+        初始化发布器，并清除该节点上次运行（如中断的任务）发布的单元
+        
+        Args:
+            state: 工作流状态
+            budget: 任务的LLM并发预算，提前生成与分割器共用
+            node: 发布单元的节点名称
+        """
+        self.state = state
+        self.budget = budget
+        self.node = node
+        self.job_id = (state.get("metadata") or {}).get("job_id")
+        self.store = get_checkpoint_store() if self.job_id else None
+        if self.store is None or not self.store.enabled:
+            self.job_id = None
+        if self.job_id:
+            self.store.clear_units(self.job_id, node)
+    
+    @property
+    def active(self) -> bool:
+        """是否发布单元"""
+        return self.job_id is not None
+    
+    def publish(self, unit: Dict[str, Any]) -> None:
+        """发布一个已完成的单元"""
+        if not self.active:
+            return
+        self.store.save_unit(self.job_id, self.node, unit)
+        start_unit_generation(self.state, unit, self.budget)
+    
+    def publish_all(self, units: List[Dict[str, Any]]) -> None:
+        """发布最终的单元列表，替换之前发布的单元"""
+        if not self.active:
+            return
+        for unit in units:
+            self.publish(unit)
+        self.store.clear_units(self.job_id, self.node, after=len(units))
+
+def enrich_micro_units(llm, segments: List[Dict[str, Any]], max_workers: int,
+                       on_unit: Optional[Callable[[Dict[str, Any]], None]] = None,
+                       budget: Optional[threading.Semaphore] = None) -> List[Dict[str, Any]]:
+    """
+    并行为本地切分好的每个单元补充学习目标、关键点和理解检查问题
+    
+    Args:
+        llm: 语言模型
+        segments: 本地切分的单元
+        max_workers: 最大并发请求数
+        on_unit: 每个单元补充完成时立即调用（按完成顺序）
+        budget: 与提前生成共享的LLM并发预算
+    
+    Returns:
+        微内容单元列表，顺序与输入相同；补充失败的单元只保留本地切分的信息
+    """
+    def enrich(segment: Dict[str, Any]) -> Dict[str, Any]:
+        """为单个单元请求补充信息"""
+        enrichment = invoke_structured(llm, UNIT_ENRICHMENT_PROMPT.format(
+            estimated_time_minutes=segment["estimated_time_minutes"],
+            title=segment.get("title") or "无",
+            content=segment["content"],
+            schema=schema_json(MicroUnitEnrichment)
+        ), MicroUnitEnrichment, node="micro_content_enricher")
+        return enrichment.model_dump()
+    
+    micro_units: List[Optional[Dict[str, Any]]] = [None] * len(segments)
+    
+    def finish(index: int, result: Any) -> None:
+        """合并单元的补充结果"""
+        unit = dict(segments[index])
+        if isinstance(result, Exception):
+            print(f"补充单元 {unit['unit_number']} 时出错: {result}")
+        else:
+            unit.update(result)
+        micro_units[index] = unit
+        if on_unit is not None:
+            on_unit(unit)
+    
+    bounded_map(enrich, segments, max_workers=max_workers, on_result=finish, budget=budget)
+    return micro_units
+
+def unit_dict(number: int, unit: MicroUnit) -> Dict[str, Any]:
+    """将校验后的单元转为带序号的字典，估计完成时间截断到MAX_UNIT_MINUTES"""
+    return {"unit_number": number, **unit.model_dump(exclude_none=True),
+            "estimated_time_minutes": min(unit.estimated_time_minutes, MAX_UNIT_MINUTES)}
+
+def stream_micro_units(llm, prompt: Any, on_unit: Callable[[Dict[str, Any]], None]) -> str:
+    """
+    流式接收LLM的单元划分结果，每个单元的JSON一闭合就校验并交给on_unit
+    
+    未通过校验的单元不发布，由最终的整体校验和修复处理。
+    
+    Args:
+        llm: 语言模型
+        prompt: 已格式化的单元划分提示
+        on_unit: 每个完整单元到达时调用
+    
+    Returns:
+        完整的LLM输出
+    """
+    parser = JsonArrayStreamParser()
+    for piece in stream_llm(llm, prompt, node="micro_content_divider"):
+        for index, element in parser.feed(piece):
+            try:
+                unit = parse_structured(element, MicroUnit)
+            except StructuredOutputError:
+                continue
+            on_unit(unit_dict(index + 1, unit))
+    return parser.text
+
 # 微内容分割器
 def micro_content_divider(state: Dict) -> Dict:
     """
@@ -89,32 +258,23 @@ def micro_content_divider(state: Dict) -> Dict:
     # 获取用户问卷答案
     questionnaire_answers = state.get("user_profile", {}).get("questionnaire_answers", {})
     attention_span_minutes = questionnaire_answers.get("attention_span_minutes", 10)
-    # 创建提示
-    prompt = prompt_manager.get_prompt("micro_content_division") or ChatPromptTemplate.from_messages([
-        ("system", """你是一位专门为ADHD学生提供支持的教育内容适配专家。你的任务是将长篇学习材料分解为更小、更易于管理的学习单元，以帮助学生保持注意力和提高学习效果。
-
-请遵循以下原则：
-1. 将内容分解为{attention_span_minutes}分钟可完成的学习单元
-2. 每个单元应该有明确的焦点和学习目标
-3. 识别内容的自然断点和主题转换
-4. 为每个单元提取3-5个关键点
-5. 估计每个单元的完成时间（基于平均阅读速度）
-
-请输出：
-1. 微内容单元列表，每个单元包含：
-   - 单元内容
-   - 学习目标
-   - 关键点列表
-   - 估计完成时间（分钟）
-   - 理解检查问题（1-2个简短问题)"""),
-        ("human", "请将以下学习材料分解为微内容单元，以帮助ADHD学生更好地学习：\n\n{content}")
-    ])
-    
-    # 调用LLM
-    response = llm.invoke(prompt.format(attention_span_minutes=attention_span_minutes, content=current_content))
-    
-    # 解析响应
-    micro_units = parse_micro_units(response.content)
+    # 每个单元完成后立即发布，处理页面无需等待整个节点完成；
+    # 分割器和提前生成共用一个并发预算，合计不超过llm.max_concurrency
+    max_concurrency = config.get("llm.max_concurrency") or 1
+    budget = threading.BoundedSemaphore(max_concurrency)
+    publisher = UnitPublisher(state, budget)
+    # 本地切分：按标题、段落边界和阅读时间预先切分单元，LLM只并行补充每个单元的学习目标和问题
+    if (config.get("micro_units.segmentation") or "local") == "local":
+        segments = build_segmenter().segment(current_content, attention_span_minutes)
+        print(f"本地切分: {len(segments)} 个单元")
+        micro_units = enrich_micro_units(llm, segments, max_concurrency,
+                                         on_unit=publisher.publish if publisher.active else None, budget=budget)
+    else:
+        with budget:
+            micro_units = divide_with_llm(llm, current_content, attention_span_minutes,
+                                          on_unit=publisher.publish if publisher.active else None)
+        # 流式发布的单元替换为最终校验（或降级切分）后的单元
+        publisher.publish_all(micro_units)
     
     # 检查是否需要应用高亮
     should_highlight = False
@@ -124,16 +284,12 @@ def micro_content_divider(state: Dict) -> Dict:
     if "highlighting" in comprehension_aids:
         should_highlight = True
     
-    # 如果需要高亮，为每个微内容单元应用高亮
+    # 如果需要高亮，为每个微内容单元记录高亮位置
     if should_highlight:
-        # 获取用户的高亮器
-        highlighter = get_highlighter_for_user(questionnaire_answers)
-        
-        # 为每个微内容单元应用高亮
-        for unit in micro_units:
-            # 识别要高亮的元素
-            elements_to_highlight = get_elements_to_highlight(unit["content"], difficulty_type)
-            
+        # 所有单元合并为一次分析请求，而不是每个单元单独调用一次LLM
+        unit_elements = get_elements_for_units([unit["content"] for unit in micro_units], difficulty_type,
+                                               refine_with_llm=requires_llm_analysis(state.get("user_profile", {})))
+        for unit, elements_to_highlight in zip(micro_units, unit_elements):
             # 将关键点添加到主要高亮中
             if "key_points" in unit:
                 for point in unit["key_points"]:
@@ -142,17 +298,8 @@ def micro_content_divider(state: Dict) -> Dict:
                         "metadata": {"importance": "high"}
                     })
             
-            # 应用高亮
-            highlighted_content = unit["content"]
-            for highlight_type, elements in elements_to_highlight.items():
-                highlighted_content = highlighter.highlight_text(highlighted_content, highlight_type, elements)
-            
-            # 更新单元内容
-            unit["content"] = highlighted_content
-            
-            # 如果是第一个单元，添加CSS样式
-            if unit == micro_units[0]:
-                unit["content"] = f"<style>{highlighter.get_css()}</style>\n{unit['content']}"
+            # 只记录高亮位置，内容保持纯文本，展示时再按用户的高亮样式渲染
+            unit["highlight_spans"] = find_highlight_spans(unit["content"], elements_to_highlight)
     
     # 更新状态
     if "processed_content" not in state:
@@ -172,137 +319,50 @@ def micro_content_divider(state: Dict) -> Dict:
     
     return state
 
-def parse_micro_units(content: str) -> List[Dict[str, Any]]:
+def divide_with_llm(llm, current_content: str, attention_span_minutes: int,
+                    on_unit: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
     """
-    解析LLM生成的微内容单元
+    由LLM在一次调用中同时寻找断点并写出所有单元
+    
+    LLM的输出按MicroUnitList的JSON Schema校验；修复后仍不符合时改用本地切分，
+    不再返回内容被截断或字段缺失的单元。给出on_unit且启用流式输出时，
+    每个单元在其JSON闭合时即交给on_unit，无需等待完整响应。
     
     Args:
-        content: LLM生成的响应内容
+        llm: 语言模型
+        current_content: 学习材料
+        attention_span_minutes: 学习者的注意力持续时间（分钟）
+        on_unit: 流式输出中每个完整单元到达时调用
     
     Returns:
         微内容单元列表
     """
-    import re
-    
-    # 初始化结果列表
-    micro_units = []
-    
-    # 尝试识别单元分隔符
-    unit_patterns = [
-        r'单元\s*(\d+)',
-        r'微内容单元\s*(\d+)',
-        r'学习单元\s*(\d+)',
-        r'Unit\s*(\d+)',
-        r'Part\s*(\d+)',
-        r'Section\s*(\d+)'
-    ]
-    
-    # 查找所有可能的单元分隔点
-    unit_boundaries = []
-    for pattern in unit_patterns:
-        for match in re.finditer(pattern, content, re.IGNORECASE):
-            unit_boundaries.append((match.start(), int(match.group(1))))
-    
-    # 按位置排序
-    unit_boundaries.sort()
-    
-    # 如果找不到明确的单元分隔符，尝试按段落分割
-    if not unit_boundaries:
-        paragraphs = re.split(r'\n\s*\n', content)
-        if len(paragraphs) >= 3:  # 至少需要3个段落才考虑按段落分割
-            for i, para in enumerate(paragraphs):
-                if i == 0 and len(para.strip()) < 100:  # 跳过可能的介绍段落
-                    continue
-                unit_boundaries.append((content.find(para), i))
-    
-    # 如果仍然找不到分隔点，将整个内容作为一个单元
-    if not unit_boundaries:
-        return [{
-            "content": content,
-            "estimated_time_minutes": 10,
-            "key_points": ["请仔细阅读内容以提取关键点"]
-        }]
-    
-    # 提取每个单元的内容
-    for i in range(len(unit_boundaries)):
-        start_pos = unit_boundaries[i][0]
-        unit_num = unit_boundaries[i][1]
-        
-        # 确定单元结束位置
-        if i < len(unit_boundaries) - 1:
-            end_pos = unit_boundaries[i+1][0]
-        else:
-            end_pos = len(content)
-        
-        unit_content = content[start_pos:end_pos].strip()
-        
-        # 解析单元内容
-        unit = {
-            "content": unit_content,
-            "unit_number": unit_num,
-            "estimated_time_minutes": 5  # 默认估计时间
-        }
-        
-        # 尝试提取学习目标
-        objective_match = re.search(r'(学习目标|Learning Objective|Objective)[:：](.*?)(?=\n\n|\n[A-Z]|$)', unit_content, re.IGNORECASE | re.DOTALL)
-        if objective_match:
-            unit["learning_objective"] = objective_match.group(2).strip()
-        
-        # 尝试提取关键点
-        key_points = []
-        key_points_match = re.search(r'(关键点|Key Points|Main Points)[:：](.*?)(?=\n\n|\n[A-Z]|$)', unit_content, re.IGNORECASE | re.DOTALL)
-        if key_points_match:
-            key_points_text = key_points_match.group(2).strip()
-            # 尝试按不同的列表格式分割
-            point_matches = re.findall(r'[•\-\*]\s*(.*?)(?=\n[•\-\*]|\n\n|$)', key_points_text)
-            if point_matches:
-                key_points = [point.strip() for point in point_matches]
-            else:
-                # 尝试按数字列表分割
-                point_matches = re.findall(r'\d+\.\s*(.*?)(?=\n\d+\.|\n\n|$)', key_points_text)
-                if point_matches:
-                    key_points = [point.strip() for point in point_matches]
-                else:
-                    # 按行分割
-                    key_points = [line.strip() for line in key_points_text.split('\n') if line.strip()]
-        
-        if key_points:
-            unit["key_points"] = key_points
-        
-        # 尝试提取估计时间
-        time_match = re.search(r'(估计时间|Estimated Time|Time)[:：]\s*(\d+)[^\d]*分钟', unit_content, re.IGNORECASE)
-        if time_match:
-            unit["estimated_time_minutes"] = int(time_match.group(2))
-        
-        # 尝试提取理解检查问题
-        questions = []
-        questions_match = re.search(r'(理解检查|Check Questions|Questions)[:：](.*?)(?=\n\n|\n[A-Z]|$)', unit_content, re.IGNORECASE | re.DOTALL)
-        if questions_match:
-            questions_text = questions_match.group(2).strip()
-            # 尝试按不同的问题格式分割
-            question_matches = re.findall(r'[Q\d]+[\.:]?\s*(.*?)(?=\n[Q\d]+[\.:]?|\n\n|$)', questions_text)
-            if question_matches:
-                questions = [q.strip() for q in question_matches]
-            else:
-                # 按行分割
-                questions = [line.strip() for line in questions_text.split('\n') if line.strip() and '?' in line]
-        
-        if questions:
-            unit["check_questions"] = questions
-        
-        # 清理单元内容，移除元数据部分
-        clean_content = unit_content
-        for pattern in [r'(学习目标|Learning Objective|Objective)[:：].*?(?=\n\n|\n[A-Z]|$)', 
-                       r'(关键点|Key Points|Main Points)[:：].*?(?=\n\n|\n[A-Z]|$)',
-                       r'(估计时间|Estimated Time|Time)[:：].*?(?=\n\n|\n[A-Z]|$)',
-                       r'(理解检查|Check Questions|Questions)[:：].*?(?=\n\n|\n[A-Z]|$)']:
-            clean_content = re.sub(pattern, '', clean_content, flags=re.IGNORECASE | re.DOTALL)
-        
-        # 如果清理后的内容不为空，更新单元内容
-        clean_content = re.sub(r'\n{3,}', '\n\n', clean_content).strip()
-        if clean_content:
-            unit["content"] = clean_content
-        
-        micro_units.append(unit)
+    # 创建提示
+    prompt = prompt_manager.get_prompt("micro_content_division") or ChatPromptTemplate.from_messages([
+        ("system", """你是一位专门为ADHD学生提供支持的教育内容适配专家。你的任务是将长篇学习材料分解为更小、更易于管理的学习单元，以帮助学生保持注意力和提高学习效果。
+
+请遵循以下原则：
+1. 将内容分解为{attention_span_minutes}分钟可完成的学习单元
+2. 每个单元应该有明确的焦点和学习目标
+3. 识别内容的自然断点和主题转换
+4. 为每个单元提取3-5个关键点
+5. 估计每个单元的完成时间（基于平均阅读速度）
+
+请只输出一个符合以下JSON Schema的JSON对象，不要输出其他内容。每个单元包含单元内容、学习目标、关键点列表、估计完成时间（分钟）和1-2个理解检查问题：
+{schema}"""),
+        ("human", "请将以下学习材料分解为微内容单元，以帮助ADHD学生更好地学习：\n\n{content}")
+    ])
     
-    return micro_units
+    formatted_prompt = prompt.format(attention_span_minutes=attention_span_minutes, content=current_content,
+                                     schema=schema_json(MicroUnitList))
+    output = None
+    if on_unit is not None and config.get("micro_units.streaming"):
+        output = stream_micro_units(llm, formatted_prompt, on_unit)
+    
+    try:
+        result = invoke_structured(llm, formatted_prompt, MicroUnitList, node="micro_content_divider", output=output)
+    except StructuredOutputError as error:
+        print(f"LLM单元划分结果无效，改用本地切分: {error}")
+        return build_segmenter().segment(current_content, attention_span_minutes)
+    
+    return [unit_dict(number, unit) for number, unit in enumerate(result.units, 1)]
@@ -1,14 +1,19 @@
-from typing import Dict, List, Any, Optional, TypedDict
+from typing import Annotated, Dict, List, Any, Iterable, Optional, Tuple, TypedDict
+import operator
+import threading
 from langchain_core.messages import AIMessage, HumanMessage
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
 from src.config import SystemConfig
 from src.utils.llm_utils import get_llm
+from src.utils.checkpoint_store import get_checkpoint_store
 
 # 导入节点函数
 from src.user_profile import analyze_user_profile as profile_analyzer
 from src.adhd_support import micro_content_divider
-from src.dyslexia_support import syntax_simplifier
-from src.content_generator import content_generator
+from src.dyslexia_support import syntax_simplifier, vocabulary_substitution_engine
+from src.content_generator import content_generator, discard_unit_generations
+from src.planner import DIFFICULTY_NODES, FULL_PLAN, get_skipped_nodes, normalize_plan
+from src.prompts.prompt_manager import get_prompt_manager
 
 # 简单的内存类
 class SimpleMemory:
@@ -21,53 +26,131 @@ class SimpleMemory:
     def get_all(self):
         return self.memories
 
+# 状态合并函数：并行分支各自写入不同的键，合并时互不覆盖
+def merge_dicts(left: Optional[Dict], right: Optional[Dict]) -> Dict:
+    """合并两个分支对同一字典字段的更新"""
+    merged = dict(left or {})
+    merged.update(right or {})
+    return merged
+
 # 定义系统状态
 class SupportSystemState(TypedDict):
     user_profile: Dict  # 用户特征和学习障碍类型
     learning_materials: Dict  # 原始学习材料
-    processed_content: Dict  # 经过处理的内容
-    interaction_history: List  # 交互历史
+    processed_content: Annotated[Dict, merge_dicts]  # 经过处理的内容（并行分支按键合并）
+    interaction_history: Annotated[List, operator.add]  # 交互历史（并行分支追加）
     current_focus: str  # 当前工作的焦点区域
     next_steps: List  # 推荐的后续步骤
-    metadata: Dict  # 额外信息
+    metadata: Annotated[Dict, merge_dicts]  # 额外信息（并行分支按键合并）
     iteration_count: int  # 迭代计数器，用于防止无限循环
 
+def _run_tool(tool, state: Dict) -> Dict:
+    """
+    在状态副本上运行工具函数，并只返回其产生的增量更新
+    
+    工具函数会直接修改传入的状态，因此并行分支必须各自使用独立的副本，
+    返回的增量再由状态合并函数汇总。
+    """
+    working_state = dict(state)
+    working_state["user_profile"] = dict(state.get("user_profile") or {})
+    working_state["learning_materials"] = dict(state.get("learning_materials") or {})
+    working_state["processed_content"] = dict(state.get("processed_content") or {})
+    working_state["metadata"] = dict(state.get("metadata") or {})
+    working_state["interaction_history"] = []
+    
+    before = state.get("processed_content") or {}
+    before_metadata = state.get("metadata") or {}
+    result_state = tool(working_state)
+    
+    update = {
+        "processed_content": {
+            key: value for key, value in result_state.get("processed_content", {}).items()
+            if key not in before or before[key] is not value
+        },
+        "metadata": {
+            key: value for key, value in result_state.get("metadata", {}).items()
+            if key not in before_metadata or before_metadata[key] is not value
+        },
+        "interaction_history": list(result_state.get("interaction_history", []))
+    }
+    if result_state.get("current_focus") != state.get("current_focus"):
+        update["current_focus"] = result_state.get("current_focus")
+    if result_state.get("user_profile") != state.get("user_profile"):
+        update["user_profile"] = result_state.get("user_profile")
+    return update
+
+def _checkpointed(node: str, processor):
+    """
+    为节点函数添加检查点：节点完成后持久化其增量更新，任务恢复时直接重放已保存的更新
+    
+    任务由元数据中的job_id标识，没有job_id的调用（如命令行单次运行）不做检查点。
+    """
+    def run_node(state: Dict) -> Dict:
+        job_id = (state.get("metadata") or {}).get("job_id")
+        store = get_checkpoint_store() if job_id else None
+        if store is None or not store.enabled:
+            return processor(state)
+        
+        saved_update = store.load_node(job_id, node)
+        if saved_update is not None:
+            print(f"恢复: 节点 {node} 已完成，使用检查点")
+            return saved_update
+        
+        update = processor(state)
+        store.save_node(job_id, node, update)
+        return update
+    
+    run_node.__name__ = getattr(processor, "__name__", node)
+    return run_node
+
 # 用户特征分析器
 def user_profile_analyzer(state: Dict) -> Dict:
     """分析用户特征"""
+    # 已有分析结果时跳过
+    if "analysis" in state.get("user_profile", {}):
+        print("跳过: 用户特征已分析")
+        return {}
+    
     print("执行: 用户特征分析")
     
     # 使用导入的profile_analyzer函数
-    result_state = profile_analyzer(state)
+    update = _run_tool(profile_analyzer, state)
     
     # 记录处理历史
     memory = SimpleMemory()
     memory.add("完成用户特征分析")
-    result_state["interaction_history"].append({
+    update["interaction_history"].append({
         "step": "user_profile_analyzer",
         "memory": memory.get_all()
     })
     
-    return result_state
+    return update
 
 # ADHD支持处理器
 def adhd_support_processor(state: Dict) -> Dict:
     """提供ADHD支持"""
     print("执行: ADHD支持处理")
     
-    # 使用微内容分割器
-    result_state = micro_content_divider(state)
+    # 使用微内容分割器；分割失败或计划中没有内容生成时，丢弃分割期间提前开始的生成
+    job_id = (state.get("metadata") or {}).get("job_id")
+    keep_early_generations = False
+    try:
+        update = _run_tool(micro_content_divider, state)
+        keep_early_generations = "content_generation" in ((state.get("metadata") or {}).get("execution_plan") or [])
+    finally:
+        if job_id and not keep_early_generations:
+            discard_unit_generations(job_id)
     
     # 记录处理历史
     memory = SimpleMemory()
     memory.add("完成ADHD支持处理")
-    result_state["interaction_history"].append({
+    update["interaction_history"].append({
         "step": "adhd_support_processor",
         "tool": "micro_content_divider",
         "memory": memory.get_all()
     })
     
-    return result_state
+    return update
 
 # 阅读障碍支持处理器
 def dyslexia_support_processor(state: Dict) -> Dict:
@@ -75,18 +158,37 @@ def dyslexia_support_processor(state: Dict) -> Dict:
     print("执行: 阅读障碍支持处理")
     
     # 使用句法简化器
-    result_state = syntax_simplifier(state)
+    update = _run_tool(syntax_simplifier, state)
     
     # 记录处理历史
     memory = SimpleMemory()
     memory.add("完成阅读障碍支持处理")
-    result_state["interaction_history"].append({
+    update["interaction_history"].append({
         "step": "dyslexia_support_processor",
         "tool": "syntax_simplifier",
         "memory": memory.get_all()
     })
     
-    return result_state
+    return update
+
+# 词汇替换处理器
+def vocabulary_substitution_processor(state: Dict) -> Dict:
+    """替换复杂词汇（本地词表，不调用LLM）"""
+    print("执行: 词汇替换处理")
+    
+    # 使用词汇替换引擎
+    update = _run_tool(vocabulary_substitution_engine, state)
+    
+    # 记录处理历史
+    memory = SimpleMemory()
+    memory.add("完成词汇替换处理")
+    update["interaction_history"].append({
+        "step": "vocabulary_substitution_processor",
+        "tool": "vocabulary_substitution_engine",
+        "memory": memory.get_all()
+    })
+    
+    return update
 
 # 通用学习工具处理器
 def general_tools_processor(state: Dict) -> Dict:
@@ -94,18 +196,20 @@ def general_tools_processor(state: Dict) -> Dict:
     print("执行: 通用学习工具处理")
     
     # 示例实现
-    state["processed_content"]["general_tools_applied"] = True
-    state["current_focus"] = "all_complete"
+    update = {
+        "processed_content": {"general_tools_applied": True},
+        "current_focus": "all_complete"
+    }
     
     # 记录处理历史
     memory = SimpleMemory()
     memory.add("完成通用学习工具处理")
-    state["interaction_history"].append({
+    update["interaction_history"] = [{
         "step": "general_tools_processor",
         "memory": memory.get_all()
-    })
+    }]
     
-    return state
+    return update
 
 # 内容生成处理器
 def content_generation_processor(state: Dict) -> Dict:
@@ -113,110 +217,154 @@ def content_generation_processor(state: Dict) -> Dict:
     print("执行: 内容生成处理")
     print(f"内容生成处理器输入状态: processed_content keys: {state.get('processed_content', {}).keys()}")
     
-    # 使用内容生成器
-    result_state = content_generator(state)
+    # 使用内容生成器；未被取用的提前生成（如生成器提前返回或出错）在结束时丢弃
+    try:
+        update = _run_tool(content_generator, state)
+    finally:
+        job_id = (state.get("metadata") or {}).get("job_id")
+        if job_id:
+            discard_unit_generations(job_id)
     
-    print(f"内容生成处理器输出状态: processed_content keys: {result_state.get('processed_content', {}).keys()}")
-    if "detailed_units" in result_state.get("processed_content", {}):
-        print(f"生成了 {len(result_state['processed_content']['detailed_units'])} 个详细单元")
+    print(f"内容生成处理器输出状态: processed_content keys: {update['processed_content'].keys()}")
+    if "detailed_units" in update["processed_content"]:
+        print(f"生成了 {len(update['processed_content']['detailed_units'])} 个详细单元")
     else:
         print("没有生成详细单元")
     
     # 记录处理历史
     memory = SimpleMemory()
     memory.add("完成内容生成处理")
-    result_state["interaction_history"].append({
+    update["interaction_history"].append({
         "step": "content_generation_processor",
         "tool": "content_generator",
         "memory": memory.get_all()
     })
     
-    return result_state
+    return update
 
 # 构建主控制图
-def build_support_system() -> StateGraph:
-    """构建支持系统的工作流图"""
-    print("构建支持系统工作流图")
+def build_support_system(plan: Optional[Tuple[str, ...]] = None) -> StateGraph:
+    """
+    构建支持系统的工作流图
+    
+    ADHD分支（微内容分割 → 内容生成）、阅读障碍分支（句法简化）和词汇替换分支都只读取原始材料，
+    因此在用户特征分析之后并行执行，最后在通用工具节点汇合：
+    
+        planner ─> profile_analyzer ─┬─> adhd_support ─> content_generation ─┬─> general_tools ─> END
+                                     ├─> dyslexia_support ───────────────────┤
+                                     └─> vocabulary_substitution ────────────┘
+    
+    Args:
+        plan: 由plan_support_pipeline编译的执行计划，只有计划中的节点会被加入图中；
+              为None时使用完整计划
+    """
+    plan = normalize_plan(plan) if plan is not None else FULL_PLAN
+    skipped_nodes = get_skipped_nodes(plan)
+    print(f"构建支持系统工作流图，执行计划: {list(plan)}，跳过: {skipped_nodes}")
     
     # 创建状态图
     workflow = StateGraph(SupportSystemState)
     
-    # 定义路由函数
-    def router(state: Dict) -> str:
-        # 增加迭代计数
-        state["iteration_count"] = state.get("iteration_count", 0) + 1
-        print(f"当前迭代次数: {state['iteration_count']}")
-        
-        # 如果迭代次数过多，强制结束
-        if state["iteration_count"] >= 5:
-            print("达到最大迭代次数，强制结束")
-            return "end"
-        
-        # 检查处理状态
-        if "analysis" not in state.get("user_profile", {}):
-            # 如果还没有分析用户特征，先进行分析
-            print("路由到: profile_analyzer")
-            return "profile_analyzer"
-        
-        # 检查是否已经完成所有处理
-        if state.get("current_focus") == "all_complete":
-            print("处理完成，结束流程")
-            return "end"
-        
-        # 检查是否已经进行了微内容分割
-        if "micro_units" not in state.get("processed_content", {}):
-            # 如果还没有进行微内容分割，进行ADHD支持
-            print("路由到: adhd_support")
-            return "adhd_support"
-        
-        # 检查是否已经进行了句法简化
-        if "simplified_text" not in state.get("processed_content", {}):
-            # 如果还没有进行句法简化，进行阅读障碍支持
-            print("路由到: dyslexia_support")
-            return "dyslexia_support"
-        
-        # 检查是否已经生成了详细内容
-        if "detailed_units" not in state.get("processed_content", {}):
-            # 如果还没有生成详细内容，进行内容生成
-            print("路由到: content_generation")
-            print(f"processed_content keys: {state.get('processed_content', {}).keys()}")
-            print(f"micro_units count: {len(state.get('processed_content', {}).get('micro_units', []))}")
-            return "content_generation"
-        
-        # 如果已经完成了所有处理步骤，使用通用工具
-        print("路由到: general_tools")
-        return "general_tools"
+    # 计划节点：在元数据中记录执行计划和跳过的节点
+    def planner(state: Dict) -> Dict:
+        return {"metadata": {"execution_plan": list(plan), "skipped_nodes": skipped_nodes}}
     
     # 注册节点
-    workflow.add_node("router", lambda state: state)  # 路由节点只返回状态，不做修改
-    workflow.add_node("profile_analyzer", user_profile_analyzer)
-    workflow.add_node("adhd_support", adhd_support_processor)
-    workflow.add_node("dyslexia_support", dyslexia_support_processor)
-    workflow.add_node("content_generation", content_generation_processor)
-    workflow.add_node("general_tools", general_tools_processor)
-    
-    # 添加条件路由
-    workflow.add_conditional_edges(
-        "router",
-        router,
-        {
-            "profile_analyzer": "profile_analyzer",
-            "adhd_support": "adhd_support",
-            "dyslexia_support": "dyslexia_support",
-            "content_generation": "content_generation",
-            "general_tools": "general_tools",
-            "end": END
-        }
-    )
-    
-    # 从各处理节点返回到路由决策
-    workflow.add_edge("profile_analyzer", "router")
-    workflow.add_edge("adhd_support", "router")
-    workflow.add_edge("dyslexia_support", "router")
-    workflow.add_edge("content_generation", "router")
-    workflow.add_edge("general_tools", "router")
+    workflow.add_node("planner", planner)
+    node_functions = {
+        "profile_analyzer": user_profile_analyzer,
+        "adhd_support": adhd_support_processor,
+        "dyslexia_support": dyslexia_support_processor,
+        "vocabulary_substitution": vocabulary_substitution_processor,
+        "content_generation": content_generation_processor,
+        "general_tools": general_tools_processor
+    }
+    for node in plan:
+        workflow.add_node(node, _checkpointed(node, node_functions[node]))
     
     # 设置入口点
-    workflow.set_entry_point("router")
+    workflow.add_edge(START, "planner")
+    branch_source = "planner"
+    if "profile_analyzer" in plan:
+        workflow.add_edge("planner", "profile_analyzer")
+        branch_source = "profile_analyzer"
+    
+    # 扇出：各支持分支并行执行，记录每个分支的末端节点
+    branch_tails = []
+    if "adhd_support" in plan:
+        workflow.add_edge(branch_source, "adhd_support")
+        if "content_generation" in plan:
+            workflow.add_edge("adhd_support", "content_generation")
+            branch_tails.append("content_generation")
+        else:
+            branch_tails.append("adhd_support")
+    if "dyslexia_support" in plan:
+        workflow.add_edge(branch_source, "dyslexia_support")
+        branch_tails.append("dyslexia_support")
+    if "vocabulary_substitution" in plan:
+        workflow.add_edge(branch_source, "vocabulary_substitution")
+        branch_tails.append("vocabulary_substitution")
+    if not branch_tails:
+        branch_tails.append(branch_source)
+    
+    # 扇入：等待所有分支完成后再应用通用工具
+    if "general_tools" in plan:
+        workflow.add_edge(branch_tails if len(branch_tails) > 1 else branch_tails[0], "general_tools")
+        workflow.add_edge("general_tools", END)
+    else:
+        for tail in branch_tails:
+            workflow.add_edge(tail, END)
     
-    return workflow.compile()
\ No newline at end of file
+    return workflow.compile()
+
+# 已编译工作流图缓存，键为规范化后的执行计划
+_compiled_graphs: Dict[Tuple[str, ...], Any] = {}
+_compiled_graphs_lock = threading.Lock()
+
+def get_support_system(plan: Optional[Tuple[str, ...]] = None):
+    """
+    获取已编译的支持系统工作流图
+    
+    图只依赖执行计划，因此每种计划只编译一次，之后所有请求复用同一个编译结果。
+    已编译的图是无状态的，可以被多个线程同时调用。
+    
+    Args:
+        plan: 执行计划，为None时使用完整计划
+    
+    Returns:
+        已编译的工作流图
+    """
+    key = normalize_plan(plan) if plan is not None else FULL_PLAN
+    with _compiled_graphs_lock:
+        graph = _compiled_graphs.get(key)
+        if graph is None:
+            graph = build_support_system(key)
+            _compiled_graphs[key] = graph
+        return graph
+
+def warm_support_systems(plans: Optional[Iterable[Tuple[str, ...]]] = None) -> List[Tuple[str, ...]]:
+    """
+    预编译常用的工作流图并预加载提示模板（在应用启动时调用）
+    
+    Args:
+        plans: 需要预编译的执行计划，默认为完整计划和每种学习障碍类型的计划
+    
+    Returns:
+        已预编译的执行计划列表
+    """
+    if plans is None:
+        plans = [FULL_PLAN] + [normalize_plan(nodes) for nodes in DIFFICULTY_NODES.values()]
+    
+    get_prompt_manager().warm()
+    
+    warmed = []
+    for plan in plans:
+        get_support_system(plan)
+        warmed.append(normalize_plan(plan))
+    print(f"已预编译 {len(warmed)} 个工作流图")
+    return warmed
+
+def clear_support_system_cache() -> None:
+    """清空已编译工作流图缓存（配置变更或测试时使用）"""
+    with _compiled_graphs_lock:
+        _compiled_graphs.clear()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark for AI4FairEdu highlighting
+Compares the single-pass multi-pattern highlighter with the previous per-element regex substitution
+
+Usage:
+    python -m src.benchmarks.highlight_benchmark --paragraphs 2000 --elements 400
+"""
+
+from typing import Dict, List, Any
+import argparse
+import html
+import random
+import re
+import time
+
+from src.utils.text_highlighter import TextHighlighter, apply_highlighting_to_content
+
+WORDS = [
+    "learning", "network", "model", "data", "training", "neuron", "gradient", "layer", "function", "input",
+    "output", "weight", "bias", "activation", "loss", "optimizer", "batch", "epoch", "feature", "label",
+    "attention", "memory", "reading", "focus", "concept", "example", "definition", "student", "teacher", "lesson"
+]
+
+
+def legacy_highlight(highlighter: TextHighlighter, text: str, elements_to_highlight: Dict[str, List[Dict[str, Any]]]) -> str:
+    """The previous implementation: one compiled regex and one full rewrite per element and type"""
+    for highlight_type, elements in elements_to_highlight.items():
+        for element in sorted(elements, key=lambda x: len(x.get("text", "")), reverse=True):
+            element_text = element.get("text", "")
+            if not element_text:
+                continue
+            highlighted_element = highlighter.render_element(highlight_type, element)
+            pattern = re.compile(r'\b' + re.escape(element_text) + r'\b')
+            text = pattern.sub(highlighted_element.replace("\\", "\\\\"), text)
+    return text
+
+
+def build_document(paragraphs: int, seed: int) -> str:
+    """Build a synthetic document of random sentences"""
+    rng = random.Random(seed)
+    document = []
+    for _ in range(paragraphs):
+        sentences = []
+        for _ in range(rng.randint(3, 6)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(8, 16))]
+            sentences.append(" ".join(words).capitalize() + ".")
+        document.append(" ".join(sentences))
+    return "\n\n".join(document)
+
+
+def build_elements(count: int, seed: int) -> Dict[str, List[Dict[str, Any]]]:
+    """Build highlight elements of one to three words, spread over the four highlight types"""
+    rng = random.Random(seed)
+    types = ["primary", "secondary", "key_concepts", "definitions"]
+    elements = {highlight_type: [] for highlight_type in types}
+    for i in range(count):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        elements[types[i % len(types)]].append({"text": text, "metadata": {"definition": f"Meaning of {html.escape(text)}"}})
+    return elements
+
+
+def time_call(func, repeat: int) -> float:
+    """Best wall-clock time of several runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Highlighting benchmark")
+    parser.add_argument("--paragraphs", type=int, default=2000, help="Number of paragraphs in the document")
+    parser.add_argument("--elements", type=int, default=400, help="Number of elements to highlight")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs per implementation")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    args = parser.parse_args()
+
+    document = build_document(args.paragraphs, args.seed)
+    elements = build_elements(args.elements, args.seed)
+    highlighter = TextHighlighter()
+
+    legacy_seconds = time_call(lambda: legacy_highlight(highlighter, document, elements), args.repeat)
+    single_pass_seconds = time_call(lambda: apply_highlighting_to_content(document, highlighter, elements), args.repeat)
+
+    print(f"Document: {len(document):,} characters, {args.elements} elements")
+    print(f"Per-element regex: {legacy_seconds * 1000:10.1f} ms")
+    print(f"Single pass:       {single_pass_seconds * 1000:10.1f} ms")
+    print(f"Speedup:           {legacy_seconds / single_pass_seconds:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
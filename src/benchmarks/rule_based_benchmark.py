@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark for AI4FairEdu rule-based element identification
+Compares the single-pass rule-based analyzer with the previous per-sentence implementation on book-length input
+
+Usage:
+    python -m src.benchmarks.rule_based_benchmark --sizes 0.25 1 2
+"""
+
+from typing import Dict, List, Any
+import argparse
+import random
+import re
+
+from src.benchmarks.highlight_benchmark import WORDS, time_call
+from src.config import SystemConfig
+from src.utils.content_analyzer import ContentAnalyzer
+
+# Sentences that trigger the primary, secondary and definition rules
+MARKED_SENTENCES = [
+    "This is an important point about the Neural Network.",
+    "The key idea is that gradient descent updates every weight.",
+    "For example, a batch of inputs produces one loss value.",
+    "Backpropagation refers to the way errors flow backwards through the layers.",
+    "An epoch is one pass over the training data.",
+    "Some models, such as \"Transformers\", rely on attention."
+]
+
+
+def legacy_rule_based(content: str) -> Dict[str, List[Dict[str, Any]]]:
+    """The previous implementation: split into sentences, then several regexes and indicator loops per sentence"""
+    elements = {"primary": [], "secondary": [], "key_concepts": [], "definitions": []}
+    sentences = re.split(r'(?<=[.!?])\s+', content)
+
+    key_concept_pattern = r'\b[A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*\b'
+    quoted_pattern = r'"([^"]+)"'
+    key_concepts = set()
+    for sentence in sentences:
+        for match in re.finditer(key_concept_pattern, sentence):
+            if len(match.group(0).split()) <= 3:
+                key_concepts.add(match.group(0))
+        for match in re.finditer(quoted_pattern, sentence):
+            if len(match.group(1).split()) <= 3:
+                key_concepts.add(match.group(1))
+    for concept in list(key_concepts)[:3]:
+        elements["key_concepts"].append({"text": concept, "metadata": {"importance": "high"}})
+
+    primary_indicators = ["important", "key", "essential", "fundamental", "critical", "significant"]
+    if sentences:
+        elements["primary"].append({"text": sentences[0].strip(), "metadata": {"importance": "high"}})
+        for sentence in sentences[1:]:
+            for indicator in primary_indicators:
+                if indicator in sentence.lower():
+                    elements["primary"].append({"text": sentence.strip(), "metadata": {"importance": "high"}})
+                    break
+    elements["primary"] = elements["primary"][:5]
+
+    definition_patterns = [
+        r'([A-Za-z\s]+)\s+is\s+([^.!?]+)',
+        r'([A-Za-z\s]+)\s+refers\s+to\s+([^.!?]+)',
+        r'([A-Za-z\s]+)\s+is\s+defined\s+as\s+([^.!?]+)'
+    ]
+    for sentence in sentences:
+        for pattern in definition_patterns:
+            for match in re.finditer(pattern, sentence):
+                term = match.group(1).strip()
+                if len(term.split()) <= 3:
+                    elements["definitions"].append({"text": term, "metadata": {"definition": match.group(2).strip()}})
+    elements["definitions"] = elements["definitions"][:4]
+
+    secondary_indicators = ["for example", "such as", "e.g.", "i.e.", "in other words", "specifically"]
+    for sentence in sentences:
+        for indicator in secondary_indicators:
+            if indicator in sentence.lower():
+                elements["secondary"].append({"text": sentence.strip(), "metadata": {"importance": "medium"}})
+                break
+    elements["secondary"] = elements["secondary"][:3]
+
+    return elements
+
+
+def build_document(megabytes: float, seed: int) -> str:
+    """Build a synthetic document of random sentences with a sprinkling of rule-triggering sentences"""
+    rng = random.Random(seed)
+    target = int(megabytes * 1024 * 1024)
+    paragraphs, size = [], 0
+    while size < target:
+        sentences = []
+        for _ in range(rng.randint(3, 6)):
+            if rng.random() < 0.05:
+                sentences.append(rng.choice(MARKED_SENTENCES))
+            else:
+                words = [rng.choice(WORDS) for _ in range(rng.randint(8, 16))]
+                sentences.append(" ".join(words).capitalize() + ".")
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule-based analyzer benchmark")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[0.25, 1.0, 2.0], help="Document sizes in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs per implementation")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the single-pass implementation")
+    args = parser.parse_args()
+
+    config = SystemConfig()
+    config.config["content_analysis"]["mode"] = "local"
+    analyzer = ContentAnalyzer(config)
+
+    print(f"{'Size':>10} {'Per-sentence':>14} {'Single pass':>14} {'Speedup':>9} {'MB/s':>8}")
+    for megabytes in args.sizes:
+        document = build_document(megabytes, args.seed)
+        single_pass_seconds = time_call(lambda: analyzer._rule_based_identify_elements(document), args.repeat)
+        if args.skip_legacy:
+            legacy_column, speedup_column = "-", "-"
+        else:
+            legacy_seconds = time_call(lambda: legacy_rule_based(document), args.repeat)
+            legacy_column = f"{legacy_seconds * 1000:.1f} ms"
+            speedup_column = f"{legacy_seconds / single_pass_seconds:.1f}x"
+        throughput = len(document) / (1024 * 1024) / single_pass_seconds
+        print(f"{len(document) / (1024 * 1024):8.2f}MB {legacy_column:>14} {single_pass_seconds * 1000:11.1f} ms "
+              f"{speedup_column:>9} {throughput:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
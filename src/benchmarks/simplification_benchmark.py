@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark for AI4FairEdu syntax simplification
+Compares single-request and chunked concurrent simplification latency and output completeness against material size
+
+The LLM is simulated: each request takes a fixed overhead plus a generation time per output token,
+and its output is cut off at LLM_MAX_TOKENS like a real completion.
+
+Usage:
+    python -m src.benchmarks.simplification_benchmark --paragraphs 5 20 80
+"""
+
+from typing import Dict, Any
+import argparse
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+from src import dyslexia_support
+from src.dyslexia_support import syntax_simplifier
+from src.utils.glossary_store import GlossaryStore
+from src.utils.simplification_memo import SimplificationMemo
+from src.utils.source_retriever import estimate_tokens
+
+# Sentences well above the default target grade, so every paragraph is sent for simplification
+SENTENCES = [
+    "Photosynthesis constitutes the fundamental biochemical mechanism whereby autotrophic organisms synthesize carbohydrates.",
+    "Chlorophyll molecules absorb electromagnetic radiation predominantly within the visible spectrum.",
+    "The thylakoid membranes facilitate the conversion of luminous energy into chemical potential energy.",
+    "Atmospheric carbon dioxide is subsequently incorporated into organic compounds through the Calvin cycle.",
+    "Environmental variables such as temperature considerably influence the overall photosynthetic efficiency."
+]
+
+
+class SimulatedLLM:
+    """Echoes the material back after a latency proportional to the output length, capped at max_tokens"""
+
+    def __init__(self, overhead: float, seconds_per_token: float, max_tokens: int):
+        self.overhead = overhead
+        self.seconds_per_token = seconds_per_token
+        self.max_tokens = max_tokens
+
+    def invoke(self, prompt):
+        content = str(prompt).split("阅读障碍学生：\n\n", 1)[1]
+        paragraphs = [re.sub(r"^\[\d+\] ", "", paragraph) for paragraph in re.split(r"\n\n(?=\[\d+\] )", content)]
+        output = json.dumps({"paragraphs": paragraphs,
+                             "vocabulary": [{"term": "Photosynthesis", "definition": "How plants make food"}]})
+        if estimate_tokens(output) > self.max_tokens:
+            output = output[:self.max_tokens * 4]
+        time.sleep(self.overhead + estimate_tokens(output) * self.seconds_per_token)
+        return AIMessage(content=output)
+
+
+def build_material(paragraphs: int, seed: int) -> str:
+    """Build a material of paragraphs made of complex sentences"""
+    rng = random.Random(seed)
+    return "\n\n".join(" ".join(rng.choice(SENTENCES) for _ in range(rng.randint(3, 6))) for _ in range(paragraphs))
+
+
+def run_simplifier(material: str, mode: str, llm: SimulatedLLM, chunk_tokens: int, concurrency: int,
+                   glossary: GlossaryStore, memo: SimplificationMemo) -> Dict[str, Any]:
+    """Simplify a material in one mode and measure latency and how much of it came back"""
+    state = {
+        "user_profile": {"analysis": {"difficulty_type": "Dyslexia", "severity_level": 3}, "questionnaire_answers": {}},
+        "learning_materials": {"current_content": material}
+    }
+    settings = {
+        "simplification": {"mode": mode, "chunk_tokens": chunk_tokens},
+        "llm": {**dyslexia_support.config.config["llm"], "max_concurrency": concurrency}
+    }
+    with patch.dict(dyslexia_support.config.config, settings), \
+         patch("src.dyslexia_support.get_glossary_store", return_value=glossary), \
+         patch("src.dyslexia_support.get_simplification_memo", return_value=memo), \
+         patch("src.dyslexia_support.get_llm", return_value=llm), \
+         patch("src.utils.structured_output.invoke_llm", side_effect=lambda llm, prompt, node: llm.invoke(prompt)), \
+         patch("builtins.print"):
+        start = time.perf_counter()
+        result = syntax_simplifier(state)["processed_content"]["simplified_text"]
+        elapsed = time.perf_counter() - start
+    return {
+        "seconds": elapsed,
+        "requests": result["chunk_count"],
+        "completeness": min(1.0, len(result["content"]) / len(material))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Syntax simplification benchmark")
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[5, 20, 80], help="Material sizes in paragraphs")
+    parser.add_argument("--overhead", type=float, default=0.3, help="Simulated seconds per request")
+    parser.add_argument("--ms-per-token", type=float, default=0.5, help="Simulated generation time per output token")
+    parser.add_argument("--max-tokens", type=int, default=4000, help="Simulated output token cap")
+    parser.add_argument("--chunk-tokens", type=int, default=1500, help="Token budget per chunk")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent requests in chunked mode")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    args = parser.parse_args()
+
+    llm = SimulatedLLM(args.overhead, args.ms_per_token / 1000, args.max_tokens)
+    with tempfile.TemporaryDirectory() as directory:
+        glossary = GlossaryStore(os.path.join(directory, "glossary.sqlite3"), enabled=False)
+        memo = SimplificationMemo(os.path.join(directory, "memo.sqlite3"), enabled=False)
+        print(f"{'Paragraphs':>10} {'Tokens':>8} {'Single':>10} {'Complete':>9} {'Chunked':>10} {'Requests':>9} {'Complete':>9}")
+        for paragraphs in args.paragraphs:
+            material = build_material(paragraphs, args.seed)
+            single = run_simplifier(material, "single", llm, args.chunk_tokens, args.concurrency, glossary, memo)
+            chunked = run_simplifier(material, "chunked", llm, args.chunk_tokens, args.concurrency, glossary, memo)
+            print(f"{paragraphs:>10} {estimate_tokens(material):>8} {single['seconds']:9.2f}s {single['completeness']:8.0%} "
+                  f"{chunked['seconds']:9.2f}s {chunked['requests']:>9} {chunked['completeness']:8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Benchmark for AI4FairEdu micro-unit output parsing
+Compares the previous regex cascade with schema-validated structured parsing on a corpus of micro-unit division responses
+
+The corpus is synthetic, not recorded from a model: the same three units are rendered in the ways
+LLM responses come back (clean JSON, JSON wrapped in a code fence and prose, JSON with trailing
+commas, raw newlines or a truncated tail, a bare JSON list, and free-form Markdown in Chinese and
+English), so the outcome shares reflect this mix of formats, not real response rates. A parse
+counts as correct when it yields the three units with their objective, key points, time and
+questions; the regex cascade instead degrades silently, while structured parsing raises and
+triggers a repair request.
+
+Usage:
+    python -m src.benchmarks.structured_output_benchmark --repeat 200
+"""
+
+from typing import Dict, List, Any, Callable, Tuple
+import argparse
+import json
+import re
+import time
+
+from src.adhd_support import MicroUnitList
+from src.utils.structured_output import StructuredOutputError, parse_structured
+
+UNITS = [
+    {
+        "title": "什么是链表",
+        "content": "链表是一种常见的线性数据结构，由一系列节点组成。\n每个节点包含数据字段和指向下一个节点的引用。",
+        "learning_objective": "理解链表的基本定义",
+        "key_points": ["链表由节点组成", "节点包含数据和引用", "元素不连续存储"],
+        "estimated_time_minutes": 5,
+        "check_questions": ["链表的节点包含哪两部分？"]
+    },
+    {
+        "title": "链表的类型",
+        "content": "链表主要分为单链表、双向链表和循环链表。\n双向链表的节点有两个指针。",
+        "learning_objective": "区分三种链表",
+        "key_points": ["单链表只有一个指针", "双向链表有前驱和后继", "循环链表首尾相连"],
+        "estimated_time_minutes": 6,
+        "check_questions": ["循环链表的最后一个节点指向哪里？"]
+    },
+    {
+        "title": "链表的操作",
+        "content": "链表操作包括插入、删除、查找和遍历。\n插入和删除的时间复杂度为O(1)。",
+        "learning_objective": "了解链表操作的效率",
+        "key_points": ["插入删除为O(1)", "查找为O(n)"],
+        "estimated_time_minutes": 5,
+        "check_questions": ["为什么链表查找较慢？"]
+    }
+]
+
+
+def _clean() -> str:
+    return json.dumps({"units": UNITS}, ensure_ascii=False, indent=2)
+
+
+def _markdown(unit_label: str, labels: Tuple[str, str, str, str], minutes: str) -> str:
+    blocks = []
+    for number, unit in enumerate(UNITS, 1):
+        key_points = "\n".join(f"- {point}" for point in unit["key_points"])
+        questions = "\n".join(f"Q{index}: {question}" for index, question in enumerate(unit["check_questions"], 1))
+        blocks.append(f"{unit_label} {number}：{unit['title']}\n{unit['content']}\n"
+                      f"{labels[0]}：{unit['learning_objective']}\n{labels[1]}：\n{key_points}\n"
+                      f"{labels[2]}：{unit['estimated_time_minutes']}{minutes}\n{labels[3]}：\n{questions}")
+    return "\n\n".join(blocks)
+
+
+# Synthetic response formats and how to render them
+FORMATS: Dict[str, Callable[[], str]] = {
+    "json": _clean,
+    "fenced_json": lambda: f"好的，以下是划分结果：\n```json\n{_clean()}\n```\n希望对你有帮助。",
+    "trailing_commas": lambda: re.sub(r"(\n\s*[}\]])", r",\1", _clean()),
+    "raw_newlines": lambda: _clean().replace("\\n", "\n"),
+    "truncated": lambda: _clean()[:int(len(_clean()) * 0.8)],
+    "bare_list": lambda: json.dumps(UNITS, ensure_ascii=False),
+    "markdown_zh": lambda: _markdown("单元", ("学习目标", "关键点", "估计时间", "理解检查"), "分钟"),
+    "markdown_en": lambda: _markdown("Unit", ("Learning Objective", "Key Points", "Estimated Time", "Check Questions"),
+                                     " 分钟")
+}
+
+
+def legacy_parse_micro_units(content: str) -> List[Dict[str, Any]]:
+    """
+    The previous implementation, copied verbatim from parse_micro_units in src/adhd_support.py
+    before structured output replaced it: unit markers from six patterns, then DOTALL searches per field and unit
+    """
+    import re
+    
+    # 初始化结果列表
+    micro_units = []
+    
+    # 尝试识别单元分隔符
+    unit_patterns = [
+        r'单元\s*(\d+)',
+        r'微内容单元\s*(\d+)',
+        r'学习单元\s*(\d+)',
+        r'Unit\s*(\d+)',
+        r'Part\s*(\d+)',
+        r'Section\s*(\d+)'
+    ]
+    
+    # 查找所有可能的单元分隔点
+    unit_boundaries = []
+    for pattern in unit_patterns:
+        for match in re.finditer(pattern, content, re.IGNORECASE):
+            unit_boundaries.append((match.start(), int(match.group(1))))
+    
+    # 按位置排序
+    unit_boundaries.sort()
+    
+    # 如果找不到明确的单元分隔符，尝试按段落分割
+    if not unit_boundaries:
+        paragraphs = re.split(r'\n\s*\n', content)
+        if len(paragraphs) >= 3:  # 至少需要3个段落才考虑按段落分割
+            for i, para in enumerate(paragraphs):
+                if i == 0 and len(para.strip()) < 100:  # 跳过可能的介绍段落
+                    continue
+                unit_boundaries.append((content.find(para), i))
+    
+    # 如果仍然找不到分隔点，将整个内容作为一个单元
+    if not unit_boundaries:
+        return [{
+            "content": content,
+            "estimated_time_minutes": 10,
+            "key_points": ["请仔细阅读内容以提取关键点"]
+        }]
+    
+    # 提取每个单元的内容
+    for i in range(len(unit_boundaries)):
+        start_pos = unit_boundaries[i][0]
+        unit_num = unit_boundaries[i][1]
+        
+        # 确定单元结束位置
+        if i < len(unit_boundaries) - 1:
+            end_pos = unit_boundaries[i+1][0]
+        else:
+            end_pos = len(content)
+        
+        unit_content = content[start_pos:end_pos].strip()
+        
+        # 解析单元内容
+        unit = {
+            "content": unit_content,
+            "unit_number": unit_num,
+            "estimated_time_minutes": 5  # 默认估计时间
+        }
+        
+        # 尝试提取学习目标
+        objective_match = re.search(r'(学习目标|Learning Objective|Objective)[:：](.*?)(?=\n\n|\n[A-Z]|$)', unit_content, re.IGNORECASE | re.DOTALL)
+        if objective_match:
+            unit["learning_objective"] = objective_match.group(2).strip()
+        
+        # 尝试提取关键点
+        key_points = []
+        key_points_match = re.search(r'(关键点|Key Points|Main Points)[:：](.*?)(?=\n\n|\n[A-Z]|$)', unit_content, re.IGNORECASE | re.DOTALL)
+        if key_points_match:
+            key_points_text = key_points_match.group(2).strip()
+            # 尝试按不同的列表格式分割
+            point_matches = re.findall(r'[•\-\*]\s*(.*?)(?=\n[•\-\*]|\n\n|$)', key_points_text)
+            if point_matches:
+                key_points = [point.strip() for point in point_matches]
+            else:
+                # 尝试按数字列表分割
+                point_matches = re.findall(r'\d+\.\s*(.*?)(?=\n\d+\.|\n\n|$)', key_points_text)
+                if point_matches:
+                    key_points = [point.strip() for point in point_matches]
+                else:
+                    # 按行分割
+                    key_points = [line.strip() for line in key_points_text.split('\n') if line.strip()]
+        
+        if key_points:
+            unit["key_points"] = key_points
+        
+        # 尝试提取估计时间
+        time_match = re.search(r'(估计时间|Estimated Time|Time)[:：]\s*(\d+)[^\d]*分钟', unit_content, re.IGNORECASE)
+        if time_match:
+            unit["estimated_time_minutes"] = int(time_match.group(2))
+        
+        # 尝试提取理解检查问题
+        questions = []
+        questions_match = re.search(r'(理解检查|Check Questions|Questions)[:：](.*?)(?=\n\n|\n[A-Z]|$)', unit_content, re.IGNORECASE | re.DOTALL)
+        if questions_match:
+            questions_text = questions_match.group(2).strip()
+            # 尝试按不同的问题格式分割
+            question_matches = re.findall(r'[Q\d]+[\.:]?\s*(.*?)(?=\n[Q\d]+[\.:]?|\n\n|$)', questions_text)
+            if question_matches:
+                questions = [q.strip() for q in question_matches]
+            else:
+                # 按行分割
+                questions = [line.strip() for line in questions_text.split('\n') if line.strip() and '?' in line]
+        
+        if questions:
+            unit["check_questions"] = questions
+        
+        # 清理单元内容，移除元数据部分
+        clean_content = unit_content
+        for pattern in [r'(学习目标|Learning Objective|Objective)[:：].*?(?=\n\n|\n[A-Z]|$)', 
+                       r'(关键点|Key Points|Main Points)[:：].*?(?=\n\n|\n[A-Z]|$)',
+                       r'(估计时间|Estimated Time|Time)[:：].*?(?=\n\n|\n[A-Z]|$)',
+                       r'(理解检查|Check Questions|Questions)[:：].*?(?=\n\n|\n[A-Z]|$)']:
+            clean_content = re.sub(pattern, '', clean_content, flags=re.IGNORECASE | re.DOTALL)
+        
+        # 如果清理后的内容不为空，更新单元内容
+        clean_content = re.sub(r'\n{3,}', '\n\n', clean_content).strip()
+        if clean_content:
+            unit["content"] = clean_content
+        
+        micro_units.append(unit)
+    
+    return micro_units
+
+
+def structured_parse_micro_units(content: str) -> List[Dict[str, Any]]:
+    """The current implementation: extract, repair locally and validate against MicroUnitList"""
+    return [unit.model_dump() for unit in parse_structured(content, MicroUnitList).units]
+
+
+def is_correct(units: List[Dict[str, Any]]) -> bool:
+    """Whether parsed units carry all three units' objectives, key points, times and questions"""
+    if len(units) != len(UNITS):
+        return False
+    return all(
+        unit.get("learning_objective") == expected["learning_objective"]
+        and unit.get("key_points") == expected["key_points"]
+        and unit.get("estimated_time_minutes") == expected["estimated_time_minutes"]
+        and unit.get("check_questions") == expected["check_questions"]
+        for unit, expected in zip(units, UNITS)
+    )
+
+
+def evaluate(parser: Callable[[str], List[Dict[str, Any]]], output: str, repeat: int) -> Dict[str, Any]:
+    """Parse one response repeatedly and classify the result"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        try:
+            units = parser(output)
+        except StructuredOutputError:
+            units = None
+    seconds = (time.perf_counter() - start) / repeat
+    if units is None:
+        outcome = "rejected"
+    else:
+        outcome = "correct" if is_correct(units) else "degraded"
+    return {"seconds": seconds, "outcome": outcome}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-unit output parsing benchmark")
+    parser.add_argument("--repeat", type=int, default=200, help="Parses per response for timing")
+    args = parser.parse_args()
+
+    parsers = {"regex": legacy_parse_micro_units, "structured": structured_parse_micro_units}
+    totals = {name: {"seconds": 0.0, "correct": 0, "degraded": 0, "rejected": 0} for name in parsers}
+
+    print(f"{'Format':<16} {'Regex':>10} {'Outcome':>9} {'Structured':>11} {'Outcome':>9}")
+    for format_name, render in FORMATS.items():
+        output = render()
+        results = {name: evaluate(parse, output, args.repeat) for name, parse in parsers.items()}
+        for name, result in results.items():
+            totals[name]["seconds"] += result["seconds"]
+            totals[name][result["outcome"]] += 1
+        print(f"{format_name:<16} {results['regex']['seconds'] * 1e6:8.1f}us {results['regex']['outcome']:>9} "
+              f"{results['structured']['seconds'] * 1e6:9.1f}us {results['structured']['outcome']:>9}")
+
+    print()
+    for name, total in totals.items():
+        count = len(FORMATS)
+        print(f"{name:<11} mean {total['seconds'] / count * 1e6:8.1f}us  correct {total['correct'] / count:5.0%}  "
+              f"silently degraded {total['degraded'] / count:5.0%}  rejected for repair {total['rejected'] / count:5.0%}")
+
+
+if __name__ == "__main__":
+    main()
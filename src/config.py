@@ -15,7 +15,74 @@ class SystemConfig:
                 "api_key": os.getenv("OPENAI_API_KEY"),
                 "temperature": float(os.getenv("LLM_TEMPERATURE", "0.7")),
                 "max_tokens": int(os.getenv("LLM_MAX_TOKENS", "4000")),
-                "base_url": os.getenv("OPENAI_BASE_URL")
+                "base_url": os.getenv("OPENAI_BASE_URL"),
+                "timeout": float(os.getenv("LLM_TIMEOUT", "120")),
+                "max_connections": int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+                "max_keepalive_connections": int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10")),
+                "keepalive_expiry": float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60")),
+                "max_concurrency": int(os.getenv("LLM_MAX_CONCURRENCY", "4"))  # 单个任务内并发LLM调用上限
+            },
+            "cache": {
+                "enabled": os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true",
+                "path": os.getenv("LLM_CACHE_PATH", "data/cache/llm_cache.sqlite3"),
+                "max_size_mb": float(os.getenv("LLM_CACHE_MAX_SIZE_MB", "256")),
+                "default_ttl_seconds": float(os.getenv("LLM_CACHE_DEFAULT_TTL", "604800")),
+                "node_ttls": os.getenv("LLM_CACHE_NODE_TTLS", ""),  # 例如: analyze_dashboard_data=3600,content_generator=86400
+                "disabled_nodes": os.getenv("LLM_CACHE_DISABLED_NODES", "")  # 逗号分隔的节点名称
+            },
+            "checkpoint": {
+                "enabled": os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true",
+                "path": os.getenv("CHECKPOINT_PATH", "data/checkpoints/checkpoints.sqlite3")
+            },
+            "jobs": {
+                "backend": os.getenv("JOB_BACKEND", "thread"),  # thread: Web进程内线程池；sqlite: 持久化队列 + python -m src.worker
+                "queue_path": os.getenv("JOB_QUEUE_PATH", "data/jobs/job_queue.sqlite3"),
+                "lease_seconds": float(os.getenv("JOB_LEASE_SECONDS", "300")),  # 工作进程未续租时租约的有效期
+                "max_attempts": int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+                "worker_processes": int(os.getenv("JOB_WORKER_PROCESSES", "0")),  # 0表示使用CPU核心数
+                "poll_interval": float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+            },
+            "micro_units": {
+                "segmentation": os.getenv("MICRO_UNIT_SEGMENTATION", "local"),  # local（本地切分后并行补充）或llm（一次调用完成切分和撰写）
+                "words_per_minute": float(os.getenv("MICRO_UNIT_WORDS_PER_MINUTE", "200")),  # 英文阅读速度，用于估计单元时间
+                "chars_per_minute": float(os.getenv("MICRO_UNIT_CHARS_PER_MINUTE", "300")),  # 中文阅读速度
+                "streaming": os.getenv("MICRO_UNIT_STREAMING", "true").lower() == "true"  # LLM划分时流式解析并逐个发布单元
+            },
+            "content_generation": {
+                "source_retrieval": os.getenv("CONTENT_SOURCE_RETRIEVAL", "true").lower() == "true",
+                "max_source_tokens": int(os.getenv("CONTENT_MAX_SOURCE_TOKENS", "1500")),  # 每个单元发送的原文token上限
+                "context_window": int(os.getenv("CONTENT_SOURCE_CONTEXT_WINDOW", "1")),  # 命中段落前后附带的段落数
+                "early_start": os.getenv("CONTENT_EARLY_START", "true").lower() == "true"  # 单元发布后立即开始生成其详细内容
+            },
+            "corpus": {
+                "enabled": os.getenv("CORPUS_STATS_ENABLED", "true").lower() == "true",
+                "path": os.getenv("CORPUS_STATS_PATH", "data/corpus/corpus_stats.npz"),
+                "save_delay": float(os.getenv("CORPUS_SAVE_DELAY", "10")),  # 新增材料后延迟保存的秒数，期间的上传合并为一次保存，不在请求线程中写文件
+                "min_documents": int(os.getenv("CORPUS_MIN_DOCUMENTS", "3"))  # 语料中的材料数达到该值后才使用语料IDF
+            },
+            "glossary": {
+                "enabled": os.getenv("GLOSSARY_ENABLED", "true").lower() == "true",
+                "path": os.getenv("GLOSSARY_PATH", "data/glossary/glossary.sqlite3"),
+                "max_prompt_terms": int(os.getenv("GLOSSARY_MAX_PROMPT_TERMS", "50"))  # 提示中列出的已知术语数量上限
+            },
+            "content_analysis": {
+                "mode": os.getenv("CONTENT_ANALYSIS_MODE", "tiered"),  # local、tiered（本地优先，必要时调用LLM）或llm
+                "confidence_threshold": float(os.getenv("CONTENT_ANALYSIS_CONFIDENCE_THRESHOLD", "0.5")),  # 本地提取结果的置信度阈值
+                "llm_severity_level": int(os.getenv("CONTENT_ANALYSIS_LLM_SEVERITY_LEVEL", "5")),  # 达到该严重程度的用户始终使用LLM分析，0表示关闭
+                "max_batch_tokens": int(os.getenv("CONTENT_ANALYSIS_MAX_BATCH_TOKENS", "6000"))  # 一次分析请求中包含的单元token上限
+            },
+            "readability": {
+                "gate_enabled": os.getenv("READABILITY_GATE_ENABLED", "true").lower() == "true",  # 只简化超过目标年级的段落
+                "max_target_grade": float(os.getenv("READABILITY_MAX_TARGET_GRADE", "9")),  # 严重程度为1的学习者的目标年级
+                "grade_step_per_severity": float(os.getenv("READABILITY_GRADE_STEP_PER_SEVERITY", "1")),  # 严重程度每增加一级目标年级的降低量
+                "min_target_grade": float(os.getenv("READABILITY_MIN_TARGET_GRADE", "4"))
+            },
+            "simplification": {
+                "mode": os.getenv("SIMPLIFICATION_MODE", "auto"),  # single（整篇一次请求）、chunked（按段落分组并发）或auto（超过分组预算时分组）
+                "chunk_tokens": int(os.getenv("SIMPLIFICATION_CHUNK_TOKENS", "1500")),  # 每组段落（或每批句子）的token上限
+                "memo_enabled": os.getenv("SIMPLIFICATION_MEMO_ENABLED", "true").lower() == "true",  # 逐句简化并跨材料、跨用户复用已简化的句子
+                "memo_path": os.getenv("SIMPLIFICATION_MEMO_PATH", "data/cache/sentence_memo.sqlite3"),
+                "memo_max_entries": int(os.getenv("SIMPLIFICATION_MEMO_MAX_ENTRIES", "100000"))  # 超过后淘汰最久未使用的句子
             },
             "logging": {
                 "level": os.getenv("LOG_LEVEL", "INFO"),
@@ -28,7 +95,8 @@ class SystemConfig:
                 "results_path": os.getenv("RESULTS_PATH", "data/results")
             },
             "system": {
-                "max_concurrent_users": int(os.getenv("MAX_CONCURRENT_USERS", "10")),
+                "max_concurrent_users": int(os.getenv("MAX_CONCURRENT_USERS", "10")),  # 同时运行的处理任务数
+                "max_queued_jobs": int(os.getenv("MAX_QUEUED_JOBS", "50")),  # 等待队列长度上限，超出时返回429
                 "session_timeout": int(os.getenv("SESSION_TIMEOUT", "3600")),
                 "default_difficulty_type": os.getenv("DEFAULT_DIFFICULTY_TYPE", "auto_detect"),
                 "language": os.getenv("SYSTEM_LANGUAGE", "en")  # Default to English
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Shared fixtures for the tests: an isolated LLM response cache and the syntax simplification helpers
+"""
+
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from src import dyslexia_support
+from src.utils.glossary_store import GlossaryStore
+from src.utils.llm_cache import LLMResponseCache
+from src.utils.simplification_memo import SimplificationMemo
+
+
+@pytest.fixture(autouse=True)
+def isolated_llm_cache(tmp_path):
+    """Give every test its own LLM response cache, so invoke_llm and stream_llm never write to data/cache"""
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.sqlite3"))
+    with patch("src.utils.llm_cache._cache_instance", cache):
+        yield cache
+
+
+class FakeSimplifierLLM:
+    """Fake LLM that records prompts and answers each one with the JSON object built by respond"""
+
+    def __init__(self, respond: Callable[[str], Dict[str, Any]], delay: float = 0.0):
+        self.respond = respond
+        self.delay = delay
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self.lock:
+            self.prompts.append(str(prompt))
+        time.sleep(self.delay)
+        return AIMessage(content=json.dumps(self.respond(str(prompt))))
+
+
+@pytest.fixture
+def run_simplifier(tmp_path):
+    """
+    Run syntax_simplifier on a material with a fake LLM and return its simplified_text
+
+    The glossary and memo default to fresh databases under tmp_path; pass glossary or memo to share
+    one across runs, and settings to override top-level config sections for the run.
+    """
+
+    def run(content: str, llm: FakeSimplifierLLM, severity_level: int = 3,
+            glossary: Optional[GlossaryStore] = None, memo: Optional[SimplificationMemo] = None,
+            settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        state = {
+            "user_profile": {"analysis": {"difficulty_type": "Dyslexia", "severity_level": severity_level},
+                             "questionnaire_answers": {}},
+            "learning_materials": {"current_content": content}
+        }
+        if glossary is None:
+            glossary = GlossaryStore(str(tmp_path / "glossary.sqlite3"))
+        if memo is None:
+            memo = SimplificationMemo(str(tmp_path / "memo.sqlite3"))
+        with patch.dict(dyslexia_support.config.config, settings or {}), \
+             patch("src.dyslexia_support.get_glossary_store", return_value=glossary), \
+             patch("src.dyslexia_support.get_simplification_memo", return_value=memo), \
+             patch("src.dyslexia_support.get_llm", return_value=llm), \
+             patch("src.utils.structured_output.invoke_llm", side_effect=lambda llm, prompt, node: llm.invoke(prompt)):
+            return dyslexia_support.syntax_simplifier(state)["processed_content"]["simplified_text"]
+
+    return run
+
+
+@pytest.fixture
+def simplifier_llm():
+    """Factory for fake simplifier LLMs: simplifier_llm(respond, delay=0.0)"""
+    return FakeSimplifierLLM
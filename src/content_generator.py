@@ -1,15 +1,186 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
 from langchain_core.prompts import ChatPromptTemplate
 from src.config import SystemConfig
-from src.utils.llm_utils import get_llm
-from src.prompts.prompt_manager import PromptManager
-from src.utils.text_highlighter import get_highlighter_for_user
+from src.utils.llm_utils import get_llm, invoke_llm
+from src.prompts.prompt_manager import get_prompt_manager
 from src.utils.content_analyzer import get_elements_to_highlight
+from src.utils.concurrency import bounded_map
+from src.utils.source_retriever import SourceIndex, build_unit_query, estimate_tokens
 
 # 初始化提示管理器和配置
-prompt_manager = PromptManager()
+prompt_manager = get_prompt_manager()
 config = SystemConfig()
 
+# 详细内容生成提示模板
+DETAILED_CONTENT_TEMPLATE = """
+        你是一个专门为有学习障碍的学生设计教育内容的AI助手。请根据以下微内容单元的概要和原始学习材料，生成详细的学习内容。
+
+        ## 原始学习材料:
+        {original_materials}
+        
+        ## 微内容单元概要:
+        {unit_summary}
+        
+        ## 用户学习障碍信息:
+        {user_profile}
+        
+        请生成详细的学习内容，满足以下要求:
+        1. 内容应该完全覆盖单元概要中提到的所有关键点
+        2. 使用清晰、简洁的语言，避免复杂的句式
+        3. 包含适当的示例、类比或视觉描述以增强理解
+        4. 保持内容的结构化，使用标题、项目符号和短段落
+        5. 确保内容的长度适合单元的估计完成时间
+        6. 在内容末尾包含单元概要中提到的理解检查问题，并提供简短的参考答案
+        
+        请以Markdown格式输出内容。
+        """
+
+def build_generation_context(state: Dict) -> Dict[str, Any]:
+    """
+    准备为各单元生成详细内容时共用的对象：LLM、提示模板、用户分析结果和原文检索索引
+    
+    Args:
+        state: 工作流状态
+    
+    Returns:
+        生成上下文字典
+    """
+    original_content = (state.get("learning_materials") or {}).get("current_content", "")
+    retrieval_enabled = bool(config.get("content_generation.source_retrieval"))
+    return {
+        "llm": get_llm(config),
+        # 所有单元共用同一个模板
+        "prompt_template": ChatPromptTemplate.from_template(DETAILED_CONTENT_TEMPLATE),
+        "user_analysis": (state.get("user_profile") or {}).get("analysis", {}),
+        "original_content": original_content,
+        "retrieval_enabled": retrieval_enabled,
+        # 为原始材料构建一次检索索引，每个单元只发送与其相关的原文片段
+        "source_index": SourceIndex(original_content) if retrieval_enabled else None,
+        "max_source_tokens": config.get("content_generation.max_source_tokens") or 1500,
+        "context_window": config.get("content_generation.context_window") or 0
+    }
+
+def unit_source_slice(context: Dict[str, Any], unit: Dict) -> str:
+    """获取与单元相关的原文片段，未启用检索时为整篇原文"""
+    if context["source_index"] is None:
+        return context["original_content"]
+    return context["source_index"].retrieve(build_unit_query(unit), context["max_source_tokens"],
+                                            context["context_window"])
+
+def unit_summary(unit: Dict) -> Dict[str, Any]:
+    """
+    提示中使用的单元概要
+    
+    只包含标题、学习目标、内容概要和关键点；高亮位置等后续附加的字段不进入提示，
+    这样提前生成和常规生成的同一单元得到相同的提示（以及相同的缓存键）。
+    """
+    return {
+        "title": unit.get("title"),
+        "learning_objective": unit.get("learning_objective"),
+        "summary": unit.get("content"),
+        "key_points": unit.get("key_points") or []
+    }
+
+def generate_detailed_unit(context: Dict[str, Any], unit: Dict, source_slice: str) -> Dict:
+    """
+    为单个微内容单元生成详细内容
+    
+    Args:
+        context: 生成上下文
+        unit: 微内容单元
+        source_slice: 与单元相关的原文片段
+    
+    Returns:
+        详细单元
+    """
+    # 准备提示输入
+    prompt_input = {
+        "original_materials": source_slice,
+        "unit_summary": unit_summary(unit),
+        "user_profile": context["user_analysis"]
+    }
+    
+    # 调用LLM生成详细内容
+    result = invoke_llm(context["llm"], context["prompt_template"].invoke(prompt_input), node="content_generator")
+    
+    # 创建详细单元
+    return {
+        "unit_number": unit.get("unit_number"),
+        "estimated_time_minutes": unit.get("estimated_time_minutes"),
+        "summary": unit.get("content"),
+        "detailed_content": result.content
+    }
+
+# 提前生成：微内容分割器每发布一个单元就开始生成其详细内容，内容生成节点直接取用结果
+# 按任务记录生成上下文、线程池、与分割器共享的并发预算和以 (单元编号, 单元内容) 为键的Future
+_early_generations: Dict[str, Dict[str, Any]] = {}
+_early_lock = threading.Lock()
+
+def _unit_key(unit: Dict) -> Tuple:
+    """提前生成结果的查找键"""
+    return (unit.get("unit_number"), unit.get("content"))
+
+def start_unit_generation(state: Dict, unit: Dict, budget: threading.Semaphore) -> bool:
+    """
+    在后台提前开始生成一个已完成单元的详细内容
+    
+    只对带有job_id且执行计划包含内容生成的任务生效；同一单元只生成一次。
+    每次生成都占用budget中的一个名额，因此与分割器自身的LLM调用合计不超过并发上限。
+    
+    Args:
+        state: 微内容分割器的工作流状态
+        unit: 刚完成的微内容单元
+        budget: 任务的LLM并发预算
+    
+    Returns:
+        是否已开始（或之前已开始）生成
+    """
+    metadata = state.get("metadata") or {}
+    job_id = metadata.get("job_id")
+    plan = metadata.get("execution_plan")
+    if not job_id or not config.get("content_generation.early_start") or \
+            (plan is not None and "content_generation" not in plan):
+        return False
+    
+    unit = dict(unit)
+    with _early_lock:
+        entry = _early_generations.get(job_id)
+        if entry is None:
+            entry = _early_generations[job_id] = {
+                "context": build_generation_context(state),
+                "executor": ThreadPoolExecutor(max_workers=config.get("llm.max_concurrency") or 1,
+                                               thread_name_prefix="early-content"),
+                "futures": {}
+            }
+        key = _unit_key(unit)
+        if key not in entry["futures"]:
+            context = entry["context"]
+            
+            def generate() -> Dict:
+                with budget:
+                    return generate_detailed_unit(context, unit, unit_source_slice(context, unit))
+            
+            entry["futures"][key] = entry["executor"].submit(generate)
+    return True
+
+def take_unit_generations(job_id: str) -> Dict[Tuple, Future]:
+    """取出一个任务提前开始的所有生成，已提交的生成继续完成"""
+    with _early_lock:
+        entry = _early_generations.pop(job_id, None)
+    if entry is None:
+        return {}
+    entry["executor"].shutdown(wait=False)
+    return entry["futures"]
+
+def discard_unit_generations(job_id: str, wait: bool = False) -> None:
+    """丢弃一个任务提前开始的生成，尚未开始的生成被取消（没有提前生成时什么也不做）；wait为True时等待正在进行的生成结束"""
+    with _early_lock:
+        entry = _early_generations.pop(job_id, None)
+    if entry is not None:
+        entry["executor"].shutdown(wait=wait, cancel_futures=True)
+
 def content_generator(state: Dict) -> Dict:
     """
     根据微内容单元和原始学习材料生成完整的学习内容
@@ -20,80 +191,84 @@ def content_generator(state: Dict) -> Dict:
     3. 为每个单元生成详细的学习内容
     4. 保持与用户学习障碍类型相适应的格式
     5. 添加适当的视觉辅助和结构化元素
+    
+    微内容分割器发布单元时已提前开始生成的单元直接使用其结果。
     """
     
     print("开始执行内容生成器...")
     print(f"当前状态: processed_content keys: {state.get('processed_content', {}).keys()}")
     
-    # 获取LLM
-    llm = get_llm(config)
-    
     # 检查是否有微内容单元和原始学习材料
     if not state.get("processed_content", {}).get("micro_units") or not state.get("learning_materials"):
         print("缺少微内容单元或原始学习材料，无法生成完整内容")
         return state
     
-    # 获取微内容单元和原始学习材料
+    # 获取微内容单元
     micro_units = state["processed_content"]["micro_units"]
-    learning_materials = state["learning_materials"]
     
     print(f"找到 {len(micro_units)} 个微内容单元")
     
-    # 获取用户配置文件以确定适当的格式
-    user_profile = state.get("user_profile", {})
+    context = build_generation_context(state)
+    original_content = context["original_content"]
+    source_slices = [unit_source_slice(context, unit) for unit in micro_units]
     
-    # 为每个微内容单元生成详细内容
-    detailed_units = []
+    # 取用提前开始的生成，其余单元在有界线程池中并发生成，结果保持原有顺序
+    job_id = (state.get("metadata") or {}).get("job_id")
+    early = take_unit_generations(job_id) if job_id else {}
+    results: List[Any] = [None] * len(micro_units)
+    pending = []
+    for index, unit in enumerate(micro_units):
+        future = early.get(_unit_key(unit))
+        if future is None:
+            pending.append(index)
+            continue
+        try:
+            results[index] = future.result()
+        except Exception as e:
+            results[index] = e
+    # 最终单元中已不存在的单元（如流式发布后被修复替换）不再需要
+    used_keys = {_unit_key(unit) for unit in micro_units}
+    for key, future in early.items():
+        if key not in used_keys:
+            future.cancel()
+    if early:
+        print(f"提前生成: {len(micro_units) - len(pending)}/{len(micro_units)} 个单元已在分割时开始生成")
     
-    for unit in micro_units:
-        # 创建提示以生成详细内容
-        prompt_template = ChatPromptTemplate.from_template("""
-        你是一个专门为有学习障碍的学生设计教育内容的AI助手。请根据以下微内容单元的概要和原始学习材料，生成详细的学习内容。
-
-        ## 原始学习材料:
-        {original_materials}
-        
-        ## 微内容单元概要:
-        {unit_summary}
-        
-        ## 用户学习障碍信息:
-        {user_profile}
-        
-        请生成详细的学习内容，满足以下要求:
-        1. 内容应该完全覆盖单元概要中提到的所有关键点
-        2. 使用清晰、简洁的语言，避免复杂的句式
-        3. 包含适当的示例、类比或视觉描述以增强理解
-        4. 保持内容的结构化，使用标题、项目符号和短段落
-        5. 确保内容的长度适合单元的估计完成时间
-        6. 在内容末尾包含单元概要中提到的理解检查问题，并提供简短的参考答案
-        
-        请以Markdown格式输出内容。
-        """)
-        
-        # 准备提示输入
-        prompt_input = {
-            "original_materials": learning_materials.get("current_content", ""),
-            "unit_summary": unit,
-            "user_profile": user_profile.get("analysis", {})
-        }
-        
-        # 调用LLM生成详细内容
-        chain = prompt_template | llm
-        result = chain.invoke(prompt_input)
-        
-        # 创建详细单元
-        detailed_unit = {
-            "unit_number": unit.get("unit_number"),
-            "estimated_time_minutes": unit.get("estimated_time_minutes"),
-            "summary": unit.get("content"),
-            "detailed_content": result.content
-        }
-        
-        detailed_units.append(detailed_unit)
+    max_concurrency = config.get("llm.max_concurrency") or 1
+    generated = bounded_map(lambda index: generate_detailed_unit(context, micro_units[index], source_slices[index]),
+                            pending, max_workers=max_concurrency)
+    for index, result in zip(pending, generated):
+        results[index] = result
+    
+    detailed_units = []
+    for unit, result in zip(micro_units, results):
+        if isinstance(result, Exception):
+            # 单个单元失败时只影响该单元，使用单元概要作为降级内容
+            print(f"生成单元 {unit.get('unit_number')} 的详细内容时出错: {result}")
+            result = {
+                "unit_number": unit.get("unit_number"),
+                "estimated_time_minutes": unit.get("estimated_time_minutes"),
+                "summary": unit.get("content"),
+                "detailed_content": unit.get("content", ""),
+                "error": str(result)
+            }
+        detailed_units.append(result)
     
     # 将详细单元添加到处理后的内容中
     state["processed_content"]["detailed_units"] = detailed_units
     
+    # 记录本次任务节省的提示token数
+    full_tokens = estimate_tokens(original_content) * len(micro_units)
+    sent_tokens = sum(estimate_tokens(source_slice) for source_slice in source_slices)
+    state.setdefault("metadata", {})["content_generation"] = {
+        "source_retrieval": context["retrieval_enabled"],
+        "early_units": len(micro_units) - len(pending),
+        "source_tokens_full": full_tokens,
+        "source_tokens_sent": sent_tokens,
+        "prompt_tokens_saved": full_tokens - sent_tokens
+    }
+    print(f"原文检索节省了约 {full_tokens - sent_tokens} 个提示token（{sent_tokens}/{full_tokens}）")
+    
     # 更新当前焦点
     state["current_focus"] = "content_generation_complete"
     
@@ -1,15 +1,15 @@
 from typing import Dict, Any, List
 import json
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 
 from src.config import SystemConfig
-from src.prompts.prompt_manager import PromptManager
+from src.utils.llm_utils import get_llm as get_shared_llm, invoke_llm
+from src.prompts.prompt_manager import get_prompt_manager
 
 # Initialize configuration and prompt manager
 config = SystemConfig()
-prompt_manager = PromptManager()
+prompt_manager = get_prompt_manager()
 
 def get_llm(config: SystemConfig, language: str = "en"):
     """Get LLM instance based on configuration and language"""
@@ -21,12 +21,8 @@ def get_llm(config: SystemConfig, language: str = "en"):
     if language == "zh":
         temperature = min(temperature + 0.1, 1.0)  # Slightly increase temperature for Chinese
     
-    return ChatOpenAI(
-        model=model,
-        temperature=temperature,
-        api_key=config.get("llm.api_key"),
-        base_url=config.get("llm.base_url")
-    )
+    # Reuse the shared, pooled client for this parameter combination
+    return get_shared_llm(config, model=model, temperature=temperature, max_tokens=None)
 
 def create_dashboard_analyzer_prompt(language: str = "en") -> ChatPromptTemplate:
     """Create a prompt for the dashboard analyzer based on language"""
@@ -204,15 +200,15 @@ def analyze_dashboard_data(questionnaire_data: Dict[str, Any], language: str = "
     # Create output parser with appropriate settings for the language
     output_parser = JsonOutputParser()
     
-    # Create chain
-    chain = prompt | llm | output_parser
-    
     # Format questionnaire data for the prompt
     formatted_data = json.dumps(questionnaire_data, indent=2, ensure_ascii=False)
     
     # Run the chain
     try:
-        result = chain.invoke({"questionnaire_data": formatted_data})
+        # Call the LLM through the response cache, then parse the JSON output
+        response = invoke_llm(llm, prompt.invoke({"questionnaire_data": formatted_data}),
+                              node="analyze_dashboard_data")
+        result = output_parser.invoke(response)
         
         # For Chinese output, ensure proper encoding
         if language == "zh":
@@ -1,16 +1,225 @@
-from typing import Dict, Any
+from typing import Dict, List, Any, Optional, Tuple
+from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
-from langgraph.graph import StateGraph
 from src.config import SystemConfig
 from src.utils.llm_utils import get_llm
-from src.prompts.prompt_manager import PromptManager
-from src.utils.text_highlighter import TextHighlighter, get_highlighter_for_user
-from src.utils.content_analyzer import get_elements_to_highlight
+from src.utils.structured_output import invoke_structured, schema_json
+from src.prompts.prompt_manager import get_prompt_manager
+from src.utils.text_highlighter import find_highlight_spans
+from src.utils.content_analyzer import get_elements_to_highlight, requires_llm_analysis
+from src.utils.glossary_store import get_glossary_store, normalize_term
+from src.utils.lexicon import get_lexicon, substitute_vocabulary
+from src.utils.readability import detect_language, split_paragraphs, sentence_spans, paragraph_grades, target_grade
+from src.utils.simplification_memo import SimplificationMemo, get_simplification_memo, normalize_sentence, profile_class
+from src.utils.source_retriever import estimate_tokens
+from src.utils.concurrency import bounded_map
 
 # 初始化提示管理器和配置
-prompt_manager = PromptManager()
+prompt_manager = get_prompt_manager()
 config = SystemConfig()
 
+class VocabularyEntry(BaseModel):
+    """词汇表中的一个术语"""
+    term: str = Field(..., min_length=1, description="术语")
+    definition: str = Field(..., min_length=1, description="简短的定义或解释")
+
+class SimplifiedParagraphs(BaseModel):
+    """分段简化的结果"""
+    paragraphs: List[str] = Field(..., min_length=1, description="简化后的段落，与输入的编号段落一一对应、顺序相同，不含编号")
+    vocabulary: List[VocabularyEntry] = Field(default_factory=list, description="关键术语及其简明定义")
+
+class SimplifiedSentence(BaseModel):
+    """一个句子的简化结果"""
+    id: int = Field(..., description="输入句子的编号")
+    text: str = Field(..., description="简化后的句子，可以是几个短句")
+
+class SimplifiedSentences(BaseModel):
+    """逐句简化的结果"""
+    sentences: List[SimplifiedSentence] = Field(..., min_length=1, description="每个输入句子的简化结果")
+    vocabulary: List[VocabularyEntry] = Field(default_factory=list, description="关键术语及其简明定义")
+
+def vocabulary_dict(entries: List[VocabularyEntry]) -> Dict[str, str]:
+    """将词汇表条目转换为术语到定义的映射"""
+    return {entry.term.strip(): entry.definition.strip() for entry in entries if entry.term.strip()}
+
+def numbered_text(items: List[str]) -> str:
+    """为段落或句子加上[1]、[2]等编号，作为LLM输入"""
+    return "\n\n".join(f"[{number}] {item}" for number, item in enumerate(items, 1))
+
+def paragraph_replacements(indices: List[int], simplified_paragraphs: List[str]) -> Optional[Dict[int, str]]:
+    """
+    将简化结果对应回被简化的段落
+    
+    简化结果与段落数量相同时逐段对应（空结果保留原文）；只有一个段落时，全部结果合为该段落。
+    多个段落的数量不一致时无法确定对应关系，返回None，由调用方逐段重新简化。
+    
+    Args:
+        indices: 被简化的段落序号
+        simplified_paragraphs: LLM返回的简化段落
+    
+    Returns:
+        段落序号到简化文本的映射，无法对应时为None
+    """
+    parts = [part.strip() for part in simplified_paragraphs]
+    if len(indices) == 1:
+        text = "\n\n".join(part for part in parts if part)
+        return {indices[0]: text} if text else {}
+    if len(parts) != len(indices):
+        return None
+    return {index: part for index, part in zip(indices, parts) if part}
+
+def merge_simplified_paragraphs(paragraphs: List[str], replacements: Dict[int, str]) -> List[str]:
+    """
+    将简化后的段落按原顺序放回材料中，去掉空段落
+    
+    Args:
+        paragraphs: 原始段落
+        replacements: 段落序号到简化文本的映射
+    
+    Returns:
+        合并后的段落列表
+    """
+    merged = [replacements.get(index, paragraph) for index, paragraph in enumerate(paragraphs)]
+    return [paragraph for paragraph in merged if paragraph]
+
+def chunk_paragraphs(paragraphs: List[str], indices: List[int], max_tokens: int) -> List[List[int]]:
+    """
+    按token预算将待简化的段落分组，段落不会被拆开
+    
+    Args:
+        paragraphs: 原始段落
+        indices: 待简化的段落序号
+        max_tokens: 每组的token上限，超过上限的单个段落单独成组
+    
+    Returns:
+        段落序号分组，保持原有顺序
+    """
+    chunks: List[List[int]] = []
+    chunk_tokens = 0
+    for index in indices:
+        tokens = estimate_tokens(paragraphs[index])
+        if chunks and chunk_tokens + tokens <= max_tokens:
+            chunks[-1].append(index)
+            chunk_tokens += tokens
+        else:
+            chunks.append([index])
+            chunk_tokens = tokens
+    return chunks
+
+def merge_vocabularies(vocabularies: List[Dict[str, str]]) -> Dict[str, str]:
+    """合并多个分组的词汇表，同一术语（忽略大小写和标点）只保留最先出现的定义"""
+    merged: Dict[str, str] = {}
+    seen = set()
+    for vocabulary in vocabularies:
+        for term, definition in vocabulary.items():
+            key = normalize_term(term)
+            if key and key not in seen:
+                seen.add(key)
+                merged[term] = definition
+    return merged
+
+# 逐句简化提示：句子编号与输出一一对应，便于按句缓存
+SENTENCE_SIMPLIFICATION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """你是一位专门为阅读障碍学生提供支持的教育内容适配专家。你的任务是将复杂的句子转化为更易于阅读和理解的形式，同时保留原始内容的教育价值。
+
+请遵循以下原则：
+1. 将长句分解为多个简短的陈述句
+2. 使用简单、直接的句式结构（主语-谓语-宾语）
+3. 避免使用复杂的从句和嵌套结构
+4. 用更简单的词汇替换复杂或技术性词汇，但保留关键术语（并提供解释）
+5. 确保内容的准确性和完整性
+
+材料已拆分为带编号的句子。请逐句简化，每个句子输出一个结果，id为句子的编号，text为简化后的句子。
+一个句子可以简化为几个短句，但它们必须放在同一个text中。
+
+对于每个复杂或技术性术语，请提供简短的定义或解释，这些将作为词汇表呈现给学生。
+以下术语已收录在词汇表中，请不要再为它们提供定义：{known_terms}
+
+请只输出一个符合以下JSON Schema的JSON对象，不要输出其他内容：
+{schema}"""),
+    ("human", "请简化以下句子，使其更适合阅读障碍学生：\n\n{content}")
+])
+
+def simplify_sentences(llm, paragraphs: List[str], indices: List[int], language: str, profile: str,
+                       known_terms: str, memo: SimplificationMemo, max_batch_tokens: float,
+                       max_workers: int) -> Tuple[Dict[int, str], Dict[str, str], int, int]:
+    """
+    逐句简化段落，已缓存的句子直接复用，只把未命中的句子批量发送给LLM
+    
+    Args:
+        llm: 语言模型
+        paragraphs: 原始段落
+        indices: 待简化的段落序号
+        language: 材料语言
+        profile: 学习者的特征类别
+        known_terms: 词汇表中已收录的术语
+        memo: 句子简化缓存
+        max_batch_tokens: 每次请求的句子token上限
+        max_workers: 最大并发请求数
+    
+    Returns:
+        (段落序号到简化文本的映射, 词汇表, LLM请求数, 缓存命中的句子数)
+    """
+    sentences = []
+    spans = {index: sentence_spans(paragraphs[index]) for index in indices}
+    for index in indices:
+        sentences.extend(paragraphs[index][start:end] for start, end in spans[index])
+    
+    simplified = memo.get_many(sentences, language, profile)
+    memo_hits = len(simplified)
+    
+    # 相同的句子只发送一次
+    miss_positions: Dict[str, List[int]] = {}
+    for position, sentence in enumerate(sentences):
+        if position not in simplified:
+            miss_positions.setdefault(normalize_sentence(sentence), []).append(position)
+    misses = [sentences[positions[0]] for positions in miss_positions.values()]
+    batches = chunk_paragraphs(misses, list(range(len(misses))), max_batch_tokens)
+    
+    def simplify_batch(batch: List[int]) -> Tuple[Dict[int, str], Dict[str, str]]:
+        """简化一批句子，返回未命中句子序号到简化结果的映射"""
+        result = invoke_structured(llm, SENTENCE_SIMPLIFICATION_PROMPT.format(
+            content=numbered_text([misses[miss] for miss in batch]),
+            known_terms=known_terms,
+            schema=schema_json(SimplifiedSentences)
+        ), SimplifiedSentences, node="syntax_simplifier")
+        numbered = {sentence.id: sentence.text.strip() for sentence in result.sentences}
+        return {batch[number - 1]: sentence for number, sentence in numbered.items()
+                if 1 <= number <= len(batch) and sentence}, vocabulary_dict(result.vocabulary)
+    
+    results = bounded_map(simplify_batch, batches, max_workers=max_workers)
+    vocabularies, new_entries = [], []
+    grouped_positions = list(miss_positions.values())
+    for batch, result in zip(batches, results):
+        if isinstance(result, Exception):
+            # 单批失败时这些句子保留原文，也不写入缓存
+            print(f"简化句子批次时出错: {result}")
+            continue
+        outputs, batch_vocabulary = result
+        for miss, sentence in outputs.items():
+            for position in grouped_positions[miss]:
+                simplified[position] = sentence
+            new_entries.append((misses[miss], sentence))
+        vocabularies.append(batch_vocabulary)
+    memo.put_many(new_entries, language, profile)
+    
+    # 句子之间保留原文中的分隔符，不重新拼接原文
+    replacements = {}
+    position = 0
+    for index in indices:
+        paragraph = paragraphs[index]
+        if not spans[index]:
+            continue
+        pieces, previous_end = [], 0
+        for start, end in spans[index]:
+            pieces.append(paragraph[previous_end:start])
+            pieces.append(simplified.get(position, sentences[position]))
+            previous_end = end
+            position += 1
+        pieces.append(paragraph[previous_end:])
+        replacements[index] = "".join(pieces)
+    return replacements, merge_vocabularies(vocabularies), len(batches), memo_hits
+
 # 句法简化器
 def syntax_simplifier(state: Dict) -> Dict:
     """
@@ -92,44 +301,108 @@ def syntax_simplifier(state: Dict) -> Dict:
 6. 确保内容的准确性和完整性
 
 对于每个复杂或技术性术语，请提供简短的定义或解释，这些将作为词汇表呈现给学生。
+以下术语已收录在词汇表中，请不要再为它们提供定义：{known_terms}
 
-请输出：
-1. 简化后的文本
-2. 词汇表：包含关键术语及其简明定义"""),
+材料中的每个段落以[1]、[2]等编号开头。请分别简化每个段落，按相同顺序为每个段落输出一个简化结果（不含编号）。
+请只输出一个符合以下JSON Schema的JSON对象，不要输出其他内容：
+{schema}"""),
         ("human", "请简化以下学习材料，使其更适合阅读障碍学生：\n\n{content}")
     ])
     
-    # 调用LLM
-    response = llm.invoke(prompt.format(content=current_content))
+    # 先在本地词汇表中查找材料里已有定义的术语，只让LLM解释新术语
+    glossary = get_glossary_store()
+    language = detect_language(current_content)
+    known_vocabulary = glossary.find_in_text(current_content, language,
+                                             limit=config.get("glossary.max_prompt_terms") or 50)
+    known_terms = "、".join(known_vocabulary) if known_vocabulary else "无"
     
-    # 解析响应
-    simplified_text = ""
-    vocabulary = {}
+    # 可读性门控：只把超过学习者目标年级的段落发送给LLM
+    paragraphs = split_paragraphs(current_content)
+    grades = paragraph_grades(paragraphs, language)
+    target = target_grade(state.get("user_profile", {}), config)
+    if config.get("readability.gate_enabled"):
+        complex_indices = [index for index, grade in enumerate(grades) if grade > target]
+    else:
+        complex_indices = list(range(len(paragraphs)))
     
-    # 尝试从响应中提取简化文本和词汇表
-    import re
+    if not complex_indices:
+        decision = "skip"
+    elif len(complex_indices) == len(paragraphs):
+        decision = "full"
+    else:
+        decision = "partial"
+    print(f"可读性门控: 目标年级 {target:.1f}，{len(complex_indices)}/{len(paragraphs)} 个段落需要简化（{decision}）")
+    
+    # 待简化内容超过分组预算时分组并发简化，再按原顺序拼接；single模式只发送一个请求
+    mode = config.get("simplification.mode") or "auto"
+    max_chunk_tokens = config.get("simplification.chunk_tokens") or 1500
+    max_workers = config.get("llm.max_concurrency") or 1
+    
+    def simplify_chunk(indices: List[int]) -> Tuple[Dict[int, str], Dict[str, str]]:
+        """简化一组段落，返回段落序号到简化文本的映射和词汇表"""
+        result = invoke_structured(llm, prompt.format(
+            content=numbered_text([paragraphs[index] for index in indices]),
+            known_terms=known_terms,
+            schema=schema_json(SimplifiedParagraphs)
+        ), SimplifiedParagraphs, node="syntax_simplifier")
+        replacements = paragraph_replacements(indices, result.paragraphs)
+        if replacements is not None:
+            return replacements, vocabulary_dict(result.vocabulary)
+        
+        # 返回的段落数量与输入不一致时不猜测对应关系，逐段重新简化
+        print(f"简化结果有 {len(result.paragraphs)} 段，输入有 {len(indices)} 段，逐段重新简化 {indices}")
+        replacements, vocabularies = {}, [vocabulary_dict(result.vocabulary)]
+        for index in indices:
+            paragraph_replacement, paragraph_vocabulary = simplify_chunk([index])
+            replacements.update(paragraph_replacement)
+            vocabularies.append(paragraph_vocabulary)
+        return replacements, merge_vocabularies(vocabularies)
     
-    # 查找简化文本部分
-    simplified_match = re.search(r'(简化后的文本|Simplified Text):(.*?)(?=(词汇表|Vocabulary)|$)', response.content, re.DOTALL | re.IGNORECASE)
-    if simplified_match:
-        simplified_text = simplified_match.group(2).strip()
+    vocabulary = {}
+    request_count = 0
+    memo_hits = 0
+    memo = get_simplification_memo()
+    if decision == "skip":
+        # 材料已经足够简单，保留原文
+        simplified_text = "\n\n".join(paragraphs)
+    elif memo.enabled:
+        # 逐句简化：在所有材料和用户间共享的句子缓存中查找，未命中的句子按同样的分组预算并发发送
+        replacements, vocabulary, request_count, memo_hits = simplify_sentences(
+            llm, paragraphs, complex_indices, language,
+            profile_class(difficulty_type, target), known_terms, memo,
+            float("inf") if mode == "single" else max_chunk_tokens, max_workers
+        )
+        simplified_text = "\n\n".join(merge_simplified_paragraphs(paragraphs, replacements))
+        print(f"句子缓存: 命中 {memo_hits} 句，发送 {request_count} 个请求")
     else:
-        # 如果找不到明确的标记，假设前半部分是简化文本
-        content_parts = response.content.split('\n\n', 1)
-        if len(content_parts) > 1:
-            simplified_text = content_parts[0].strip()
+        if mode == "chunked" or (mode == "auto" and sum(
+                estimate_tokens(paragraphs[index]) for index in complex_indices) > max_chunk_tokens):
+            chunks = chunk_paragraphs(paragraphs, complex_indices, max_chunk_tokens)
         else:
-            simplified_text = response.content.strip()
-    
-    # 查找词汇表部分
-    vocabulary_match = re.search(r'(词汇表|Vocabulary):(.*)', response.content, re.DOTALL | re.IGNORECASE)
-    if vocabulary_match:
-        vocabulary_text = vocabulary_match.group(2).strip()
+            chunks = [complex_indices]
+        request_count = len(chunks)
         
-        # 解析词汇表项目
-        vocab_items = re.findall(r'[•\-\*]?\s*([^:]+):\s*([^\n]+)', vocabulary_text)
-        for term, definition in vocab_items:
-            vocabulary[term.strip()] = definition.strip()
+        results = bounded_map(simplify_chunk, chunks, max_workers=max_workers)
+        replacements: Dict[int, str] = {}
+        vocabularies = []
+        for indices, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                # 单个分组失败时保留这些段落的原文
+                print(f"简化段落 {indices} 时出错: {result}")
+                continue
+            chunk_replacements, chunk_vocabulary = result
+            replacements.update(chunk_replacements)
+            vocabularies.append(chunk_vocabulary)
+        simplified_text = "\n\n".join(merge_simplified_paragraphs(paragraphs, replacements))
+        vocabulary = merge_vocabularies(vocabularies)
+    
+    # 新术语存入词汇表，已知术语使用词汇表中的定义
+    known_keys = {normalize_term(term) for term in known_vocabulary}
+    new_vocabulary = {term: definition for term, definition in vocabulary.items()
+                      if normalize_term(term) not in known_keys}
+    glossary.record_misses(len(new_vocabulary))
+    glossary.add({**known_vocabulary, **new_vocabulary}, language)
+    vocabulary = {**known_vocabulary, **new_vocabulary}
     
     # 检查是否需要应用高亮
     should_highlight = False
@@ -139,13 +412,14 @@ def syntax_simplifier(state: Dict) -> Dict:
     if "highlighting" in comprehension_aids:
         should_highlight = True
     
-    # 如果需要高亮，识别要高亮的元素并应用高亮
+    # 如果需要高亮，识别要高亮的元素并记录其位置
+    highlight_spans = []
     if should_highlight:
-        # 获取用户的高亮器
-        highlighter = get_highlighter_for_user(questionnaire_answers)
-        
         # 识别要高亮的元素
-        elements_to_highlight = get_elements_to_highlight(simplified_text, difficulty_type)
+        elements_to_highlight = get_elements_to_highlight(
+            simplified_text, difficulty_type,
+            refine_with_llm=requires_llm_analysis(state.get("user_profile", {}))
+        )
         
         # 将词汇表中的术语添加到定义高亮中
         for term, definition in vocabulary.items():
@@ -154,12 +428,8 @@ def syntax_simplifier(state: Dict) -> Dict:
                 "metadata": {"definition": definition}
             })
         
-        # 应用高亮
-        for highlight_type, elements in elements_to_highlight.items():
-            simplified_text = highlighter.highlight_text(simplified_text, highlight_type, elements)
-        
-        # 添加CSS样式
-        simplified_text = f"<style>{highlighter.get_css()}</style>\n{simplified_text}"
+        # 只记录高亮位置，文本保持纯文本，展示时再按用户的高亮样式渲染
+        highlight_spans = find_highlight_spans(simplified_text, elements_to_highlight)
     
     # 更新状态
     if "processed_content" not in state:
@@ -167,7 +437,16 @@ def syntax_simplifier(state: Dict) -> Dict:
     
     state["processed_content"]["simplified_text"] = {
         "content": simplified_text,
-        "vocabulary": vocabulary
+        "vocabulary": vocabulary,
+        "highlight_spans": highlight_spans,
+        "readability": {
+            "decision": decision,
+            "target_grade": target,
+            "paragraph_grades": [round(float(grade), 2) for grade in grades],
+            "simplified_paragraphs": complex_indices
+        },
+        "chunk_count": request_count,
+        "memo_hits": memo_hits
     }
     
     # 记录处理历史
@@ -177,7 +456,7 @@ def syntax_simplifier(state: Dict) -> Dict:
     state["interaction_history"].append({
         "step": "dyslexia_support_processor",
         "tool": "syntax_simplifier",
-        "memory": ["完成阅读障碍支持处理"]
+        "memory": ["完成阅读障碍支持处理", f"可读性门控: {decision}"]
     })
     
     return state
@@ -187,12 +466,34 @@ def vocabulary_substitution_engine(state: Dict) -> Dict:
     """
     识别潜在困难词汇，提供同义替换或简化解释
     
-    具体功能:
-    1. 复杂词汇识别算法
-    2. 同义词库和简化词汇对照表
-    3. 上下文感知的词汇替换
-    4. 生成带有词汇解释的增强版本
-    5. 支持渐进式词汇学习
+    完全在本地完成，不调用LLM：
+    1. 复杂词汇识别：在常用词表（按词频排序的数组）中二分查找，未收录且音节多或词形长的词视为复杂词
+    2. 同义替换：使用本地同义词对照表替换复杂词，保留原词的大小写
+    3. 词汇解释：没有同义词的复杂词从词汇表中查找已有定义
+    
+    目前只有英文词表，中文材料原样保留。
     """
-    # 实现细节...
+    learning_materials = state.get("learning_materials", {})
+    current_content = learning_materials.get("current_content", "")
+    
+    language = detect_language(current_content)
+    lexicon = get_lexicon(language)
+    if lexicon is None:
+        result = {"content": current_content, "substitutions": [], "complex_words": []}
+    else:
+        result = substitute_vocabulary(current_content, lexicon)
+    
+    # 没有同义词的复杂词使用词汇表中已有的解释
+    explanations = get_glossary_store().lookup(result["complex_words"], language) if result["complex_words"] else {}
+    
+    # 更新状态
+    if "processed_content" not in state:
+        state["processed_content"] = {}
+    
+    state["processed_content"]["vocabulary_support"] = {
+        **result,
+        "explanations": explanations,
+        "language": language
+    }
+    
     return state
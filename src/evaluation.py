@@ -3,11 +3,11 @@ import pandas as pd
 from pydantic import BaseModel
 from src.config import SystemConfig
 from src.utils.llm_utils import get_llm
-from src.prompts.prompt_manager import PromptManager
+from src.prompts.prompt_manager import get_prompt_manager
 
 # 初始化配置和提示管理器
 config = SystemConfig()
-prompt_manager = PromptManager()
+prompt_manager = get_prompt_manager()
 
 class InterventionResult(BaseModel):
     """记录单次支持干预的结果"""
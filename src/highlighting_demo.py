@@ -11,7 +11,7 @@ from typing import Dict, List, Any, Optional
 
 from src.config import SystemConfig
 from src.utils.llm_utils import get_llm
-from src.utils.text_highlighter import TextHighlighter, get_highlighter_for_user
+from src.utils.text_highlighter import TextHighlighter, apply_highlighting_to_content, get_highlighter_for_user
 from src.utils.content_analyzer import get_elements_to_highlight, ContentAnalyzer
 from src.adhd_support import micro_content_divider
 from src.dyslexia_support import syntax_simplifier
@@ -305,9 +305,7 @@ def demonstrate_highlighting(sample_type: str = "adhd", output_dir: str = None,
         )
         
         # Apply highlighting
-        highlighted_content = material_data['current_content']
-        for highlight_type, elements in elements_to_highlight.items():
-            highlighted_content = highlighter.highlight_text(highlighted_content, highlight_type, elements)
+        highlighted_content = apply_highlighting_to_content(material_data['current_content'], highlighter, elements_to_highlight)
         
         # Add CSS styles
         highlighted_content = "<style>" + highlighter.get_css() + "</style>\n" + highlighted_content
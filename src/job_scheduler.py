@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Job scheduler for AI4FairEdu
+Runs material processing jobs on a fixed pool of worker threads fed by a bounded queue
+"""
+
+from typing import Callable, Dict, List, Any, Optional
+import math
+import queue
+import threading
+import time
+
+# Job statuses
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETE = "complete"
+STATUS_ERROR = "error"
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry after {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+class JobScheduler:
+    """
+    Class for running jobs on a fixed worker pool with a bounded queue and per-job status tracking
+    """
+
+    def __init__(self,
+                 handler: Callable[..., Any],
+                 max_workers: int = 4,
+                 max_queue_size: int = 20,
+                 default_job_seconds: float = 60.0,
+                 max_finished_jobs: int = 1000):
+        """
+        Initialize the scheduler
+
+        Worker threads are started lazily on the first submission.
+
+        Args:
+            handler: Function called with the job arguments; raising marks the job as failed
+            max_workers: Number of worker threads, i.e. the maximum number of jobs running at once
+            max_queue_size: Maximum number of jobs waiting for a worker
+            default_job_seconds: Assumed job duration for retry hints before any job has finished
+            max_finished_jobs: Number of finished jobs whose status is remembered
+        """
+        self.handler = handler
+        self.max_workers = max(1, max_workers)
+        self.max_queue_size = max(1, max_queue_size)
+        self.max_finished_jobs = max_finished_jobs
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.max_queue_size)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._waiting: List[str] = []
+        self._finished: List[str] = []
+        self._workers: List[threading.Thread] = []
+        self._avg_job_seconds = default_job_seconds
+        self._stats = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    def _start_workers(self) -> None:
+        """Start the worker threads if they are not running yet (caller holds the lock)"""
+        if self._workers:
+            return
+        for i in range(self.max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, job_id: str, *args: Any) -> int:
+        """
+        Queue a job
+
+        Args:
+            job_id: Unique job identifier
+            *args: Arguments passed to the handler
+
+        Returns:
+            1-based position of the job in the queue
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        with self._lock:
+            self._start_workers()
+            try:
+                self._queue.put_nowait((job_id, args))
+            except queue.Full:
+                self._stats["rejected"] += 1
+                raise QueueFullError(self._retry_after())
+
+            self._jobs[job_id] = {"status": STATUS_QUEUED, "queued_at": time.time()}
+            self._waiting.append(job_id)
+            self._stats["submitted"] += 1
+            return len(self._waiting)
+
+    def is_full(self) -> bool:
+        """Check whether a new job would be rejected"""
+        return self._queue.full()
+
+    def retry_after(self) -> int:
+        """
+        Estimate how many seconds a rejected client should wait before retrying
+
+        Returns:
+            Seconds until a queue slot is expected to free up
+        """
+        with self._lock:
+            return self._retry_after()
+
+    def _retry_after(self) -> int:
+        """Estimate the retry delay (caller holds the lock)"""
+        return max(1, math.ceil(self._avg_job_seconds / self.max_workers))
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the status of a job
+
+        Args:
+            job_id: Unique job identifier
+
+        Returns:
+            Dictionary with the status and, for queued jobs, the 1-based queue position,
+            or None if the job is unknown to this scheduler
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            status = dict(job)
+            if job["status"] == STATUS_QUEUED:
+                status["queue_position"] = self._waiting.index(job_id) + 1
+            return status
+
+    def get_queue_position(self, job_id: str) -> Optional[int]:
+        """Get the 1-based queue position of a waiting job, or None if it is not waiting"""
+        status = self.get_status(job_id)
+        return status.get("queue_position") if status else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get scheduler statistics
+
+        Returns:
+            Dictionary with queue length, running jobs, totals and the average job duration
+        """
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job["status"] == STATUS_RUNNING)
+            return {
+                "workers": self.max_workers,
+                "max_queue_size": self.max_queue_size,
+                "queued": len(self._waiting),
+                "running": running,
+                "avg_job_seconds": self._avg_job_seconds,
+                **self._stats
+            }
+
+    def _worker_loop(self) -> None:
+        """Take jobs from the queue and run them until the process exits"""
+        while True:
+            job_id, args = self._queue.get()
+            try:
+                self._run_job(job_id, args)
+            finally:
+                self._queue.task_done()
+
+    def _run_job(self, job_id: str, args: tuple) -> None:
+        """Run one job and record its status transitions"""
+        started_at = time.time()
+        with self._lock:
+            if job_id in self._waiting:
+                self._waiting.remove(job_id)
+            self._jobs[job_id] = {**self._jobs.get(job_id, {}), "status": STATUS_RUNNING, "started_at": started_at}
+
+        try:
+            self.handler(*args)
+            status, error = STATUS_COMPLETE, None
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            status, error = STATUS_ERROR, str(e)
+
+        finished_at = time.time()
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update({"status": status, "finished_at": finished_at})
+            if error:
+                job["error"] = error
+            self._stats["completed" if status == STATUS_COMPLETE else "failed"] += 1
+
+            # Exponential moving average of job duration, used for retry hints
+            self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * (finished_at - started_at)
+
+            self._finished.append(job_id)
+            while len(self._finished) > self.max_finished_jobs:
+                old_job_id = self._finished.pop(0)
+                if self._jobs.get(old_job_id, {}).get("status") in (STATUS_COMPLETE, STATUS_ERROR):
+                    del self._jobs[old_job_id]
+
+    def join(self) -> None:
+        """Block until every queued job has finished"""
+        self._queue.join()
@@ -1,11 +1,9 @@
 from typing import Dict, Any
 import argparse
 import logging
-from src.architecture import build_support_system
+from src.architecture import get_support_system
 from src.config import SystemConfig
-from src.user_profile import analyze_user_profile
-from src.adhd_support import build_adhd_support_graph
-from src.dyslexia_support import build_dyslexia_support_graph
+from src.planner import plan_support_pipeline
 import json
 import os
 from datetime import datetime
@@ -106,9 +104,6 @@ def main():
     setup_logging(config)
     logging.info("系统启动")
     
-    # 构建主支持系统
-    support_system = build_support_system()
-    
     # 初始化状态
     initial_state = {
         "user_profile": load_user_profile(args.user_profile) if args.user_profile else {},
@@ -121,6 +116,9 @@ def main():
         "iteration_count": 0  # 添加迭代计数器
     }
     
+    # 根据用户特征编译执行计划并构建主支持系统
+    support_system = get_support_system(plan_support_pipeline(initial_state["user_profile"]))
+    
     # 运行系统
     final_state = support_system.invoke(initial_state, config={"recursion_limit": 20})
     
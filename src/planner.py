@@ -0,0 +1,84 @@
+from typing import Dict, List, Tuple
+
+# 工作流中所有可用节点（按执行顺序）
+ALL_NODES: Tuple[str, ...] = (
+    "profile_analyzer",
+    "adhd_support",
+    "dyslexia_support",
+    "vocabulary_substitution",
+    "content_generation",
+    "general_tools"
+)
+
+# 每种学习障碍类型需要的处理节点
+DIFFICULTY_NODES: Dict[str, Tuple[str, ...]] = {
+    "ADHD": ("adhd_support", "content_generation", "general_tools"),
+    "Dyslexia": ("dyslexia_support", "vocabulary_substitution", "general_tools"),
+    "Combined": ("adhd_support", "dyslexia_support", "vocabulary_substitution", "content_generation", "general_tools"),
+    "None": ("general_tools",)
+}
+
+# 节点依赖关系：计划中包含某节点时，必须同时包含其依赖
+NODE_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+    "content_generation": ("adhd_support",)
+}
+
+# 完整执行计划（无法确定学习障碍类型时使用）
+FULL_PLAN: Tuple[str, ...] = ALL_NODES
+
+
+def normalize_plan(nodes) -> Tuple[str, ...]:
+    """
+    规范化执行计划：补全依赖、去除未知节点并按固定顺序排列
+
+    Args:
+        nodes: 节点名称集合
+
+    Returns:
+        按执行顺序排列的节点元组
+    """
+    selected = set(nodes)
+    for node in list(selected):
+        selected.update(NODE_DEPENDENCIES.get(node, ()))
+    return tuple(node for node in ALL_NODES if node in selected)
+
+
+def plan_support_pipeline(user_profile: Dict) -> Tuple[str, ...]:
+    """
+    根据用户特征编译静态执行计划，只保留该学习者需要的节点
+
+    规则:
+    1. 尚未分析用户特征时，先运行特征分析，并保留所有支持分支
+    2. ADHD学习者只运行微内容分割、内容生成和通用工具
+    3. 阅读障碍学习者只运行句法简化、词汇替换和通用工具
+    4. 兼有两者或类型未知时运行所有支持分支
+
+    Args:
+        user_profile: 用户特征（可包含analysis字段）
+
+    Returns:
+        按执行顺序排列的节点元组
+    """
+    user_profile = user_profile or {}
+    if "analysis" not in user_profile:
+        return FULL_PLAN
+
+    difficulty_type = (user_profile.get("analysis") or {}).get("difficulty_type")
+    nodes = DIFFICULTY_NODES.get(difficulty_type)
+    if nodes is None:
+        # 类型未知（如分析失败或尚在进行中）时保守地运行所有支持分支
+        nodes = DIFFICULTY_NODES["Combined"]
+    return normalize_plan(nodes)
+
+
+def get_skipped_nodes(plan: Tuple[str, ...]) -> List[str]:
+    """
+    获取执行计划中被跳过的节点
+
+    Args:
+        plan: 执行计划
+
+    Returns:
+        被跳过的节点名称列表
+    """
+    return [node for node in ALL_NODES if node not in plan]
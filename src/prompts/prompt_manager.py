@@ -38,6 +38,7 @@ class PromptManager:
     """提示管理器"""
     def __init__(self):
         self.prompts: Dict[str, PromptTemplate] = {}
+        self._langchain_prompts: Dict[str, ChatPromptTemplate] = {}
         self._load_all_prompts()
     
     def _load_all_prompts(self):
@@ -66,11 +67,32 @@ class PromptManager:
         return self.prompts.get(prompt_name)
     
     def get_langchain_prompt(self, prompt_name: str) -> Optional[ChatPromptTemplate]:
-        """获取LangChain格式的提示模板"""
+        """获取LangChain格式的提示模板（转换结果会被缓存）"""
+        if prompt_name in self._langchain_prompts:
+            return self._langchain_prompts[prompt_name]
         prompt = self.get_prompt(prompt_name)
         if prompt:
-            return prompt.to_langchain_template()
+            langchain_prompt = prompt.to_langchain_template()
+            self._langchain_prompts[prompt_name] = langchain_prompt
+            return langchain_prompt
         return None
+    
+    def warm(self) -> None:
+        """预先转换所有提示模板（无法转换的模板会被跳过，不影响工作流图的预编译）"""
+        for prompt_name in self.prompts:
+            try:
+                self.get_langchain_prompt(prompt_name)
+            except ValueError as e:
+                print(f"Error converting prompt template {prompt_name}: {e}")
+
+_prompt_manager: Optional[PromptManager] = None
+
+def get_prompt_manager() -> PromptManager:
+    """获取进程级共享的提示管理器"""
+    global _prompt_manager
+    if _prompt_manager is None:
+        _prompt_manager = PromptManager()
+    return _prompt_manager
 
 def load_prompt(prompt_name: str) -> PromptTemplate:
     """从配置文件加载提示模板"""
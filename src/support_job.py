@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Support job runner for AI4FairEdu
+Runs the support system workflow for one uploaded material, shared by the web process and the worker processes
+"""
+
+import json
+import os
+import threading
+import traceback
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+from src.utils.checkpoint_store import get_checkpoint_store
+from src.content_generator import discard_unit_generations
+
+
+def write_json_file(path: str, data: Dict[str, Any]) -> None:
+    """
+    Write a JSON file atomically, so the status poller and result readers never see a partial file
+
+    Args:
+        path: Destination path
+        data: JSON-serialisable content
+    """
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def run_support_job(initial_state: Dict[str, Any], execution_plan: Tuple[str, ...]) -> None:
+    """
+    Run the support system workflow for one material and write its results and status files
+
+    Args:
+        initial_state: Initial workflow state; its metadata holds the job id and output locations
+        execution_plan: Execution plan the workflow is compiled for
+
+    Raises:
+        Exception: Any workflow error, after the error status has been recorded
+    """
+    from src.architecture import get_support_system
+    
+    metadata = initial_state["metadata"]
+    job_id = metadata.get("job_id")
+    processing_status_file = metadata["processing_status_file"]
+    checkpoint_store = get_checkpoint_store()
+    
+    write_json_file(processing_status_file, {
+        "status": "running",
+        "timestamp": datetime.now().isoformat(),
+        "progress": 0
+    })
+    
+    try:
+        # Get the precompiled workflow for this plan
+        workflow = get_support_system(execution_plan)
+        
+        # Execute the workflow
+        # The CompiledStateGraph is not directly callable, we need to use the invoke method
+        final_state = workflow.invoke(initial_state)
+        
+        # Print the raw processed content structure for debugging
+        if "processed_content" in final_state:
+            print(f"Raw processed content from agent: {final_state['processed_content'].keys()}")
+        else:
+            print("No processed_content in final_state")
+        
+        # Save the final results
+        results_file = os.path.join(metadata["results_dir"], f"{metadata['user_id']}_{metadata['material_id']}_results.json")
+        write_json_file(results_file, final_state)
+        
+        print(f"Processing complete, results saved to: {results_file}")
+        
+        # Update processing status to complete
+        write_json_file(processing_status_file, {
+            "status": "complete",
+            "timestamp": datetime.now().isoformat(),
+            "progress": 100,
+            "message": "Processing complete!",
+            "results_file": results_file
+        })
+        
+        if job_id:
+            checkpoint_store.set_status(job_id, "complete")
+        
+    except Exception as e:
+        print(f"Error in background processing: {str(e)}")
+        traceback.print_exc()
+        record_job_failure(initial_state, str(e))
+        raise
+
+
+def record_job_failure(initial_state: Dict[str, Any], error: str) -> None:
+    """
+    Mark a job as failed in its status file and in the checkpoint store
+
+    Used both when the workflow raises and when the job queue gives up on a job whose workers kept dying.
+
+    Args:
+        initial_state: Initial workflow state; its metadata holds the job id and status file
+        error: Error message shown to the learner
+    """
+    metadata = initial_state["metadata"]
+    job_id = metadata.get("job_id")
+    
+    # Completed nodes stay checkpointed, so a retry only reruns the failed ones
+    if job_id:
+        get_checkpoint_store().set_status(job_id, "error", error)
+        # A failure in a parallel branch can stop the graph before content generation
+        # takes the details generated ahead for published units
+        discard_unit_generations(job_id)
+    
+    # Update status to error
+    write_json_file(metadata["processing_status_file"], {
+        "status": "error",
+        "timestamp": datetime.now().isoformat(),
+        "error": error
+    })
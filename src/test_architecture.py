@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests for the support system workflow graph
+"""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.architecture import build_support_system, clear_support_system_cache, get_support_system
+from src.planner import FULL_PLAN, plan_support_pipeline
+from src.utils.glossary_store import GlossaryStore
+from src.utils.simplification_memo import SimplificationMemo
+
+
+@pytest.fixture(autouse=True)
+def isolated_stores(tmp_path):
+    """Keep the vocabulary and simplification nodes away from the real glossary and memo databases"""
+    store = GlossaryStore(str(tmp_path / "glossary.sqlite3"))
+    memo = SimplificationMemo(str(tmp_path / "memo.sqlite3"))
+    with patch("src.dyslexia_support.get_glossary_store", return_value=store), \
+         patch("src.dyslexia_support.get_simplification_memo", return_value=memo):
+        yield
+
+
+def fake_micro_content_divider(state):
+    state["processed_content"]["micro_units"] = [{"unit_number": 1, "content": "unit one"}]
+    state["interaction_history"].append({"step": "adhd_support_processor", "tool": "micro_content_divider"})
+    return state
+
+
+def fake_syntax_simplifier(state):
+    state["processed_content"]["simplified_text"] = {"content": "simple text", "vocabulary": {}}
+    state["interaction_history"].append({"step": "dyslexia_support_processor", "tool": "syntax_simplifier"})
+    return state
+
+
+def fake_content_generator(state):
+    units = state["processed_content"]["micro_units"]
+    state["processed_content"]["detailed_units"] = [{"unit_number": u["unit_number"]} for u in units]
+    state["current_focus"] = "content_generation_complete"
+    return state
+
+
+def make_initial_state(difficulty_type: str = "Combined"):
+    return {
+        "user_profile": {"analysis": {"difficulty_type": difficulty_type}},
+        "learning_materials": {"title": "Test", "current_content": "Some material."},
+        "processed_content": {},
+        "interaction_history": [],
+        "current_focus": "start",
+        "next_steps": [],
+        "metadata": {},
+        "iteration_count": 0
+    }
+
+
+def test_adhd_and_dyslexia_branches_run_in_parallel():
+    """Both branches are in flight at the same time and their outputs are merged"""
+    # Each branch waits for the other, so the barrier only opens when they overlap
+    barrier = threading.Barrier(2, timeout=5)
+
+    def divider(state):
+        barrier.wait()
+        return fake_micro_content_divider(state)
+
+    def simplifier(state):
+        barrier.wait()
+        return fake_syntax_simplifier(state)
+
+    with patch("src.architecture.micro_content_divider", divider), \
+         patch("src.architecture.syntax_simplifier", simplifier), \
+         patch("src.architecture.content_generator", fake_content_generator):
+        final_state = build_support_system().invoke(make_initial_state())
+
+    processed_content = final_state["processed_content"]
+    assert "micro_units" in processed_content
+    assert "simplified_text" in processed_content
+    assert processed_content["detailed_units"] == [{"unit_number": 1}]
+    assert processed_content["general_tools_applied"] is True
+    assert final_state["current_focus"] == "all_complete"
+
+    steps = [entry["step"] for entry in final_state["interaction_history"]]
+    assert steps.count("general_tools_processor") == 1
+    assert steps.index("content_generation_processor") < steps.index("general_tools_processor")
+    assert "dyslexia_support_processor" in steps
+    assert "vocabulary_substitution_processor" in steps
+
+
+def test_planner_selects_nodes_per_difficulty_type():
+    """Each difficulty type gets only the nodes it needs"""
+    assert plan_support_pipeline({}) == FULL_PLAN
+    assert plan_support_pipeline({"analysis": {"difficulty_type": "ADHD"}}) == (
+        "adhd_support", "content_generation", "general_tools")
+    assert plan_support_pipeline({"analysis": {"difficulty_type": "Dyslexia"}}) == (
+        "dyslexia_support", "vocabulary_substitution", "general_tools")
+    assert plan_support_pipeline({"analysis": {"difficulty_type": "Analysis Error"}}) == (
+        "adhd_support", "dyslexia_support", "vocabulary_substitution", "content_generation", "general_tools")
+
+
+def test_dyslexia_plan_skips_micro_units_and_records_plan():
+    """A dyslexia-only learner never reaches segmentation or content generation"""
+    initial_state = make_initial_state("Dyslexia")
+    plan = plan_support_pipeline(initial_state["user_profile"])
+
+    with patch("src.architecture.micro_content_divider") as divider, \
+         patch("src.architecture.syntax_simplifier", fake_syntax_simplifier), \
+         patch("src.architecture.content_generator") as generator:
+        final_state = build_support_system(plan).invoke(initial_state)
+
+    divider.assert_not_called()
+    generator.assert_not_called()
+    assert "simplified_text" in final_state["processed_content"]
+    assert "micro_units" not in final_state["processed_content"]
+    assert "vocabulary_support" in final_state["processed_content"]
+    assert final_state["metadata"]["execution_plan"] == [
+        "dyslexia_support", "vocabulary_substitution", "general_tools"]
+    assert final_state["metadata"]["skipped_nodes"] == ["profile_analyzer", "adhd_support", "content_generation"]
+
+
+def test_compiled_graph_is_reused_per_plan():
+    """Each plan is compiled once; later requests with the same plan reuse the compiled graph"""
+    clear_support_system_cache()
+    dyslexia_plan = plan_support_pipeline({"analysis": {"difficulty_type": "Dyslexia"}})
+
+    with patch("src.architecture.build_support_system", wraps=build_support_system) as build:
+        first = get_support_system(dyslexia_plan)
+        second = get_support_system(list(reversed(dyslexia_plan)))
+        full = get_support_system()
+
+    assert first is second
+    assert full is not first
+    assert build.call_count == 2
+    clear_support_system_cache()
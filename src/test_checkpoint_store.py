@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for node-level workflow checkpointing and resume
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from src.architecture import build_support_system
+from src.planner import plan_support_pipeline
+from src.utils.checkpoint_store import CheckpointStore
+
+
+def make_job_state(job_id: str):
+    return {
+        "user_profile": {"analysis": {"difficulty_type": "ADHD"}},
+        "learning_materials": {"title": "Test", "current_content": "Some material."},
+        "processed_content": {},
+        "interaction_history": [],
+        "current_focus": "start",
+        "next_steps": [],
+        "metadata": {"job_id": job_id},
+        "iteration_count": 0
+    }
+
+
+def test_store_round_trips_jobs_and_node_updates(tmp_path):
+    """Jobs and node updates survive reopening the database, and completing a job drops its checkpoints"""
+    path = str(tmp_path / "checkpoints.sqlite3")
+    store = CheckpointStore(path)
+    store.save_job("job-1", make_job_state("job-1"), ("adhd_support", "general_tools"))
+    store.save_node("job-1", "adhd_support", {"processed_content": {"micro_units": [1, 2]}})
+
+    reopened = CheckpointStore(path)
+    [job] = reopened.get_incomplete_jobs()
+    assert job["job_id"] == "job-1"
+    assert job["plan"] == ("adhd_support", "general_tools")
+    assert reopened.load_node("job-1", "adhd_support") == {"processed_content": {"micro_units": [1, 2]}}
+    assert reopened.get_completed_nodes("job-1") == ["adhd_support"]
+
+    reopened.set_status("job-1", "complete")
+    assert reopened.get_incomplete_jobs() == []
+    assert reopened.load_node("job-1", "adhd_support") is None
+
+
+def test_interrupted_job_is_claimed_by_one_process(tmp_path):
+    """Processes starting together resume each interrupted job once; a stalled claim lapses"""
+    path = str(tmp_path / "checkpoints.sqlite3")
+    CheckpointStore(path).save_job("job-1", make_job_state("job-1"), ("adhd_support",))
+    first, second = CheckpointStore(path), CheckpointStore(path)
+
+    assert [job["job_id"] for job in second.get_incomplete_jobs()] == ["job-1"]
+    assert first.claim_job("job-1")
+    assert not second.claim_job("job-1")
+    assert second.get_incomplete_jobs() == []
+
+    # The claiming process stopped without completing another node
+    assert [job["job_id"] for job in second.get_incomplete_jobs(stale_after=0)] == ["job-1"]
+    assert second.claim_job("job-1", stale_after=0)
+
+
+def test_resumed_job_skips_completed_nodes(tmp_path):
+    """After a failure in content generation, rerunning the job does not repeat micro content division"""
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    initial_state = make_job_state("job-2")
+    plan = plan_support_pipeline(initial_state["user_profile"])
+    divider_calls = []
+
+    def fake_micro_content_divider(state):
+        divider_calls.append(1)
+        state["processed_content"]["micro_units"] = [{"unit_number": 1, "content": "unit one"}]
+        return state
+
+    def failing_content_generator(state):
+        raise RuntimeError("LLM unavailable")
+
+    def fake_content_generator(state):
+        state["processed_content"]["detailed_units"] = [{"unit_number": 1}]
+        return state
+
+    with patch("src.architecture.get_checkpoint_store", return_value=store), \
+         patch("src.architecture.micro_content_divider", fake_micro_content_divider):
+        with patch("src.architecture.content_generator", failing_content_generator):
+            with pytest.raises(RuntimeError):
+                build_support_system(plan).invoke(initial_state)
+
+        assert store.get_completed_nodes("job-2") == ["adhd_support"]
+
+        with patch("src.architecture.content_generator", fake_content_generator):
+            final_state = build_support_system(plan).invoke(initial_state)
+
+    assert len(divider_calls) == 1
+    assert final_state["processed_content"]["micro_units"] == [{"unit_number": 1, "content": "unit one"}]
+    assert final_state["processed_content"]["detailed_units"] == [{"unit_number": 1}]
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for chunked, concurrent syntax simplification
+"""
+
+import re
+import time
+
+from src import dyslexia_support
+from src.dyslexia_support import chunk_paragraphs, merge_vocabularies
+from src.utils.simplification_memo import SimplificationMemo
+
+PARAGRAPHS = [
+    f"Paragraph {i} explains how photosynthesis constitutes the fundamental biochemical mechanism "
+    f"whereby autotrophic organisms synthesize carbohydrates utilizing electromagnetic radiation."
+    for i in range(6)
+]
+
+
+def echo_sentences(prompt):
+    """Response that returns every numbered sentence upper-cased"""
+    lines = re.findall(r"^\[(\d+)\] (.*)$", prompt, re.MULTILINE)
+    return {"sentences": [{"id": int(number), "text": text.upper()} for number, text in lines],
+            "vocabulary": [{"term": "Photosynthesis", "definition": "How plants make food"}]}
+
+
+def merge_paragraphs(prompt):
+    """Response that merges a multi-paragraph chunk into one paragraph, but echoes single paragraphs"""
+    response = echo_paragraphs(prompt)
+    if len(response["paragraphs"]) > 1:
+        response["paragraphs"] = [" ".join(response["paragraphs"])]
+    return response
+
+
+def echo_paragraphs(prompt):
+    """Response with the upper-cased material and a vocabulary shared by every chunk"""
+    content = prompt.split("阅读障碍学生：\n\n", 1)[1]
+    paragraphs = re.split(r"\n\n(?=\[\d+\] )", content)
+    paragraphs = [re.sub(r"^\[\d+\] ", "", paragraph) for paragraph in paragraphs]
+    return {
+        "paragraphs": [paragraph.upper() for paragraph in paragraphs],
+        "vocabulary": [{"term": "Photosynthesis", "definition": "How plants make food"},
+                       {"term": paragraphs[0].split()[1], "definition": "A number"}]
+    }
+
+
+def simplification_settings(simplification):
+    """Config override with the given simplification settings and four concurrent requests"""
+    return {
+        "simplification": simplification,
+        "llm": {**dyslexia_support.config.config["llm"], "max_concurrency": 4}
+    }
+
+
+def test_chunks_follow_token_budget_and_order():
+    paragraphs = ["a" * 400, "b" * 400, "c" * 400, "d" * 2000, "e" * 40]
+    assert chunk_paragraphs(paragraphs, [0, 1, 2, 3, 4], 250) == [[0, 1], [2], [3], [4]]
+    assert chunk_paragraphs(paragraphs, [0, 2, 4], 1000) == [[0, 2, 4]]
+
+
+def test_vocabularies_are_deduplicated():
+    assert merge_vocabularies([
+        {"Photosynthesis": "How plants make food", "Leaf": "Part of a plant"},
+        {"photosynthesis:": "Another definition", "Root": "Part under the ground"}
+    ]) == {"Photosynthesis": "How plants make food", "Leaf": "Part of a plant", "Root": "Part under the ground"}
+
+
+def test_long_material_is_simplified_in_concurrent_chunks(tmp_path, run_simplifier, simplifier_llm):
+    """Chunks run in parallel and their results and vocabularies are stitched in order"""
+    llm = simplifier_llm(echo_paragraphs, delay=0.2)
+    start = time.perf_counter()
+    result = run_simplifier("\n\n".join(PARAGRAPHS), llm,
+                            memo=SimplificationMemo(str(tmp_path / "memo.sqlite3"), enabled=False),
+                            settings=simplification_settings({"mode": "auto", "chunk_tokens": 100}))
+    elapsed = time.perf_counter() - start
+
+    assert len(llm.prompts) == result["chunk_count"] == 3
+    assert elapsed < 0.45
+    assert result["content"] == "\n\n".join(paragraph.upper() for paragraph in PARAGRAPHS)
+    assert list(result["vocabulary"]) == ["Photosynthesis", "0", "2", "4"]
+
+
+def test_single_mode_sends_one_request(tmp_path, run_simplifier, simplifier_llm):
+    llm = simplifier_llm(echo_paragraphs)
+    result = run_simplifier("\n\n".join(PARAGRAPHS), llm,
+                            memo=SimplificationMemo(str(tmp_path / "memo.sqlite3"), enabled=False),
+                            settings=simplification_settings({"mode": "single", "chunk_tokens": 60}))
+    assert len(llm.prompts) == result["chunk_count"] == 1
+
+
+def test_default_configuration_batches_memo_misses_concurrently(run_simplifier, simplifier_llm):
+    """With the sentence memo on (the default), uncached sentences are still split by chunk_tokens"""
+    llm = simplifier_llm(echo_sentences, delay=0.2)
+    settings = simplification_settings({**dyslexia_support.config.config["simplification"], "chunk_tokens": 100})
+    start = time.perf_counter()
+    result = run_simplifier("\n\n".join(PARAGRAPHS), llm, settings=settings)
+    elapsed = time.perf_counter() - start
+
+    assert settings["simplification"]["memo_enabled"] and settings["simplification"]["mode"] == "auto"
+    assert len(llm.prompts) == result["chunk_count"] == 3
+    assert elapsed < 0.45
+    assert result["content"] == "\n\n".join(paragraph.upper() for paragraph in PARAGRAPHS)
+
+
+def test_memo_single_mode_sends_one_request(run_simplifier, simplifier_llm):
+    llm = simplifier_llm(echo_sentences)
+    result = run_simplifier("\n\n".join(PARAGRAPHS), llm,
+                            settings=simplification_settings({"mode": "single", "chunk_tokens": 60}))
+    assert len(llm.prompts) == result["chunk_count"] == 1
+
+
+def test_paragraph_count_mismatch_resimplifies_each_paragraph(tmp_path, run_simplifier, simplifier_llm):
+    """A chunk answered with the wrong number of paragraphs is retried paragraph by paragraph"""
+    llm = simplifier_llm(merge_paragraphs)
+    result = run_simplifier("\n\n".join(PARAGRAPHS[:3]), llm,
+                            memo=SimplificationMemo(str(tmp_path / "memo.sqlite3"), enabled=False),
+                            settings=simplification_settings({"mode": "single", "chunk_tokens": 1500}))
+
+    assert len(llm.prompts) == 4
+    assert result["content"] == "\n\n".join(paragraph.upper() for paragraph in PARAGRAPHS[:3])
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Tests for batched highlight element extraction
+"""
+
+import json
+import time
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+from src.config import SystemConfig
+from src.utils.content_analyzer import (
+    ContentAnalyzer, get_tier_stats, project_unit_elements, requires_llm_analysis, reset_tier_stats
+)
+from src.utils.keyword_extractor import KeywordExtractor
+
+
+LONG_TEXT = (
+    "A linked list is a linear data structure made of nodes. Each node in a linked list stores data and a "
+    "pointer to the next node. Unlike an array, a linked list does not store its elements in contiguous memory. "
+    "Inserting a node into a linked list takes constant time when the position is known. Searching a linked "
+    "list requires walking the nodes one by one, so it takes linear time. A doubly linked list stores a "
+    "pointer to the previous node as well."
+)
+
+UNITS = [
+    "Neural networks recognize patterns in data.",
+    "A neuron is a mathematical function with several inputs.",
+    "Training requires labeled data, for example images."
+]
+
+
+class FakeBatchLLM:
+    """Fake LLM that records its prompts and answers with a fixed batched response"""
+
+    def __init__(self, response):
+        self.response = response
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(str(prompt))
+        return AIMessage(content=f"```json\n{json.dumps(self.response)}\n```")
+
+
+def make_analyzer(llm, max_batch_tokens=6000, mode="llm"):
+    config = SystemConfig()
+    config.config["content_analysis"] = {
+        "mode": mode,
+        "confidence_threshold": 0.5,
+        "llm_severity_level": 5,
+        "max_batch_tokens": max_batch_tokens
+    }
+    with patch("src.utils.content_analyzer.get_llm", return_value=llm):
+        return ContentAnalyzer(config)
+
+
+def identify(analyzer, units, refine_with_llm=False):
+    with patch("src.utils.content_analyzer.invoke_llm", side_effect=lambda llm, prompt, node: llm.invoke(prompt)):
+        return analyzer.identify_elements_for_units(units, "ADHD", refine_with_llm)
+
+
+def test_all_units_are_analyzed_in_one_request():
+    """Three units need a single LLM request and each unit gets its own elements"""
+    llm = FakeBatchLLM({"units": [
+        {"unit": 1, "primary": [{"text": "Neural networks", "metadata": {"importance": "high"}}]},
+        {"unit": 2, "definitions": [{"text": "neuron", "metadata": {"definition": "A function"}}]},
+        {"unit": 3, "key_concepts": [{"text": "Training", "metadata": {"importance": "high"}}]}
+    ]})
+
+    results = identify(make_analyzer(llm), UNITS)
+
+    assert len(llm.prompts) == 1
+    assert "[Unit 3]" in llm.prompts[0]
+    assert [element["text"] for element in results[0]["primary"]] == ["Neural networks"]
+    assert [element["text"] for element in results[1]["definitions"]] == ["neuron"]
+    assert [element["text"] for element in results[2]["key_concepts"]] == ["Training"]
+
+
+def test_units_are_split_by_token_budget():
+    """Units beyond the per-request token budget go into another request"""
+    llm = FakeBatchLLM({"units": []})
+    identify(make_analyzer(llm, max_batch_tokens=20), UNITS)
+    assert 1 < len(llm.prompts) < len(UNITS) + 1
+
+
+def test_missing_units_fall_back_to_rules():
+    """A unit without elements in the response gets rule-based elements"""
+    llm = FakeBatchLLM({"units": [{"unit": 1, "primary": [{"text": "Neural networks"}]}]})
+    results = identify(make_analyzer(llm), UNITS)
+    assert results[1]["primary"]
+    assert results[2]["primary"]
+
+
+def test_misattributed_elements_are_projected_onto_matching_units():
+    """Elements reported under the wrong unit move to the unit that contains them; unknown text is dropped"""
+    results = project_unit_elements({"units": {
+        "1": {"primary": ["neuron", "Neural networks", "not in any unit"]}
+    }}, UNITS)
+
+    assert [element["text"] for element in results[0]["primary"]] == ["Neural networks"]
+    assert [element["text"] for element in results[1]["primary"]] == ["neuron"]
+    assert results[2]["primary"] == []
+
+
+def test_keyword_extractor_finds_repeated_phrases():
+    """The local extractor ranks the repeated domain phrase first and is confident on a full paragraph"""
+    result = KeywordExtractor().extract(LONG_TEXT)
+    assert result["elements"]["primary"][0]["text"] == "linked list"
+    assert [element["text"] for element in result["elements"]["definitions"]] == ["linked list"]
+    assert result["confidence"] >= 0.5
+
+
+def test_tiered_mode_skips_llm_for_confident_local_results():
+    """Confident units are handled locally; only the short unit goes to the LLM"""
+    reset_tier_stats()
+    llm = FakeBatchLLM({"units": [{"unit": 1, "primary": [{"text": "Neural networks"}]}]})
+
+    results = identify(make_analyzer(llm, mode="tiered"), [LONG_TEXT, UNITS[0]])
+
+    assert len(llm.prompts) == 1
+    assert "linked list" not in llm.prompts[0]
+    assert results[0]["primary"][0]["text"] == "linked list"
+    assert [element["text"] for element in results[1]["primary"]] == ["Neural networks"]
+    stats = get_tier_stats()
+    assert stats["local"]["hits"] == 1 and stats["llm"]["hits"] == 1
+    assert stats["local"]["rate"] == 0.5
+
+
+def test_refinement_and_local_mode():
+    """Refinement sends confident units to the LLM; local mode never calls it"""
+    llm = FakeBatchLLM({"units": [{"unit": 1, "primary": [{"text": "node"}]}]})
+    results = identify(make_analyzer(llm, mode="tiered"), [LONG_TEXT], refine_with_llm=True)
+    assert len(llm.prompts) == 1
+    assert [element["text"] for element in results[0]["primary"]] == ["node"]
+
+    llm = FakeBatchLLM({"units": []})
+    results = identify(make_analyzer(llm, mode="local"), [LONG_TEXT, UNITS[0]])
+    assert llm.prompts == []
+    assert results[1]["primary"]
+
+
+def test_severe_profiles_require_llm_analysis():
+    config = SystemConfig()
+    config.config["content_analysis"] = {"llm_severity_level": 4}
+    assert requires_llm_analysis({"analysis": {"severity_level": 4}}, config)
+    assert not requires_llm_analysis({"analysis": {"severity_level": 3}}, config)
+    assert not requires_llm_analysis({}, config)
+
+
+def test_rule_based_elements_follow_sentence_rules():
+    """First and indicator sentences are primary, example sentences secondary, clause-initial terms defined"""
+    text = ("A linked list is a linear data structure. The key point is that nodes hold pointers. "
+            "For example, a node stores data. The building block of a large linked list is the node.")
+    elements = ContentAnalyzer.__new__(ContentAnalyzer)._rule_based_identify_elements(text)
+
+    assert [e["text"] for e in elements["primary"]] == [
+        "A linked list is a linear data structure.", "The key point is that nodes hold pointers."
+    ]
+    assert [e["text"] for e in elements["secondary"]] == ["For example, a node stores data."]
+    assert [(e["text"], e["metadata"]["definition"]) for e in elements["definitions"]] == [
+        ("A linked list", "a linear data structure"), ("The key point", "that nodes hold pointers")
+    ]
+    assert [e["text"] for e in elements["key_concepts"]] == ["The", "For"]
+
+
+def test_rule_based_analyzer_handles_book_length_input():
+    """A 1 MB material is analyzed in well under a second"""
+    from src.benchmarks.rule_based_benchmark import build_document
+    document = build_document(1.0, seed=3)
+    analyzer = ContentAnalyzer.__new__(ContentAnalyzer)
+
+    start = time.perf_counter()
+    elements = analyzer._rule_based_identify_elements(document)
+    elapsed = time.perf_counter() - start
+
+    assert len(elements["primary"]) == 5
+    assert len(elements["definitions"]) == 4
+    assert elapsed < 1.0
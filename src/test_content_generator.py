@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for concurrent per-unit content generation
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+from src.content_generator import config, content_generator
+
+
+class SlowFakeLLM:
+    """Fake LLM that sleeps per call and fails for one unit"""
+
+    def __init__(self, delay: float = 0.2, fail_marker: str = None):
+        self.delay = delay
+        self.fail_marker = fail_marker
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            text = prompt.to_string()
+            if self.fail_marker and self.fail_marker in text:
+                raise RuntimeError("LLM request failed")
+            return AIMessage(content=f"detailed:{text.count('unit')}")
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def make_state(unit_count: int):
+    return {
+        "user_profile": {"analysis": {"difficulty_type": "ADHD"}},
+        "learning_materials": {"current_content": "Linked lists are linear data structures."},
+        "processed_content": {
+            "micro_units": [
+                {"unit_number": i + 1, "content": f"summary-{i + 1}", "estimated_time_minutes": 5}
+                for i in range(unit_count)
+            ]
+        },
+        "interaction_history": []
+    }
+
+
+def run_generator(llm, state, max_concurrency):
+    with patch("src.content_generator.get_llm", return_value=llm), \
+         patch("src.content_generator.invoke_llm", side_effect=lambda llm, prompt, node: llm.invoke(prompt)), \
+         patch.dict(config.config["llm"], {"max_concurrency": max_concurrency}):
+        return content_generator(state)
+
+
+def test_units_run_concurrently_and_keep_order():
+    """Ten units finish in roughly the time of one and keep their order"""
+    llm = SlowFakeLLM(delay=0.2)
+
+    start = time.time()
+    state = run_generator(llm, make_state(10), max_concurrency=10)
+    elapsed = time.time() - start
+
+    detailed_units = state["processed_content"]["detailed_units"]
+    assert [unit["unit_number"] for unit in detailed_units] == list(range(1, 11))
+    assert [unit["summary"] for unit in detailed_units] == [f"summary-{i}" for i in range(1, 11)]
+    assert elapsed < 1.0
+    assert llm.max_active > 1
+
+
+def test_concurrency_limit_is_respected():
+    """No more than max_concurrency requests are in flight at once"""
+    llm = SlowFakeLLM(delay=0.05)
+    run_generator(llm, make_state(8), max_concurrency=3)
+    assert llm.max_active <= 3
+
+
+def test_failed_unit_does_not_affect_other_units():
+    """A failing unit falls back to its summary while the others succeed"""
+    llm = SlowFakeLLM(delay=0.01, fail_marker="summary-2")
+    state = run_generator(llm, make_state(3), max_concurrency=3)
+
+    detailed_units = state["processed_content"]["detailed_units"]
+    assert len(detailed_units) == 3
+    assert "error" in detailed_units[1]
+    assert detailed_units[1]["detailed_content"] == "summary-2"
+    assert "error" not in detailed_units[0]
+    assert "error" not in detailed_units[2]
+
+
+def test_prompt_carries_only_the_unit_summary():
+    """Highlight offsets attached after division never reach the generation prompt"""
+    prompts = []
+
+    class RecordingLLM:
+        def invoke(self, prompt):
+            prompts.append(prompt.to_string())
+            return AIMessage(content="detailed")
+
+    state = make_state(1)
+    unit = state["processed_content"]["micro_units"][0]
+    unit.update({"title": "Linked lists", "key_points": ["nodes point onward"]})
+    run_generator(RecordingLLM(), state, max_concurrency=1)
+    unit["highlight_spans"] = [{"start": 0, "end": 7, "type": "key_term"}]
+    run_generator(RecordingLLM(), state, max_concurrency=1)
+
+    assert prompts[0] == prompts[1]
+    assert "highlight_spans" not in prompts[0]
+    assert "Linked lists" in prompts[0] and "nodes point onward" in prompts[0] and "summary-1" in prompts[0]
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the incrementally maintained corpus statistics
+"""
+
+import os
+import time
+
+from src.utils.corpus_stats import CorpusStats
+from src.utils.keyword_extractor import KeywordExtractor
+
+MATERIALS = {
+    "arrays": "An array stores elements in contiguous memory. Each element of the array has an index.",
+    "stacks": "A stack is a collection of elements. Elements are added and removed at the top of the stack.",
+    "queues": "A queue is a collection of elements. Elements are added at the back and removed at the front.",
+}
+
+
+def test_add_document_counts_terms_once(tmp_path):
+    """Document frequencies count documents, term counts count occurrences, and re-adding is a no-op"""
+    stats = CorpusStats(str(tmp_path / "corpus.npz"))
+    for document_id, content in MATERIALS.items():
+        assert stats.add_document(document_id, content)
+    assert not stats.add_document("arrays", MATERIALS["arrays"])
+
+    assert stats.document_count == 3
+    assert stats.document_frequencies(["elements", "stack", "unknown term"]).tolist() == [3, 1, 0]
+    top = stats.most_common(1)[0]
+    assert top["term"] == "elements" and top["document_frequency"] == 3
+
+    idf = stats.idf(["elements", "stack"])
+    assert idf[0] < idf[1]
+
+
+def test_statistics_persist_and_reload(tmp_path):
+    """A second instance, e.g. in a worker process, sees the saved counts and later updates"""
+    path = str(tmp_path / "corpus.npz")
+    writer = CorpusStats(path)
+    writer.add_document("arrays", MATERIALS["arrays"])
+    reader = CorpusStats(path)
+    assert reader.document_count == 1
+
+    writer.add_document("stacks", MATERIALS["stacks"])
+    # Make sure the file modification time changes even on coarse-grained filesystems
+    os.utime(path, (0, os.path.getmtime(path) + 1))
+    assert reader.has_document("stacks")
+    assert reader.document_frequencies(["elements"]).tolist() == [2]
+
+
+def test_sync_directory_adds_only_new_materials(tmp_path):
+    for document_id, content in MATERIALS.items():
+        (tmp_path / f"{document_id}.txt").write_text(content, encoding="utf-8")
+    stats = CorpusStats(str(tmp_path / "stats" / "corpus.npz"))
+
+    assert stats.sync_directory(str(tmp_path)) == 3
+    assert stats.sync_directory(str(tmp_path)) == 0
+
+
+def test_count_arrays_grow_past_initial_capacity(tmp_path):
+    stats = CorpusStats(str(tmp_path / "corpus.npz"))
+    words = " ".join(f"term{i}" for i in range(3000))
+    stats.add_document("big", words + ".")
+    assert stats.term_count >= 3000
+    assert stats.document_frequencies(["term2999"]).tolist() == [1]
+
+
+def test_corpus_idf_demotes_terms_common_across_materials(tmp_path):
+    """With a corpus, a term found in every material ranks below the material's own topic"""
+    stats = CorpusStats(str(tmp_path / "corpus.npz"))
+    for document_id, content in MATERIALS.items():
+        stats.add_document(document_id, content)
+
+    text = ("Elements of a heap are kept in a binary tree. A heap keeps the smallest elements at the root. "
+            "Inserting elements restores the heap order, and removing elements does too.")
+    local_terms = [e["text"] for e in KeywordExtractor().extract(text)["elements"]["primary"]]
+    corpus_terms = [e["text"] for e in KeywordExtractor(corpus=stats).extract(text)["elements"]["primary"]]
+
+    assert local_terms[0] == "Elements"
+    assert corpus_terms[0] == "heap"
+    assert corpus_terms.index("heap") < corpus_terms.index("Elements")
+
+
+def test_delayed_save_batches_uploads_off_the_request_thread(tmp_path):
+    """With a save delay, add_document returns without writing and one timer saves all pending uploads"""
+    path = str(tmp_path / "corpus.npz")
+    stats = CorpusStats(path, save_delay=0.2)
+    stats.add_document("arrays", MATERIALS["arrays"])
+    stats.add_document("stacks", MATERIALS["stacks"])
+    assert not os.path.exists(path)
+    assert stats.document_count == 2
+
+    deadline = time.time() + 5
+    while not os.path.exists(path) and time.time() < deadline:
+        time.sleep(0.05)
+    assert CorpusStats(path).document_count == 2
+
+    stats.add_document("queues", MATERIALS["queues"])
+    stats.flush()
+    assert CorpusStats(path).document_count == 3
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent glossary and its use in syntax simplification
+"""
+
+from src.utils.glossary_store import GlossaryStore
+
+
+def defining(vocabulary):
+    """Response that simplifies the material to one sentence and defines the given terms"""
+    return lambda prompt: {
+        "sentences": [{"id": 1, "text": "Plants make food from light."}],
+        "vocabulary": [{"term": term, "definition": definition} for term, definition in vocabulary.items()]
+    }
+
+
+def test_add_and_lookup_terms(tmp_path):
+    """Terms are stored per language, matched case-insensitively and keep their first definition"""
+    store = GlossaryStore(str(tmp_path / "glossary.sqlite3"))
+    store.add({"Photosynthesis": "How plants make food", "Chlorophyll": "Green pigment"}, "en")
+    store.add({"photosynthesis": "Another definition"}, "en")
+
+    assert store.lookup(["PHOTOSYNTHESIS", "osmosis"], "en") == {"PHOTOSYNTHESIS": "How plants make food"}
+    assert store.lookup(["Photosynthesis"], "zh") == {}
+    assert store.find_in_text("Chlorophyll helps photosynthesis in leaves.", "en") == {
+        "Photosynthesis": "How plants make food", "Chlorophyll": "Green pigment"
+    }
+    assert store.size() == 2
+
+
+def test_find_in_text_sees_new_terms(tmp_path):
+    """The term matcher is rebuilt when the glossary changes"""
+    store = GlossaryStore(str(tmp_path / "glossary.sqlite3"))
+    store.add({"mitochondria": "Energy factory of the cell"}, "en")
+    assert list(store.find_in_text("Mitochondria and ribosomes.", "en")) == ["mitochondria"]
+    store.add({"ribosomes": "Protein builders"}, "en")
+    assert list(store.find_in_text("Mitochondria and ribosomes.", "en")) == ["mitochondria", "ribosomes"]
+
+
+def test_matcher_is_kept_when_only_usage_counts_change(tmp_path):
+    """Reusing known terms does not rebuild the matcher, but the ranking follows the new counts"""
+    store = GlossaryStore(str(tmp_path / "glossary.sqlite3"))
+    store.add({"mitochondria": "Energy factory of the cell", "ribosomes": "Protein builders"}, "en")
+    store.find_in_text("Mitochondria and ribosomes.", "en")
+    matcher = store._matchers["en"][1]
+
+    store.add({"ribosomes": "Protein builders"}, "en")
+    assert store.find_in_text("Mitochondria and ribosomes.", "en", limit=1) == {"ribosomes": "Protein builders"}
+    assert store._matchers["en"][1] is matcher
+
+
+def test_simplifier_only_asks_llm_for_unknown_terms(tmp_path, run_simplifier, simplifier_llm):
+    """Known terms are listed in the prompt as already defined and their stored definitions are reused"""
+    store = GlossaryStore(str(tmp_path / "glossary.sqlite3"))
+
+    first = simplifier_llm(defining({"Photosynthesis": "How plants make food from light"}))
+    result = run_simplifier("Photosynthesis happens in the chloroplast of a leaf.", first, glossary=store)
+    assert result["vocabulary"] == {"Photosynthesis": "How plants make food from light"}
+    assert "：无" in first.prompts[0]
+
+    second = simplifier_llm(defining({"Chloroplast": "Part of a plant cell"}))
+    result = run_simplifier("The chloroplast uses photosynthesis to store energy.", second, glossary=store)
+    assert "Photosynthesis" in second.prompts[0]
+    assert result["vocabulary"] == {
+        "Photosynthesis": "How plants make food from light", "Chloroplast": "Part of a plant cell"
+    }
+
+    stats = store.get_stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    assert abs(stats["hit_rate"] - 1 / 3) < 1e-9
+
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for the durable job queue and the worker process loop
+"""
+
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.job_scheduler import QueueFullError
+from src.utils.checkpoint_store import CheckpointStore
+from src.utils.job_queue import DurableJobQueue
+from src.worker import process_next_job
+
+
+def test_jobs_are_leased_once_in_order(tmp_path):
+    """Each job is handed to exactly one worker, oldest first, and reports its queue position"""
+    queue = DurableJobQueue(str(tmp_path / "queue.sqlite3"))
+    queue.enqueue("job-a", {"n": 1})
+    time.sleep(0.01)
+    queue.enqueue("job-b", {"n": 2})
+
+    assert queue.get_queue_position("job-b") == 2
+
+    first = queue.lease("worker-1")
+    second = DurableJobQueue(queue.path).lease("worker-2")
+
+    assert first["job_id"] == "job-a"
+    assert first["payload"] == {"n": 1}
+    assert second["job_id"] == "job-b"
+    assert queue.lease("worker-3") is None
+
+    queue.complete("job-a", "worker-1")
+    assert queue.get_status("job-a")["status"] == "complete"
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(tmp_path):
+    """A job whose worker stopped renewing its lease becomes available again"""
+    queue = DurableJobQueue(str(tmp_path / "queue.sqlite3"), lease_seconds=0.05, max_attempts=2)
+    queue.enqueue("job-a", {})
+
+    assert queue.lease("crashed-worker")["attempts"] == 1
+    assert queue.lease("worker-2") is None
+    time.sleep(0.1)
+
+    reclaimed = queue.lease("worker-2")
+    assert reclaimed["job_id"] == "job-a"
+    assert reclaimed["attempts"] == 2
+    assert not queue.heartbeat("job-a", "crashed-worker")
+
+    time.sleep(0.1)
+    assert queue.lease("worker-3") is None
+    assert [job["job_id"] for job in queue.abandon_expired()] == ["job-a"]
+    assert queue.get_status("job-a")["status"] == "error"
+    assert queue.abandon_expired() == []
+
+
+def test_worker_runs_leased_job_and_records_outcome(tmp_path):
+    """The worker loop passes the payload to the job runner and marks the job complete or failed"""
+    queue = DurableJobQueue(str(tmp_path / "queue.sqlite3"))
+    queue.enqueue("ok", {"initial_state": {"metadata": {}}, "execution_plan": ["general_tools"]})
+    time.sleep(0.01)
+    queue.enqueue("broken", {"initial_state": {"metadata": {}}, "execution_plan": ["general_tools"]})
+
+    calls = []
+
+    def fake_run_support_job(initial_state, execution_plan):
+        calls.append(execution_plan)
+        if len(calls) == 2:
+            raise RuntimeError("LLM unavailable")
+
+    with patch("src.worker.get_job_queue", return_value=queue), \
+         patch("src.worker.run_support_job", fake_run_support_job):
+        assert process_next_job("worker-1")
+        assert process_next_job("worker-1")
+        assert not process_next_job("worker-1")
+
+    assert calls == [("general_tools",), ("general_tools",)]
+    assert queue.get_status("ok")["status"] == "complete"
+    assert queue.get_status("broken") == {"status": "error", "attempts": 1, "error": "LLM unavailable"}
+
+
+def test_retry_after_follows_worker_throughput(tmp_path):
+    """The retry estimate comes from the queue length and how fast the workers finish jobs"""
+    queue = DurableJobQueue(str(tmp_path / "queue.sqlite3"), lease_seconds=120.0)
+    for number in range(3):
+        queue.enqueue(f"job-{number}", {})
+
+    # Nothing has finished yet: two workers are assumed to finish a job per lease period
+    assert queue.retry_after(max_queued=3, workers=2) == 60
+
+    for number in range(3, 13):
+        queue.enqueue(f"done-{number}", {})
+        job = queue.lease("worker-1")
+        queue.complete(job["job_id"], "worker-1")
+    # Ten jobs finished within the ten-minute window and three are still waiting
+    assert queue.count() == 3
+    assert queue.retry_after(max_queued=3, workers=2, window_seconds=600.0) == 60
+    assert queue.retry_after(max_queued=2, workers=2, window_seconds=600.0) == 120
+
+
+def test_enqueue_rejects_jobs_beyond_capacity(tmp_path):
+    """The capacity check and the insert are one step, so the limit holds for every web process"""
+    queue = DurableJobQueue(str(tmp_path / "queue.sqlite3"), lease_seconds=60.0)
+    queue.enqueue("job-a", {}, max_queued=2)
+    queue.enqueue("job-b", {}, max_queued=2)
+
+    with pytest.raises(QueueFullError) as rejected:
+        DurableJobQueue(queue.path, lease_seconds=60.0).enqueue("job-c", {}, max_queued=2, workers=2)
+    assert rejected.value.retry_after == 30
+    assert queue.get_status("job-c") is None
+
+    # Re-enqueuing a waiting job replaces it instead of taking another slot
+    queue.enqueue("job-b", {"retry": True}, max_queued=2)
+    assert queue.count() == 2
+
+
+def test_abandoned_job_is_reported_as_failed(tmp_path):
+    """A job whose workers kept dying is marked failed in its status file and in the checkpoint store"""
+    queue = DurableJobQueue(str(tmp_path / "queue.sqlite3"), lease_seconds=0.05, max_attempts=1)
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    status_file = tmp_path / "job-a_status.json"
+    initial_state = {"metadata": {"job_id": "job-a", "processing_status_file": str(status_file)}}
+    store.save_job("job-a", initial_state, ("general_tools",))
+    queue.enqueue("job-a", {"initial_state": initial_state, "execution_plan": ["general_tools"]})
+
+    assert queue.lease("crashed-worker")["job_id"] == "job-a"
+    time.sleep(0.1)
+
+    with patch("src.worker.get_job_queue", return_value=queue), \
+         patch("src.support_job.get_checkpoint_store", return_value=store):
+        assert not process_next_job("worker-2")
+
+    assert queue.get_status("job-a")["status"] == "error"
+    assert json.loads(status_file.read_text())["status"] == "error"
+    assert store.load_job("job-a")["status"] == "error"
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded job scheduler
+"""
+
+import threading
+
+import pytest
+
+from src.job_scheduler import JobScheduler, QueueFullError
+
+
+def test_jobs_run_with_bounded_concurrency():
+    """Never more than max_workers jobs run at once, and every job completes"""
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+    release = threading.Event()
+
+    def handler(job_number):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        release.wait(1)
+        with lock:
+            running["now"] -= 1
+
+    scheduler = JobScheduler(handler, max_workers=2, max_queue_size=10)
+    for i in range(6):
+        scheduler.submit(f"job-{i}", i)
+    release.set()
+    scheduler.join()
+
+    assert running["peak"] <= 2
+    assert all(scheduler.get_status(f"job-{i}")["status"] == "complete" for i in range(6))
+    assert scheduler.get_stats()["completed"] == 6
+
+
+def test_full_queue_rejects_with_retry_hint_and_reports_positions():
+    """Waiting jobs report their queue position and submissions beyond capacity are rejected"""
+    started = threading.Event()
+    release = threading.Event()
+
+    def handler(job_number):
+        started.set()
+        release.wait(1)
+        if job_number == 2:
+            raise RuntimeError("LLM unavailable")
+
+    scheduler = JobScheduler(handler, max_workers=1, max_queue_size=2)
+    scheduler.submit("running", 0)
+    started.wait(1)
+    scheduler.submit("first", 1)
+    scheduler.submit("second", 2)
+
+    assert scheduler.get_status("running")["status"] == "running"
+    assert scheduler.get_queue_position("first") == 1
+    assert scheduler.get_queue_position("second") == 2
+    assert scheduler.is_full()
+
+    with pytest.raises(QueueFullError) as excinfo:
+        scheduler.submit("rejected", 3)
+    assert excinfo.value.retry_after >= 1
+
+    release.set()
+    scheduler.join()
+    assert scheduler.get_status("first")["status"] == "complete"
+    assert scheduler.get_status("second")["status"] == "error"
+    assert scheduler.get_status("rejected") is None
+    assert scheduler.get_stats()["rejected"] == 1
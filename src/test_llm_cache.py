@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for the on-disk LLM response cache
+"""
+
+import os
+import time
+
+from langchain_core.messages import AIMessage
+
+from src.utils.llm_cache import LLMResponseCache
+from src.utils.llm_utils import invoke_llm
+
+
+class FakeLLM:
+    """Minimal stand-in for ChatOpenAI that counts invocations"""
+
+    def __init__(self, model_name: str = "fake-model", temperature: float = 0.7):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_tokens = 100
+        self.openai_api_base = None
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return AIMessage(content=f"response {self.calls} to {prompt}")
+
+
+def test_invoke_llm_serves_repeated_prompts_from_cache(tmp_path):
+    """The second identical request is a cache hit and never reaches the LLM"""
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"))
+    llm = FakeLLM()
+
+    first = invoke_llm(llm, "simplify this", node="syntax_simplifier", cache=cache)
+    second = invoke_llm(llm, "simplify this", node="syntax_simplifier", cache=cache)
+
+    assert llm.calls == 1
+    assert first.content == second.content
+    assert second.response_metadata.get("cache_hit") is True
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["by_node"]["syntax_simplifier"]["stores"] == 1
+
+
+def test_cache_key_depends_on_model_parameters(tmp_path):
+    """Changing the model parameters produces a different cache entry"""
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"))
+
+    invoke_llm(FakeLLM(temperature=0.7), "same prompt", node="content_generator", cache=cache)
+    colder_llm = FakeLLM(temperature=0.0)
+    invoke_llm(colder_llm, "same prompt", node="content_generator", cache=cache)
+
+    assert colder_llm.calls == 1
+    assert cache.get_stats()["entries"] == 2
+
+
+def test_disabled_node_bypasses_cache(tmp_path):
+    """Nodes listed as disabled always call the LLM"""
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"), disabled_nodes=["analyze_dashboard_data"])
+    llm = FakeLLM()
+
+    invoke_llm(llm, "questionnaire", node="analyze_dashboard_data", cache=cache)
+    invoke_llm(llm, "questionnaire", node="analyze_dashboard_data", cache=cache)
+
+    assert llm.calls == 2
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_node_ttl_expires_entries(tmp_path):
+    """Entries older than the node's TTL are treated as misses"""
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"), node_ttls={"micro_content_divider": 0.05})
+    cache.put("key", "micro_content_divider", "units")
+
+    assert cache.get("key", "micro_content_divider") == "units"
+    time.sleep(0.1)
+    assert cache.get("key", "micro_content_divider") is None
+    assert cache.get_stats()["by_node"]["micro_content_divider"]["expired"] == 1
+
+
+def test_lru_eviction_keeps_cache_within_size_budget(tmp_path):
+    """The least recently used entry is evicted once the size budget is exceeded"""
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=25)
+    cache.put("a", "node", "x" * 10)
+    time.sleep(0.01)
+    cache.put("b", "node", "y" * 10)
+    time.sleep(0.01)
+    cache.get("a", "node")  # "a" is now more recently used than "b"
+    time.sleep(0.01)
+    cache.put("c", "node", "z" * 10)
+
+    assert cache.get("a", "node") is not None
+    assert cache.get("b", "node") is None
+    assert cache.get("c", "node") is not None
+    assert cache.get_stats()["bytes"] <= 25
+
+
+def test_cache_persists_across_instances(tmp_path):
+    """A new cache instance opened on the same file sees earlier entries"""
+    path = str(tmp_path / "cache.sqlite3")
+    LLMResponseCache(path).put("key", "node", "value")
+
+    reopened = LLMResponseCache(path)
+    assert os.path.exists(path)
+    assert reopened.get("key", "node") == "value"
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared LLM client registry
+"""
+
+import asyncio
+import threading
+
+from src.config import SystemConfig
+from src.utils.llm_utils import get_llm, get_llm_registry_stats, reset_llm_registry
+
+
+def make_test_config() -> SystemConfig:
+    """Create a configuration that never needs a real API key"""
+    config = SystemConfig()
+    config.update("llm.api_key", "test-key")
+    config.update("llm.base_url", "http://localhost:9/v1")
+    return config
+
+
+def test_get_llm_reuses_client_for_same_parameters():
+    """Repeated calls with the same parameters share one client"""
+    reset_llm_registry()
+    config = make_test_config()
+
+    first = get_llm(config)
+    second = get_llm(config)
+
+    assert first is second
+    stats = get_llm_registry_stats()
+    assert stats["created"] == 1
+    assert stats["reused"] == 1
+    assert stats["clients"] == 1
+
+
+def test_get_llm_separates_clients_by_parameters():
+    """Different temperatures or token limits get their own client"""
+    reset_llm_registry()
+    config = make_test_config()
+
+    default_llm = get_llm(config)
+    warmer_llm = get_llm(config, temperature=0.9)
+    unbounded_llm = get_llm(config, max_tokens=None)
+
+    assert default_llm is not warmer_llm
+    assert default_llm is not unbounded_llm
+    assert get_llm_registry_stats()["clients"] == 3
+
+
+def test_get_llm_separates_clients_by_api_key():
+    """A changed API key never reuses a client created with the old key"""
+    reset_llm_registry()
+    config = make_test_config()
+    first = get_llm(config)
+
+    config.update("llm.api_key", "rotated-key")
+    second = get_llm(config)
+
+    assert first is not second
+    assert second.openai_api_key.get_secret_value() == "rotated-key"
+
+
+def test_reset_closes_sync_and_async_http_clients():
+    """Resetting the registry closes both connection pools of every client"""
+    reset_llm_registry()
+    llm = get_llm(make_test_config())
+
+    reset_llm_registry()
+
+    assert llm.http_client.is_closed
+    assert llm.http_async_client.is_closed
+    assert get_llm_registry_stats()["clients"] == 0
+
+
+def test_reset_inside_event_loop_finishes_async_close():
+    """Called from a running event loop, the async close is scheduled on it and still completes"""
+    reset_llm_registry()
+    llm = get_llm(make_test_config())
+
+    async def reset_and_yield():
+        reset_llm_registry()
+        await asyncio.sleep(0.01)
+
+    asyncio.run(reset_and_yield())
+    assert llm.http_async_client.is_closed
+
+
+def test_get_llm_is_thread_safe():
+    """Concurrent callers all receive the same shared client"""
+    reset_llm_registry()
+    config = make_test_config()
+    results = []
+
+    def worker():
+        results.append(get_llm(config))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(llm) for llm in results}) == 1
+    stats = get_llm_registry_stats()
+    assert stats["created"] == 1
+    assert stats["reused"] == 15
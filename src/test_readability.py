@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the readability metrics and the readability gate of syntax simplification
+"""
+
+from src.config import SystemConfig
+from src.dyslexia_support import merge_simplified_paragraphs, paragraph_replacements
+from src.utils.readability import analyze_readability, detect_language, paragraph_grades, target_grade
+
+SIMPLE = "The cat sat on the mat. It was a warm day. The cat was happy."
+COMPLEX = ("Photosynthesis constitutes the fundamental biochemical mechanism whereby autotrophic organisms "
+           "synthesize carbohydrates utilizing electromagnetic radiation.")
+
+
+def simplified_to(text):
+    """Response that simplifies the material to the given text and defines photosynthesis"""
+    return lambda prompt: {
+        "sentences": [{"id": 1, "text": text}],
+        "vocabulary": [{"term": "Photosynthesis", "definition": "How plants make food"}]
+    }
+
+
+def test_english_metrics():
+    """Short common sentences score low; long polysyllabic ones score high"""
+    simple, complex_ = analyze_readability(SIMPLE), analyze_readability(COMPLEX)
+    assert simple["language"] == "en" and simple["sentence_count"] == 3
+    assert simple["grade_level"] < 3 < 15 < complex_["grade_level"]
+    assert simple["flesch_reading_ease"] > 90 > complex_["flesch_reading_ease"]
+    assert len(simple["sentence_grades"]) == 3
+
+
+def test_chinese_metrics():
+    """Long sentences with uncommon characters score higher than short everyday ones"""
+    simple = analyze_readability("我喜欢吃苹果。今天天气很好。")
+    complex_ = analyze_readability("全球气候变化是一个由多种复杂且相互关联的因素驱动的现象，这些因素包括大气中温室气体浓度的增加。")
+    assert simple["language"] == "zh"
+    assert simple["grade_level"] < 4 < 12 < complex_["grade_level"]
+
+
+
+def test_detect_language():
+    assert detect_language("Photosynthesis happens in leaves.") == "en"
+    assert detect_language("光合作用发生在叶子中。") == "zh"
+
+def test_paragraph_grades_match_whole_text_grades():
+    grades = paragraph_grades([SIMPLE, COMPLEX])
+    assert abs(grades[0] - analyze_readability(SIMPLE)["grade_level"]) < 1e-9
+    assert abs(grades[1] - analyze_readability(COMPLEX)["grade_level"]) < 1e-9
+
+
+def test_target_grade_drops_with_severity():
+    config = SystemConfig()
+    config.config["readability"] = {"max_target_grade": 9, "grade_step_per_severity": 1, "min_target_grade": 6}
+    assert target_grade({"analysis": {"severity_level": 1}}, config) == 9
+    assert target_grade({"analysis": {"severity_level": 2}}, config) == 8
+    assert target_grade({"analysis": {"severity_level": 5}}, config) == 6
+    assert target_grade({}, config) == 7
+
+
+def test_simple_material_skips_llm(run_simplifier, simplifier_llm):
+    llm = simplifier_llm(simplified_to("unused"))
+    result = run_simplifier(SIMPLE, llm)
+    assert llm.prompts == []
+    assert result["content"] == SIMPLE
+    assert result["readability"]["decision"] == "skip"
+
+
+def test_only_complex_paragraphs_are_simplified(run_simplifier, simplifier_llm):
+    """The prompt contains only the complex paragraph and its simplification is put back in place"""
+    llm = simplifier_llm(simplified_to("Plants use light to make sugar."))
+    result = run_simplifier(f"{SIMPLE}\n\n{COMPLEX}\n\n{SIMPLE}", llm)
+
+    assert len(llm.prompts) == 1
+    assert COMPLEX in llm.prompts[0] and SIMPLE not in llm.prompts[0]
+    assert result["content"] == f"{SIMPLE}\n\nPlants use light to make sugar.\n\n{SIMPLE}"
+    assert result["vocabulary"] == {"Photosynthesis": "How plants make food"}
+    assert result["readability"]["decision"] == "partial"
+    assert result["readability"]["simplified_paragraphs"] == [1]
+
+
+def test_paragraph_count_mismatch_is_not_guessed():
+    paragraphs = ["a", "B1", "c", "B2"]
+    assert merge_simplified_paragraphs(
+        paragraphs, paragraph_replacements([1, 3], ["b1", "b2"])) == ["a", "b1", "c", "b2"]
+    assert paragraph_replacements([1, 3], ["b1 and b2"]) is None
+    assert paragraph_replacements([1], ["b1", "more b1"]) == {1: "b1\n\nmore b1"}
+    assert merge_simplified_paragraphs(
+        paragraphs, paragraph_replacements([1, 3], ["b1", ""])) == ["a", "b1", "c", "B2"]
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for local pre-segmentation and parallel micro-unit enrichment
+"""
+
+import json
+import threading
+import time
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+from src.adhd_support import micro_content_divider
+from src.benchmarks.rule_based_benchmark import build_document
+from src.utils.segmenter import MaterialSegmenter, is_heading
+
+MATERIAL = "\n\n".join([
+    "# Linked Lists",
+    " ".join(["A linked list stores nodes that point to the next node."] * 20),
+    " ".join(["Inserting a node only changes two pointers."] * 30),
+    "## Arrays",
+    " ".join(["An array stores its elements next to each other in memory."] * 10)
+])
+
+
+class EnrichingLLM:
+    """Fake LLM that enriches a unit after a short delay and records concurrency"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self.lock:
+            self.prompts.append(str(prompt))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return AIMessage(content=json.dumps({"learning_objective": "Understand the unit", "key_points": ["nodes", "pointers"],
+                                             "check_questions": ["What is a node?"]}))
+
+
+def test_headings_are_detected():
+    assert is_heading("# Linked Lists")
+    assert is_heading("Chapter 3 Trees")
+    assert is_heading("第三章 树")
+    assert is_heading("1.2 Binary search")
+    assert not is_heading("1. Insert the node first.")
+    assert not is_heading("A linked list stores nodes.")
+
+
+def test_segments_follow_headings_and_reading_time():
+    """Sections never share a segment and long sections are cut at paragraph boundaries"""
+    segments = MaterialSegmenter(words_per_minute=150).segment(MATERIAL, attention_span_minutes=2)
+
+    assert [segment["title"] for segment in segments] == ["Linked Lists", "Linked Lists", "Arrays"]
+    assert segments[0]["content"].startswith("A linked list") and "Inserting" not in segments[0]["content"]
+    assert segments[1]["content"].startswith("Inserting")
+    assert [segment["unit_number"] for segment in segments] == [1, 2, 3]
+    assert all(segment["estimated_time_minutes"] <= 2 for segment in segments)
+
+
+def test_long_paragraphs_are_cut_at_sentences():
+    paragraph = " ".join(f"Sentence {i} has five words." for i in range(100))
+    segments = MaterialSegmenter(words_per_minute=100).segment(paragraph, attention_span_minutes=1)
+    assert len(segments) == 5
+    assert all(segment["content"].endswith("words.") for segment in segments)
+    assert " ".join(segment["content"] for segment in segments) == paragraph
+
+
+
+def test_cut_paragraphs_keep_their_original_text():
+    """Decimals and abbreviations are not cut, and segments are slices of the original paragraph"""
+    paragraph = "  ".join(f"Dr. Lee measured 3.14 units in trial {i}, e.g. with sensors." for i in range(60))
+    segments = MaterialSegmenter(words_per_minute=100).segment(paragraph, attention_span_minutes=1)
+    assert len(segments) > 1
+    assert all(segment["content"] in paragraph for segment in segments)
+    assert all(segment["content"].startswith("Dr. Lee") and segment["content"].endswith("sensors.")
+               for segment in segments)
+    assert "  ".join(segment["content"] for segment in segments) == paragraph
+
+def test_book_length_material_is_segmented_quickly():
+    document = build_document(2.0, seed=1)
+    start = time.perf_counter()
+    segments = MaterialSegmenter().segment(document, attention_span_minutes=10)
+    assert time.perf_counter() - start < 2.0
+    assert len(segments) > 100
+    assert max(segment["estimated_time_minutes"] for segment in segments) <= 15
+
+
+def test_divider_enriches_local_segments_in_parallel():
+    """Each local segment gets its own concurrent enrichment request and keeps its original text"""
+    llm = EnrichingLLM()
+    state = {
+        "user_profile": {"analysis": {"difficulty_type": "ADHD"}, "questionnaire_answers": {"attention_span_minutes": 1}},
+        "learning_materials": {"current_content": MATERIAL}
+    }
+    with patch("src.adhd_support.get_llm", return_value=llm), \
+         patch("src.utils.structured_output.invoke_llm", side_effect=lambda llm, prompt, node: llm.invoke(prompt)):
+        start = time.perf_counter()
+        units = micro_content_divider(state)["processed_content"]["micro_units"]
+        elapsed = time.perf_counter() - start
+
+    assert len(units) == len(llm.prompts) >= 3
+    assert llm.max_active > 1
+    assert elapsed < 0.2 * len(units)
+    assert units[0]["content"] in MATERIAL
+    assert units[0]["learning_objective"] == "Understand the unit"
+    assert units[0]["key_points"] == ["nodes", "pointers"]
+    assert units[0]["check_questions"] == ["What is a node?"]
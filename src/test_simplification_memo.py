@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the sentence-level simplification memo
+"""
+
+import re
+import time
+
+from src.utils.glossary_store import GlossaryStore
+from src.utils.simplification_memo import SimplificationMemo
+
+SHARED = ("Photosynthesis constitutes the fundamental biochemical mechanism whereby autotrophic organisms "
+          "synthesize carbohydrates utilizing electromagnetic radiation.")
+FIRST_ONLY = "Chlorophyll molecules absorb electromagnetic radiation predominantly within the visible spectrum."
+SECOND_ONLY = "Atmospheric carbon dioxide is subsequently incorporated into organic compounds through the Calvin cycle."
+
+
+def shorten_sentences(prompt):
+    """Response that answers every numbered sentence with its first two words upper-cased"""
+    lines = re.findall(r"^\[(\d+)\] (\S+ \S+)", prompt, re.MULTILINE)
+    return {
+        "sentences": [{"id": int(number), "text": f"{words.upper()}."} for number, words in lines],
+        "vocabulary": [{"term": "Photosynthesis", "definition": "How plants make food"}]
+    }
+
+
+def keep_sentences(prompt):
+    """Response that returns every numbered sentence unchanged"""
+    lines = re.findall(r"^\[(\d+)\] (.*)$", prompt, re.MULTILINE)
+    return {"sentences": [{"id": int(number), "text": text} for number, text in lines], "vocabulary": []}
+
+
+def test_memo_persists_across_restarts(tmp_path):
+    path = str(tmp_path / "memo.sqlite3")
+    SimplificationMemo(path).put_many([("The  Cell divides.", "The cell splits.")], "en", "Dyslexia:7")
+
+    memo = SimplificationMemo(path)
+    assert memo.get_many(["the cell divides.", "Unknown sentence."], "en", "Dyslexia:7") == {0: "The cell splits."}
+    assert memo.get_many(["The cell divides."], "en", "Dyslexia:5") == {}
+    assert memo.get_stats()["hits"] == 1 and memo.get_stats()["misses"] == 2
+
+
+def test_least_recently_used_sentences_are_evicted(tmp_path):
+    memo = SimplificationMemo(str(tmp_path / "memo.sqlite3"), max_entries=2)
+    memo.put_many([("One.", "1."), ("Two.", "2.")], "en", "p")
+    time.sleep(0.01)
+    memo.get_many(["One."], "en", "p")
+    time.sleep(0.01)
+    memo.put_many([("Three.", "3.")], "en", "p")
+
+    assert memo.size() == 2
+    assert memo.get_many(["One.", "Two.", "Three."], "en", "p") == {0: "1.", 2: "3."}
+    assert memo.get_stats()["evictions"] == 1
+
+
+def test_only_unseen_sentences_are_sent_in_one_request(tmp_path, run_simplifier, simplifier_llm):
+    """A second material reuses the shared sentence and sends only its new sentence"""
+    memo = SimplificationMemo(str(tmp_path / "memo.sqlite3"))
+    glossary = GlossaryStore(str(tmp_path / "glossary.sqlite3"), enabled=False)
+
+    first_llm = simplifier_llm(shorten_sentences)
+    first = run_simplifier(f"{SHARED} {FIRST_ONLY}", first_llm, glossary=glossary, memo=memo)
+    assert len(first_llm.prompts) == 1
+    assert first["content"] == "PHOTOSYNTHESIS CONSTITUTES. CHLOROPHYLL MOLECULES."
+    assert first["vocabulary"] == {"Photosynthesis": "How plants make food"}
+
+    second_llm = simplifier_llm(shorten_sentences)
+    second = run_simplifier(f"{SECOND_ONLY}\n\n{SHARED}", second_llm, glossary=glossary, memo=memo)
+    assert len(second_llm.prompts) == 1
+    assert SECOND_ONLY in second_llm.prompts[0] and SHARED not in second_llm.prompts[0]
+    assert second["content"] == "ATMOSPHERIC CARBON.\n\nPHOTOSYNTHESIS CONSTITUTES."
+    assert second["memo_hits"] == 1
+
+    other_profile_llm = simplifier_llm(shorten_sentences)
+    run_simplifier(SHARED, other_profile_llm, severity_level=5, glossary=glossary, memo=memo)
+    assert len(other_profile_llm.prompts) == 1
+
+
+def test_decimals_and_abbreviations_survive_sentence_simplification(tmp_path, run_simplifier, simplifier_llm):
+    """Sentences are only cut at real sentence ends and reassembled with their original separators"""
+    content = (f"Approximately 3.14 percent of participants, e.g. postgraduate researchers, were interviewed "
+               f"by Dr. Hernandez regarding methodological considerations.  {SHARED}\n{FIRST_ONLY}")
+    llm = simplifier_llm(keep_sentences)
+    result = run_simplifier(content, llm, glossary=GlossaryStore(str(tmp_path / "glossary.sqlite3"), enabled=False))
+
+    assert result["content"] == content
+    numbered = re.findall(r"^\[(\d+)\] (.*)$", llm.prompts[0], re.MULTILINE)
+    assert [text for _, text in numbered] == [content.split("  ")[0], SHARED, FIRST_ONLY]
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for per-unit source retrieval
+"""
+
+from src.utils.source_retriever import SourceIndex, estimate_tokens, split_passages, tokenize
+
+TOPICS = {
+    "photosynthesis": "Photosynthesis converts light energy into chemical energy inside chloroplasts.",
+    "mitochondria": "Mitochondria release energy from glucose through cellular respiration.",
+    "osmosis": "Osmosis moves water across a membrane from low to high solute concentration.",
+    "enzymes": "Enzymes are proteins that speed up reactions by lowering activation energy.",
+}
+
+
+def build_material(repeat: int = 20) -> str:
+    paragraphs = []
+    for topic, sentence in TOPICS.items():
+        paragraphs.append(" ".join([sentence] * repeat))
+    return "\n\n".join(paragraphs)
+
+
+def test_retrieve_returns_relevant_passage_within_budget():
+    """A unit about osmosis gets the osmosis passage and stays under budget"""
+    material = build_material()
+    index = SourceIndex(material)
+
+    source_slice = index.retrieve("What is osmosis and how does water cross a membrane?",
+                                  max_tokens=400, context_window=0)
+
+    assert "Osmosis" in source_slice
+    assert "Photosynthesis" not in source_slice
+    assert estimate_tokens(source_slice) <= 400
+    assert estimate_tokens(source_slice) < index.total_tokens
+
+
+def test_context_window_adds_neighbouring_passages_in_order():
+    """Neighbouring passages are included and kept in document order"""
+    index = SourceIndex(build_material(repeat=5))
+
+    source_slice = index.retrieve("osmosis membrane water", max_tokens=500, context_window=1)
+
+    assert source_slice.index("Mitochondria") < source_slice.index("Osmosis") < source_slice.index("Enzymes")
+
+
+def test_short_material_is_returned_whole():
+    """Materials that fit the budget are sent unchanged"""
+    material = "Short material.\n\nSecond paragraph."
+    assert SourceIndex(material).retrieve("anything", max_tokens=1500) == material
+
+
+def test_tokenize_handles_chinese_bigrams():
+    """Chinese text is indexed as character bigrams"""
+    assert tokenize("链表结构") == ["链表", "表结", "结构"]
+
+
+def test_long_paragraphs_break_only_at_sentence_ends():
+    sentence = "Dr. Smith measured 3.14 metres of the plot, e.g. near the barn."
+    passages = split_passages(" ".join([sentence] * 8), max_passage_chars=150)
+    assert passages == [f"{sentence} {sentence}"] * 4
+    assert split_passages("短段落。第二句！" * 4, max_passage_chars=16) == ["短段落。第二句！短段落。第二句！"] * 2
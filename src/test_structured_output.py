@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for schema-validated structured LLM output
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from src.adhd_support import MicroUnitList, divide_with_llm
+from src.benchmarks.structured_output_benchmark import FORMATS, is_correct, structured_parse_micro_units
+from src.dyslexia_support import SimplifiedParagraphs
+from src.utils.structured_output import (
+    StructuredOutputError, extract_json, get_structured_output_stats, invoke_structured, parse_structured,
+    repair_json, reset_structured_output_stats
+)
+
+UNIT = {"content": "Nodes point to the next node.", "learning_objective": "Know nodes", "key_points": ["nodes"],
+        "estimated_time_minutes": 3, "check_questions": ["What is a node?"]}
+
+
+class ScriptedLLM:
+    """Fake LLM that answers with the given responses in turn"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(str(prompt))
+        return AIMessage(content=self.responses[min(len(self.prompts), len(self.responses)) - 1])
+
+
+def invoke(llm, model, node="test_node"):
+    with patch("src.utils.structured_output.invoke_llm", side_effect=lambda llm, prompt, node: llm.invoke(prompt)):
+        return invoke_structured(llm, "prompt", model, node=node)
+
+
+def test_extract_json_drops_fences_and_prose():
+    assert extract_json('Here you go:\n```json\n{"a": [1, 2]}\n```\nDone.') == '{"a": [1, 2]}'
+    assert extract_json('Result: {"a": "}"} trailing {note}') == '{"a": "}"}'
+    assert extract_json('{"a": [1, {"b": 2') == '{"a": [1, {"b": 2'
+
+
+def test_repair_json():
+    assert json.loads(repair_json('{"a": [1, 2,], “b”: "x",}')) == {"a": [1, 2], "b": "x"}
+    assert json.loads(repair_json('{"a": "line one\nline two"}')) == {"a": "line one\nline two"}
+    # A truncated string and its key are dropped rather than kept as a cut-off value
+    assert json.loads(repair_json('{"units": [{"a": 1}, {"b": 2, "c": "unfinis')) == {"units": [{"a": 1}, {"b": 2}]}
+
+
+def test_parse_structured_validates_and_wraps_bare_lists():
+    assert parse_structured(json.dumps([UNIT]), MicroUnitList).units[0].key_points == ["nodes"]
+    assert parse_structured('{"paragraphs": ["a", "b"]}', SimplifiedParagraphs).vocabulary == []
+    with pytest.raises(StructuredOutputError):
+        parse_structured(json.dumps({"units": [{"content": "no objective"}]}), MicroUnitList)
+    with pytest.raises(StructuredOutputError):
+        parse_structured("Unit 1: Nodes\nLearning Objective: Know nodes", MicroUnitList)
+
+
+def test_invalid_output_is_sent_back_for_one_repair():
+    reset_structured_output_stats()
+    llm = ScriptedLLM("Unit 1: Nodes", json.dumps({"units": [UNIT]}))
+    assert invoke(llm, MicroUnitList).units[0].learning_objective == "Know nodes"
+    assert len(llm.prompts) == 2
+    assert "Unit 1: Nodes" in llm.prompts[1] and '"units"' in llm.prompts[1]
+
+    with pytest.raises(StructuredOutputError):
+        invoke(ScriptedLLM("still not JSON"), MicroUnitList)
+    stats = get_structured_output_stats()["test_node"]
+    assert stats["repaired"] == 1 and stats["failed"] == 1
+    assert stats["failure_rate"] == 0.5
+
+
+def test_divider_falls_back_to_local_segments():
+    """Units are never built from output that fails validation"""
+    llm = ScriptedLLM("I cannot split this material.")
+    with patch("src.utils.structured_output.invoke_llm", side_effect=lambda llm, prompt, node: llm.invoke(prompt)):
+        units = divide_with_llm(llm, "First paragraph.\n\nSecond paragraph.", attention_span_minutes=5)
+    assert len(llm.prompts) == 2
+    assert [unit["content"] for unit in units] == ["First paragraph.\n\nSecond paragraph."]
+
+
+def test_overlong_unit_is_clamped_instead_of_failing_the_list():
+    """One unit estimated above the limit keeps the LLM division instead of falling back to local segmentation"""
+    units = [UNIT, {**UNIT, "content": "Lists chain nodes together.", "estimated_time_minutes": 90}]
+    llm = ScriptedLLM(json.dumps({"units": units}))
+    with patch("src.utils.structured_output.invoke_llm", side_effect=lambda llm, prompt, node: llm.invoke(prompt)):
+        result = divide_with_llm(llm, "Nodes point to the next node.\n\nLists chain nodes together.",
+                                 attention_span_minutes=5)
+    assert len(llm.prompts) == 1
+    assert [unit["estimated_time_minutes"] for unit in result] == [3, 60]
+
+
+def test_recorded_formats_are_parsed_or_rejected():
+    """Structured parsing never returns silently degraded units"""
+    for render in FORMATS.values():
+        try:
+            assert is_correct(structured_parse_micro_units(render()))
+        except StructuredOutputError:
+            pass
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for single-pass multi-pattern highlighting
+"""
+
+from src.utils.pattern_matcher import PatternMatcher
+from src.utils.text_highlighter import (
+    TextHighlighter, apply_highlighting_to_content, find_highlight_spans, span_highlights
+)
+
+
+def test_matcher_prefers_leftmost_longest_then_priority():
+    """Overlapping candidates resolve to the leftmost, then longest, then highest-priority match"""
+    matcher = PatternMatcher()
+    matcher.add("neural", 0, "short")
+    matcher.add("neural network", 1, "long")
+    matcher.add("network layer", 0, "overlapping")
+    matcher.add("layer", 2, "low")
+    matcher.add("layer", 1, "high")
+
+    matches = matcher.find_non_overlapping("a neural network layer")
+
+    assert [(start, end, payload) for start, end, payload in matches] == [(2, 16, "long"), (17, 22, "high")]
+
+
+def test_matcher_word_boundaries_apply_only_to_ascii_word_edges():
+    """ASCII terms do not match inside longer words, CJK terms match inside CJK text"""
+    matcher = PatternMatcher()
+    matcher.add("net")
+    matcher.add("神经网络")
+
+    text = "network net 深度神经网络模型"
+    assert [(start, end) for start, end, _ in matcher.find_non_overlapping(text)] == [(8, 11), (14, 18)]
+
+
+def test_all_highlight_types_render_in_one_pass_without_nesting():
+    """Text inside existing markup and inside earlier highlights is never matched again"""
+    highlighter = TextHighlighter()
+    content = '<a href="neuron.html">Neuron</a> A neuron computes. Neural networks learn.'
+    elements = {
+        "primary": [{"text": "Neural networks"}],
+        "key_concepts": [{"text": "networks"}],
+        "definitions": [{"text": "neuron", "metadata": {"definition": "A <unit>"}}]
+    }
+
+    highlighted = apply_highlighting_to_content(content, highlighter, elements)
+
+    assert highlighted == (
+        '<a href="neuron.html">Neuron</a> A '
+        '<span class="highlight-definition" data-tooltip="A &lt;unit&gt;">neuron</span> computes. '
+        '<mark class="highlight-yellow">Neural networks</mark> learn.'
+    )
+    assert highlighter.highlight_text("no elements here", "primary", []) == "no elements here"
+
+
+def test_spans_are_computed_once_and_rendered_per_style():
+    """The same stored spans render differently for each highlight style preset"""
+    content = "Gradient descent updates each weight."
+    spans = find_highlight_spans(content, {
+        "primary": [{"text": "Gradient descent"}],
+        "secondary": [{"text": "weight"}]
+    })
+    assert spans == [[0, 16, "primary", {}], [30, 36, "secondary", {}]]
+
+    visual = TextHighlighter({"highlight_style": TextHighlighter.get_style_preset("visual")})
+    kinesthetic = TextHighlighter({"highlight_style": TextHighlighter.get_style_preset("kinesthetic")})
+
+    assert visual.render_spans(content, spans) == (
+        '<mark class="highlight-yellow">Gradient descent</mark> updates each '
+        '<mark class="highlight-blue">weight</mark>.'
+    )
+    assert kinesthetic.render_spans(content, spans) == (
+        '<strong class="highlight-bold">Gradient descent</strong> updates each '
+        '<span class="highlight-underline">weight</span>.'
+    )
+    # Stale or overlapping spans are skipped instead of corrupting the text
+    assert visual.render_spans("short", [[0, 3, "primary", {}], [2, 4, "primary", {}], [3, 99, "primary", {}]]) == (
+        '<mark class="highlight-yellow">sho</mark>rt'
+    )
+
+
+def test_span_highlights_are_style_neutral():
+    """Highlights carry only the phrase, type and tooltip; the CSS class comes from the chosen preset"""
+    spans = [[9, 14, "primary", {}], [2, 8, "definitions", {"definition": "A cell"}], [4, 10, "primary", {}]]
+    assert span_highlights("A neuron fires", spans) == [
+        {"text": "neuron", "type": "definitions", "definition": "A cell"},
+        {"text": "fires", "type": "primary"}
+    ]
+
+    classes = TextHighlighter.get_preset_css_classes()
+    assert classes["visual"]["secondary"] == "highlight-blue"
+    assert classes["kinesthetic"]["primary"] == "highlight-bold"
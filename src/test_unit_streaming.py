@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming micro-unit division and early publishing of finished units
+"""
+
+import json
+import threading
+import time
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+import pytest
+
+from src import adhd_support, content_generator as content_generator_module
+from src.adhd_support import divide_with_llm, enrich_micro_units, micro_content_divider
+from src.architecture import adhd_support_processor
+from src.content_generator import _early_generations, content_generator, take_unit_generations
+from src.utils.checkpoint_store import CheckpointStore
+from src.utils.structured_output import JsonArrayStreamParser
+
+UNITS = [
+    {"title": f"Part {number}", "content": f"Content of part {number}.", "learning_objective": f"Know part {number}",
+     "key_points": [f"point {number}"], "estimated_time_minutes": 3, "check_questions": [f"What is part {number}?"]}
+    for number in (1, 2, 3)
+]
+RESPONSE = json.dumps({"units": UNITS})
+
+
+class StreamingLLM:
+    """Fake LLM that streams a response in small chunks and counts what it has sent"""
+
+    def __init__(self, response: str, chunk_size: int = 16):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.sent = 0
+        self.prompts = []
+
+    def stream(self, prompt):
+        self.prompts.append(str(prompt))
+        for start in range(0, len(self.response), self.chunk_size):
+            self.sent = start + self.chunk_size
+            yield AIMessageChunk(content=self.response[start:start + self.chunk_size])
+
+    def invoke(self, prompt):
+        self.prompts.append(str(prompt))
+        return AIMessage(content=f"detailed: {len(self.prompts)}")
+
+
+class CountingLLM:
+    """Fake LLM that enriches units or writes details after a delay and records how many calls overlap"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if "JSON Schema" in str(prompt):
+                return AIMessage(content=json.dumps({"learning_objective": "objective", "key_points": ["point"],
+                                                     "check_questions": []}))
+            return AIMessage(content="detailed")
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def fake_stream(llm, prompt, node):
+    return (chunk.content for chunk in llm.stream(prompt))
+
+
+def test_stream_parser_returns_elements_as_they_close():
+    parser = JsonArrayStreamParser()
+    completed = []
+    for start in range(0, len(RESPONSE), 7):
+        for index, element in parser.feed(RESPONSE[start:start + 7]):
+            completed.append((index, json.loads(element), start))
+    assert [unit for _, unit, _ in completed] == UNITS
+    assert [index for index, _, _ in completed] == [0, 1, 2]
+    # The first unit is available long before the response ends
+    assert completed[0][2] < len(RESPONSE) / 2
+    assert parser.text == RESPONSE
+
+
+def test_stream_parser_handles_bare_lists_and_brackets_in_strings():
+    parser = JsonArrayStreamParser()
+    text = 'Sure: [{"content": "a [b] {c}"}, {"content": "d"}] and [{"ignored": 1}]'
+    assert [json.loads(element) for _, element in parser.feed(text)] == [{"content": "a [b] {c}"}, {"content": "d"}]
+
+
+def test_divider_publishes_units_before_the_stream_ends():
+    llm = StreamingLLM(RESPONSE)
+    published = []
+    with patch("src.adhd_support.stream_llm", side_effect=fake_stream), \
+         patch.dict(adhd_support.config.config["micro_units"], {"streaming": True}):
+        units = divide_with_llm(llm, "material", attention_span_minutes=5,
+                                on_unit=lambda unit: published.append((unit, llm.sent)))
+    assert [unit["unit_number"] for unit, _ in published] == [1, 2, 3]
+    assert published[0][1] < len(RESPONSE) / 2
+    assert [unit for unit, _ in published] == units
+    # The streamed response was valid, so no second request was made
+    assert len(llm.prompts) == 1
+
+
+def test_published_units_are_stored_per_job(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    for number in (2, 1, 3):
+        store.save_unit("job-1", "micro_content_divider", {"unit_number": number, "content": f"unit {number}"})
+    store.save_unit("job-1", "micro_content_divider", {"unit_number": 1, "content": "unit 1 final"})
+    assert [unit["content"] for unit in store.load_units("job-1")] == ["unit 1 final", "unit 2", "unit 3"]
+
+    store.clear_units("job-1", "micro_content_divider", after=2)
+    assert [unit["unit_number"] for unit in store.load_units("job-1")] == [1, 2]
+    assert store.load_units("job-2") == []
+
+    store.save_job("job-1", {}, ("adhd_support",))
+    store.set_status("job-1", "complete")
+    assert store.load_units("job-1") == []
+
+
+def test_enriched_units_are_passed_on_in_completion_order():
+    segments = [{"unit_number": number, "title": None, "content": f"segment {number}", "estimated_time_minutes": 2}
+                for number in (1, 2, 3)]
+    finished = []
+
+    def enrich(llm, prompt, model, node):
+        # The first segment is the slowest to enrich
+        time.sleep(0.3 if "segment 1" in str(prompt) else 0.05)
+        return model(learning_objective="objective", key_points=["point"], check_questions=[])
+
+    with patch("src.adhd_support.invoke_structured", side_effect=enrich):
+        units = enrich_micro_units(None, segments, max_workers=3,
+                                   on_unit=lambda unit: finished.append((unit["unit_number"],
+                                                                         threading.current_thread())))
+    assert [unit["unit_number"] for unit in units] == [1, 2, 3]
+    assert finished[-1][0] == 1
+    assert all(thread is threading.current_thread() for _, thread in finished)
+
+
+def test_units_published_during_division_are_generated_early(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    llm = StreamingLLM(RESPONSE)
+    state = {
+        "user_profile": {"analysis": {"difficulty_type": "ADHD"},
+                         "questionnaire_answers": {"attention_span_minutes": 5}},
+        "learning_materials": {"current_content": "Part one. Part two. Part three."},
+        "metadata": {"job_id": "job-early"},
+        "interaction_history": []
+    }
+    settings = {**adhd_support.config.config["micro_units"], "segmentation": "llm", "streaming": True}
+    with patch("src.adhd_support.get_llm", return_value=llm), \
+         patch("src.adhd_support.get_checkpoint_store", return_value=store), \
+         patch("src.adhd_support.stream_llm", side_effect=fake_stream), \
+         patch("src.content_generator.get_llm", return_value=llm), \
+         patch("src.content_generator.invoke_llm", side_effect=lambda llm, prompt, node: llm.invoke(prompt)), \
+         patch.dict(adhd_support.config.config, {"micro_units": settings}), \
+         patch.dict(content_generator_module.config.config["content_generation"], {"early_start": True}):
+        state = micro_content_divider(state)
+        assert [unit["content"] for unit in store.load_units("job-early")] == [unit["content"] for unit in UNITS]
+        state = content_generator(state)
+
+    assert state["metadata"]["content_generation"]["early_units"] == 3
+    assert len(state["processed_content"]["detailed_units"]) == 3
+    assert all(unit["detailed_content"].startswith("detailed") for unit in state["processed_content"]["detailed_units"])
+    # One streamed division and one generation per unit, none repeated by the content generator
+    assert len(llm.prompts) == 1 + 3
+    assert take_unit_generations("job-early") == {}
+
+
+def make_job_state(job_id, execution_plan=None):
+    paragraphs = [f"Paragraph {number} " + "word " * 150 for number in range(8)]
+    metadata = {"job_id": job_id}
+    if execution_plan is not None:
+        metadata["execution_plan"] = list(execution_plan)
+    return {
+        "user_profile": {"analysis": {"difficulty_type": "ADHD"},
+                         "questionnaire_answers": {"attention_span_minutes": 1}},
+        "learning_materials": {"current_content": "\n\n".join(paragraphs)},
+        "processed_content": {},
+        "metadata": metadata,
+        "interaction_history": []
+    }
+
+
+def run_divider(tmp_path, llm, state, processor=micro_content_divider, max_concurrency=2):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    invoke = lambda llm, prompt, node: llm.invoke(prompt)
+    # Let discarded generations that already started finish while the fakes are still patched in
+    discard = lambda job_id: content_generator_module.discard_unit_generations(job_id, wait=True)
+    with patch("src.architecture.discard_unit_generations", side_effect=discard), \
+         patch("src.adhd_support.get_llm", return_value=llm), \
+         patch("src.adhd_support.get_checkpoint_store", return_value=store), \
+         patch("src.utils.structured_output.invoke_llm", side_effect=invoke), \
+         patch("src.content_generator.get_llm", return_value=llm), \
+         patch("src.content_generator.invoke_llm", side_effect=invoke), \
+         patch.dict(adhd_support.config.config["llm"], {"max_concurrency": max_concurrency}), \
+         patch.dict(adhd_support.config.config["micro_units"], {"segmentation": "local"}), \
+         patch.dict(content_generator_module.config.config["content_generation"], {"early_start": True}):
+        state = processor(state)
+        if processor is micro_content_divider:
+            state = content_generator(state)
+    return state
+
+
+def test_enrichment_and_early_generation_share_the_concurrency_limit(tmp_path):
+    llm = CountingLLM()
+    state = run_divider(tmp_path, llm, make_job_state("job-budget"), max_concurrency=2)
+    assert state["metadata"]["content_generation"]["early_units"] == len(state["processed_content"]["micro_units"]) > 2
+    assert llm.max_active == 2
+
+
+def test_early_generations_are_dropped_without_content_generation(tmp_path):
+    run_divider(tmp_path, CountingLLM(delay=0.01), make_job_state("job-no-content", ("adhd_support",)),
+                processor=adhd_support_processor)
+    assert "job-no-content" not in _early_generations
+
+    failing_state = make_job_state("job-failing", ("adhd_support", "content_generation"))
+    with patch("src.adhd_support.get_elements_for_units", side_effect=RuntimeError("highlighting failed")), \
+         patch.dict(failing_state["user_profile"], {"questionnaire_answers": {
+             "attention_span_minutes": 1, "reading_patterns": {"comprehension_aids": ["highlighting"]}}}), \
+         pytest.raises(RuntimeError):
+        run_divider(tmp_path, CountingLLM(delay=0.01), failing_state, processor=adhd_support_processor)
+    assert "job-failing" not in _early_generations
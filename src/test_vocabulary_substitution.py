@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the local lexicon-driven vocabulary substitution
+"""
+
+import time
+from unittest.mock import patch
+
+from src.dyslexia_support import vocabulary_substitution_engine
+from src.utils.glossary_store import GlossaryStore
+from src.utils.lexicon import Lexicon, estimate_syllables, get_lexicon, substitute_vocabulary
+
+
+TEXT = ("Researchers utilize photosynthesis measurements to demonstrate the approximately linear growth. "
+        "Utilize the data carefully.")
+
+
+def test_lexicon_lookups():
+    """Familiar words and their inflections have ranks; complex words are found by table lookup"""
+    lexicon = Lexicon(["the", "plant", "grow", "study"], {"utilize": "use"})
+    assert list(lexicon.ranks(["the", "plants", "growing", "studies", "chlorophyll"])) == [0, 1, 2, 3, -1]
+    assert list(lexicon.synonyms(["utilize", "plant"])) == ["use", ""]
+    assert list(lexicon.complex_mask(["utilize", "plant", "chlorophyll", "cat"])) == [True, False, True, False]
+    assert list(estimate_syllables(["cat", "table", "photosynthesis", "make"])) == [1, 2, 5, 1]
+
+
+def test_substitution_keeps_case_and_offsets():
+    """Exact forms are replaced with their case kept; words without a synonym are listed"""
+    result = substitute_vocabulary(TEXT, get_lexicon())
+
+    assert result["content"] == ("Researchers use photosynthesis measurements to show the about linear growth. "
+                                 "Use the data carefully.")
+    for start, end, original, _ in result["substitutions"]:
+        assert TEXT[start:end] == original
+    assert "photosynthesis" in result["complex_words"]
+    assert "data" not in result["complex_words"]
+
+
+def test_engine_adds_glossary_explanations(tmp_path):
+    """Complex words without a synonym get their stored glossary definition; Chinese text is left unchanged"""
+    store = GlossaryStore(str(tmp_path / "glossary.sqlite3"))
+    store.add({"photosynthesis": "How plants make food from light"}, "en")
+
+    with patch("src.dyslexia_support.get_glossary_store", return_value=store):
+        support = vocabulary_substitution_engine({"learning_materials": {"current_content": TEXT}})
+        chinese = vocabulary_substitution_engine({"learning_materials": {"current_content": "光合作用发生在叶子中。"}})
+
+    vocabulary_support = support["processed_content"]["vocabulary_support"]
+    assert vocabulary_support["language"] == "en"
+    assert vocabulary_support["explanations"] == {"photosynthesis": "How plants make food from light"}
+    assert chinese["processed_content"]["vocabulary_support"]["content"] == "光合作用发生在叶子中。"
+    assert chinese["processed_content"]["vocabulary_support"]["substitutions"] == []
+
+
+def test_long_text_is_processed_without_llm_in_under_100ms():
+    """A long material goes through the local path in well under 100 ms"""
+    lexicon = get_lexicon()
+    text = " ".join([TEXT] * 1000)
+    substitute_vocabulary(TEXT, lexicon)
+
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        result = substitute_vocabulary(text, lexicon)
+        timings.append(time.perf_counter() - start)
+
+    assert len(result["substitutions"]) == 4000
+    assert min(timings) < 0.1
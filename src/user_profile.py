@@ -2,13 +2,13 @@ from typing import Dict, List, Any, Optional
 from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
 from src.config import SystemConfig
-from src.utils.llm_utils import get_llm
-from src.prompts.prompt_manager import PromptManager
+from src.utils.llm_utils import get_llm, invoke_llm
+from src.prompts.prompt_manager import get_prompt_manager
 import json
 
 # 初始化配置和提示管理器
 config = SystemConfig()
-prompt_manager = PromptManager()
+prompt_manager = get_prompt_manager()
 
 class LearningDifficultyProfile(BaseModel):
     """用户学习困难特征模型"""
@@ -56,9 +56,6 @@ def analyze_user_profile(state: Dict) -> Dict:
     prompt_name = "profile_analyzer_en" if language == "en" else "profile_analyzer"
     prompt = prompt_manager.get_langchain_prompt(prompt_name)
     
-    # Build chain
-    chain = prompt | llm
-    
     # Check if there are questionnaire answers
     if "questionnaire_answers" not in state.get("user_profile", {}):
         # 如果没有问卷答案，使用默认分析
@@ -106,7 +103,7 @@ def analyze_user_profile(state: Dict) -> Dict:
                                       ensure_ascii=False, indent=2)
         
         # 调用LLM分析
-        result = chain.invoke({"input": questionnaire_str})
+        result = invoke_llm(llm, prompt.invoke({"input": questionnaire_str}), node="profile_analyzer")
         
         # 解析LLM输出为结构化数据
         analysis = parse_json_response(result.content)
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Checkpoint store for AI4FairEdu
+SQLite-backed store of workflow jobs and the output of every completed node, so interrupted jobs can resume,
+and of the units running nodes publish early so clients can show them before the job finishes
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import json
+import os
+import sqlite3
+import threading
+import time
+from src.config import SystemConfig
+
+# Job statuses
+STATUS_RUNNING = "running"
+STATUS_RESUMING = "resuming"
+STATUS_COMPLETE = "complete"
+STATUS_ERROR = "error"
+
+
+class CheckpointStore:
+    """
+    Class for persisting workflow jobs and per-node state updates on disk
+    """
+
+    def __init__(self, path: str, enabled: bool = True):
+        """
+        Initialize the checkpoint store
+
+        Args:
+            path: Path of the SQLite database file
+            enabled: Whether checkpointing is enabled at all
+        """
+        self.path = path
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                initial_state TEXT NOT NULL,
+                plan TEXT NOT NULL,
+                status TEXT NOT NULL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS node_checkpoints (
+                job_id TEXT NOT NULL,
+                node TEXT NOT NULL,
+                update_json TEXT NOT NULL,
+                completed_at REAL NOT NULL,
+                PRIMARY KEY (job_id, node)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS published_units (
+                job_id TEXT NOT NULL,
+                node TEXT NOT NULL,
+                unit_number INTEGER NOT NULL,
+                unit_json TEXT NOT NULL,
+                published_at REAL NOT NULL,
+                PRIMARY KEY (job_id, node, unit_number)
+            )
+        """)
+        self._conn.commit()
+
+    def save_job(self, job_id: str, initial_state: Dict[str, Any], plan: Tuple[str, ...]) -> None:
+        """
+        Register a job with its initial state and execution plan
+
+        Checkpoints left over from an earlier run of the same job are kept, so the job resumes from them.
+
+        Args:
+            job_id: Unique job identifier
+            initial_state: Initial workflow state
+            plan: Execution plan the workflow was compiled for
+        """
+        if not self.enabled:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, initial_state, plan, status, error, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, NULL, ?, ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET initial_state = excluded.initial_state, plan = excluded.plan, "
+                "status = excluded.status, error = NULL, updated_at = excluded.updated_at",
+                (job_id, json.dumps(initial_state, ensure_ascii=False, default=str),
+                 json.dumps(list(plan)), STATUS_RUNNING, now, now)
+            )
+            self._conn.commit()
+
+    def load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a registered job
+
+        Args:
+            job_id: Unique job identifier
+
+        Returns:
+            Dictionary with initial_state, plan, status and error, or None if the job is unknown
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT initial_state, plan, status, error FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        initial_state, plan, status, error = row
+        return {
+            "job_id": job_id,
+            "initial_state": json.loads(initial_state),
+            "plan": tuple(json.loads(plan)),
+            "status": status,
+            "error": error
+        }
+
+    def set_status(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        """
+        Update the status of a job
+
+        Node checkpoints and published units of completed jobs are removed, as the final state is
+        stored with the results.
+
+        Args:
+            job_id: Unique job identifier
+            status: New status
+            error: Error message for failed jobs
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                (status, error, time.time(), job_id)
+            )
+            if status == STATUS_COMPLETE:
+                self._conn.execute("DELETE FROM node_checkpoints WHERE job_id = ?", (job_id,))
+                self._conn.execute("DELETE FROM published_units WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+
+    def get_incomplete_jobs(self, stale_after: float = 300.0) -> List[Dict[str, Any]]:
+        """
+        Get the jobs that were still running when the process stopped
+
+        Jobs another process claimed for resuming are included once they have made no progress
+        for stale_after seconds, as that process has most likely stopped as well.
+
+        Args:
+            stale_after: Seconds without a completed node after which a claimed job is offered again
+
+        Returns:
+            List of jobs in the same format as load_job
+        """
+        with self._lock:
+            job_ids = [row[0] for row in self._conn.execute(
+                "SELECT job_id FROM jobs WHERE status = ? OR (status = ? AND updated_at < ?) ORDER BY created_at",
+                (STATUS_RUNNING, STATUS_RESUMING, time.time() - stale_after)
+            )]
+        return [job for job in (self.load_job(job_id) for job_id in job_ids) if job is not None]
+
+    def claim_job(self, job_id: str, stale_after: float = 300.0) -> bool:
+        """
+        Atomically take an interrupted job for resuming, so only one of several processes resumes it
+
+        Args:
+            job_id: Unique job identifier
+            stale_after: Seconds without a completed node after which another process's claim lapses
+
+        Returns:
+            True if this process now owns the job
+        """
+        if not self.enabled:
+            return False
+
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? "
+                "WHERE job_id = ? AND (status = ? OR (status = ? AND updated_at < ?))",
+                (STATUS_RESUMING, now, job_id, STATUS_RUNNING, STATUS_RESUMING, now - stale_after)
+            )
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    def save_node(self, job_id: str, node: str, update: Dict[str, Any]) -> None:
+        """
+        Persist the state update produced by a completed node
+
+        Args:
+            job_id: Unique job identifier
+            node: Name of the workflow node
+            update: State update returned by the node
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO node_checkpoints (job_id, node, update_json, completed_at) VALUES (?, ?, ?, ?)",
+                (job_id, node, json.dumps(update, ensure_ascii=False, default=str), time.time())
+            )
+            # A completed node shows the job is still making progress, which keeps a resume claim alive
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+            self._conn.commit()
+
+    def load_node(self, job_id: str, node: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the stored state update of a completed node
+
+        Args:
+            job_id: Unique job identifier
+            node: Name of the workflow node
+
+        Returns:
+            The stored state update, or None if the node has not completed for this job
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT update_json FROM node_checkpoints WHERE job_id = ? AND node = ?", (job_id, node)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_completed_nodes(self, job_id: str) -> List[str]:
+        """
+        Get the nodes that have completed for a job, in completion order
+
+        Args:
+            job_id: Unique job identifier
+
+        Returns:
+            List of node names
+        """
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT node FROM node_checkpoints WHERE job_id = ? ORDER BY completed_at", (job_id,)
+            )]
+
+    def save_unit(self, job_id: str, node: str, unit: Dict[str, Any]) -> None:
+        """
+        Publish one finished unit of a node that is still running
+
+        A unit published again under the same number replaces the earlier version.
+
+        Args:
+            job_id: Unique job identifier
+            node: Name of the workflow node producing the units
+            unit: Unit with a "unit_number"
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO published_units (job_id, node, unit_number, unit_json, published_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, node, int(unit["unit_number"]), json.dumps(unit, ensure_ascii=False, default=str), time.time())
+            )
+            self._conn.commit()
+
+    def clear_units(self, job_id: str, node: str, after: int = 0) -> None:
+        """
+        Remove units a node published for a job
+
+        Args:
+            job_id: Unique job identifier
+            node: Name of the workflow node that published the units
+            after: Keep the units numbered up to this one, so a node that publishes a shorter
+                final set can drop the rest without the page ever seeing an empty list
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._conn.execute("DELETE FROM published_units WHERE job_id = ? AND node = ? AND unit_number > ?",
+                               (job_id, node, after))
+            self._conn.commit()
+
+    def load_units(self, job_id: str, node: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Load the units published so far for a job
+
+        Args:
+            job_id: Unique job identifier
+            node: Only load the units of this node
+
+        Returns:
+            Units ordered by node and unit number
+        """
+        if not self.enabled:
+            return []
+
+        query = "SELECT unit_json FROM published_units WHERE job_id = ?"
+        params: Tuple = (job_id,)
+        if node is not None:
+            query += " AND node = ?"
+            params = (job_id, node)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY node, unit_number", params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def delete_job(self, job_id: str) -> None:
+        """Remove a job and all its checkpoints"""
+        with self._lock:
+            self._conn.execute("DELETE FROM published_units WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM node_checkpoints WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+
+
+_store_instance: Optional[CheckpointStore] = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store(config: Optional[SystemConfig] = None) -> CheckpointStore:
+    """
+    Get the process-wide checkpoint store
+
+    Args:
+        config: System configuration
+
+    Returns:
+        Shared CheckpointStore instance
+    """
+    global _store_instance
+    with _store_lock:
+        if _store_instance is None:
+            config = config or SystemConfig()
+            _store_instance = CheckpointStore(
+                path=config.get("checkpoint.path") or "data/checkpoints/checkpoints.sqlite3",
+                enabled=bool(config.get("checkpoint.enabled"))
+            )
+        return _store_instance
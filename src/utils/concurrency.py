@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Concurrency helpers for AI4FairEdu
+Runs independent LLM-bound tasks on a bounded thread pool while preserving input order
+"""
+
+from typing import Callable, Iterable, List, Optional, TypeVar, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def bounded_map(func: Callable[[T], R], items: Iterable[T], max_workers: int = 4,
+                on_result: Optional[Callable[[int, Union[R, Exception]], None]] = None,
+                budget: Optional[threading.Semaphore] = None) -> List[Union[R, Exception]]:
+    """
+    Apply a function to every item with at most max_workers calls in flight
+
+    Results are returned in the same order as the input. An exception raised for one
+    item is returned in that item's slot instead of aborting the other items.
+
+    Args:
+        func: Function to apply to each item
+        items: Items to process
+        max_workers: Maximum number of concurrent calls
+        on_result: Called with the index and result of each item as soon as it finishes,
+            in completion order, from the calling thread
+        budget: Semaphore held for every call, so calls made outside this map (by other
+            pools sharing the budget) count against the same limit
+
+    Returns:
+        List with either the result or the raised exception for each item
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def run(item: T) -> Union[R, Exception]:
+        try:
+            if budget is None:
+                return func(item)
+            with budget:
+                return func(item)
+        except Exception as e:
+            return e
+
+    max_workers = max(1, min(max_workers, len(items)))
+    if max_workers == 1:
+        results = []
+        for index, item in enumerate(items):
+            results.append(run(item))
+            if on_result is not None:
+                on_result(index, results[-1])
+        return results
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if on_result is None:
+            return list(executor.map(run, items))
+        futures = {executor.submit(run, item): index for index, item in enumerate(items)}
+        results: List[Union[R, Exception]] = [None] * len(items)
+        for future in as_completed(futures):
+            index = futures[future]
+            results[index] = future.result()
+            on_result(index, results[index])
+        return results
@@ -5,60 +5,24 @@ Identifies important elements in learning materials for highlighting
 """
 
 from typing import Dict, List, Any, Optional
+from collections import Counter
+import json
 import re
+import threading
+import numpy as np
 from langchain_core.prompts import ChatPromptTemplate
 from src.config import SystemConfig
-from src.utils.llm_utils import get_llm
+from src.utils.llm_utils import get_llm, invoke_llm
+from src.utils.corpus_stats import get_corpus_stats
+from src.utils.keyword_extractor import KeywordExtractor
+from src.utils.source_retriever import estimate_tokens
 
-class ContentAnalyzer:
-    """
-    Class for analyzing learning content to identify important elements
-    """
-    
-    def __init__(self, config: Optional[SystemConfig] = None):
-        """
-        Initialize the content analyzer
-        
-        Args:
-            config: System configuration
-        """
-        self.config = config or SystemConfig()
-        self.llm = get_llm(self.config)
-    
-    def identify_elements_to_highlight(self, content: str, difficulty_type: str) -> Dict[str, List[Dict[str, Any]]]:
-        """
-        Identify elements in the content that should be highlighted
-        
-        Args:
-            content: The learning content to analyze
-            difficulty_type: The user's learning difficulty type (ADHD, Dyslexia, Combined)
-        
-        Returns:
-            Dictionary mapping highlight types to lists of elements to highlight
-        """
-        # Use LLM to identify important elements
-        elements = self._llm_identify_elements(content, difficulty_type)
-        
-        # Fallback to rule-based identification if LLM fails
-        if not elements or sum(len(items) for items in elements.values()) == 0:
-            elements = self._rule_based_identify_elements(content)
-        
-        return elements
-    
-    def _llm_identify_elements(self, content: str, difficulty_type: str) -> Dict[str, List[Dict[str, Any]]]:
-        """
-        Use LLM to identify important elements in the content
-        
-        Args:
-            content: The learning content to analyze
-            difficulty_type: The user's learning difficulty type
-        
-        Returns:
-            Dictionary mapping highlight types to lists of elements to highlight
-        """
-        # Create prompt based on difficulty type
-        if difficulty_type == "ADHD":
-            system_prompt = """You are an expert educational content analyzer specializing in supporting students with ADHD.
+# Highlight categories returned by the analyzer
+HIGHLIGHT_CATEGORIES = ["primary", "secondary", "key_concepts", "definitions"]
+
+# System prompts for each learning difficulty type
+ANALYSIS_SYSTEM_PROMPTS = {
+    "ADHD": """You are an expert educational content analyzer specializing in supporting students with ADHD.
 Your task is to identify elements in learning materials that should be highlighted to help maintain focus and enhance comprehension.
 
 For students with ADHD, highlighting should:
@@ -75,9 +39,8 @@ Analyze the provided learning content and identify:
 
 Format your response as a JSON object with these categories as keys, each containing an array of objects with "text" and "metadata" fields.
 The "metadata" field should include "importance" (high/medium/low) for primary/secondary elements, and "definition" for definition elements.
-"""
-        elif difficulty_type == "Dyslexia":
-            system_prompt = """You are an expert educational content analyzer specializing in supporting students with Dyslexia.
+""",
+    "Dyslexia": """You are an expert educational content analyzer specializing in supporting students with Dyslexia.
 Your task is to identify elements in learning materials that should be highlighted to improve readability and comprehension.
 
 For students with Dyslexia, highlighting should:
@@ -94,9 +57,8 @@ Analyze the provided learning content and identify:
 
 Format your response as a JSON object with these categories as keys, each containing an array of objects with "text" and "metadata" fields.
 The "metadata" field should include "importance" (high/medium/low) for primary/secondary elements, and "definition" for definition elements.
-"""
-        else:  # Combined or default
-            system_prompt = """You are an expert educational content analyzer specializing in supporting students with both ADHD and Dyslexia.
+""",
+    "Combined": """You are an expert educational content analyzer specializing in supporting students with both ADHD and Dyslexia.
 Your task is to identify elements in learning materials that should be highlighted to improve focus, readability, and comprehension.
 
 For students with both ADHD and Dyslexia, highlighting should:
@@ -114,6 +76,290 @@ Analyze the provided learning content and identify:
 Format your response as a JSON object with these categories as keys, each containing an array of objects with "text" and "metadata" fields.
 The "metadata" field should include "importance" (high/medium/low) for primary/secondary elements, and "definition" for definition elements.
 """
+}
+
+# Output instructions appended to the system prompt when several units are analyzed in one request
+BATCH_OUTPUT_INSTRUCTIONS = """
+The content is split into numbered units marked "[Unit N]". Identify the elements separately for every unit,
+using only text that appears verbatim in that unit.
+
+Format your response as a JSON object with a single key "units", containing one object per unit with
+a "unit" field (the unit number) and the four categories above as keys.
+"""
+
+
+# Analyzer modes: local extraction only, local first with LLM refinement, or LLM first
+ANALYSIS_MODE_LOCAL = "local"
+ANALYSIS_MODE_TIERED = "tiered"
+ANALYSIS_MODE_LLM = "llm"
+
+# Tiers that can produce the elements of a text
+TIER_LOCAL = "local"
+TIER_LLM = "llm"
+TIER_RULE_BASED = "rule_based"
+
+_tier_hits: Counter = Counter()
+_tier_lock = threading.Lock()
+
+
+def record_tier_hit(tier: str) -> None:
+    """Count one text whose elements were produced by the given tier"""
+    with _tier_lock:
+        _tier_hits[tier] += 1
+
+
+def get_tier_stats() -> Dict[str, Any]:
+    """
+    Get how often each analyzer tier produced the elements of a text
+
+    Returns:
+        Dictionary with the total, and the hit count and rate of every tier
+    """
+    with _tier_lock:
+        hits = dict(_tier_hits)
+    total = sum(hits.values())
+    stats = {"total": total}
+    for tier in (TIER_LOCAL, TIER_LLM, TIER_RULE_BASED):
+        stats[tier] = {"hits": hits.get(tier, 0), "rate": hits.get(tier, 0) / total if total else 0.0}
+    return stats
+
+
+def reset_tier_stats() -> None:
+    """Clear the analyzer tier counters"""
+    with _tier_lock:
+        _tier_hits.clear()
+
+
+def requires_llm_analysis(user_profile: Dict[str, Any], config: Optional[SystemConfig] = None) -> bool:
+    """
+    Check whether a user profile asks for LLM-refined highlight analysis
+
+    Profiles whose difficulty severity reaches content_analysis.llm_severity_level always get
+    elements from the LLM tier.
+
+    Args:
+        user_profile: User profile with the analysis results
+        config: System configuration
+
+    Returns:
+        True if the LLM tier should be used regardless of the local confidence
+    """
+    config = config or SystemConfig()
+    level = config.get("content_analysis.llm_severity_level")
+    severity = (user_profile or {}).get("analysis", {}).get("severity_level") or 0
+    return bool(level) and severity >= level
+
+
+def count_elements(elements: Optional[Dict[str, List[Dict[str, Any]]]]) -> int:
+    """Count the elements in an elements dictionary (0 for None)"""
+    return sum(len(items) for items in elements.values()) if elements else 0
+
+
+# Patterns of the rule-based analyzer, compiled once
+_SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?])\s+')
+_KEY_CONCEPT_PATTERN = re.compile(r'"([^"]+)"|\b([A-Z][a-zA-Z]+(?:[ \t]+[A-Z][a-zA-Z]+)*)\b')
+_PRIMARY_INDICATOR_PATTERN = re.compile(r'important|key|essential|fundamental|critical|significant')
+_SECONDARY_INDICATOR_PATTERN = re.compile(r'for example|such as|e\.g\.|i\.e\.|in other words|specifically')
+_DEFINITION_PATTERN = re.compile(
+    r'(?:^|(?<=[^A-Za-z\s]))\s*((?:[A-Za-z]+[ \t]+){0,2}[A-Za-z]+)[ \t]+'
+    r'(?:is[ \t]+defined[ \t]+as|refers[ \t]+to|is)[ \t]+([^.!?]+)'
+)
+
+
+def get_analysis_system_prompt(difficulty_type: str) -> str:
+    """Get the analyzer system prompt for a learning difficulty type (Combined for unknown types)"""
+    return ANALYSIS_SYSTEM_PROMPTS.get(difficulty_type, ANALYSIS_SYSTEM_PROMPTS["Combined"])
+
+
+def empty_elements() -> Dict[str, List[Dict[str, Any]]]:
+    """Get an empty elements dictionary with every highlight category"""
+    return {category: [] for category in HIGHLIGHT_CATEGORIES}
+
+
+def parse_json_response(content: str) -> Any:
+    """
+    Extract and parse the JSON object in an LLM response
+
+    Args:
+        content: Raw response text, possibly wrapped in a ```json code block
+
+    Returns:
+        The parsed JSON value
+    """
+    # Try to extract JSON from the response
+    json_match = re.search(r'```json\n(.*?)\n```', content, re.DOTALL)
+    if json_match:
+        json_str = json_match.group(1)
+    else:
+        json_str = content
+    
+    # Clean up the JSON string
+    json_str = re.sub(r'```.*?```', '', json_str, flags=re.DOTALL)
+    
+    return json.loads(json_str)
+
+
+def project_unit_elements(response: Any, units: List[str]) -> List[Dict[str, List[Dict[str, Any]]]]:
+    """
+    Project the elements of a batched analyzer response back onto the units
+
+    Each element is kept for the unit it was reported under if its text occurs there; otherwise it
+    is moved to the units that do contain it, and dropped if none does. Duplicates within a unit
+    and category are removed.
+
+    Args:
+        response: Parsed response, {"units": [{"unit": 1, "primary": [...], ...}, ...]}
+        units: Content of each unit in the batch
+
+    Returns:
+        One elements dictionary per unit
+    """
+    entries = response.get("units", []) if isinstance(response, dict) else response
+    if isinstance(entries, dict):
+        entries = [{**value, "unit": key} for key, value in entries.items() if isinstance(value, dict)]
+
+    results = [empty_elements() for _ in units]
+    seen = [set() for _ in units]
+
+    def add(index: int, category: str, element: Dict[str, Any]) -> None:
+        key = (category, element["text"])
+        if key not in seen[index]:
+            seen[index].add(key)
+            results[index][category].append(element)
+
+    for position, entry in enumerate(entries or []):
+        if not isinstance(entry, dict):
+            continue
+        try:
+            reported = int(entry.get("unit", position + 1)) - 1
+        except (TypeError, ValueError):
+            reported = position
+
+        for category in HIGHLIGHT_CATEGORIES:
+            for element in entry.get(category) or []:
+                if isinstance(element, str):
+                    element = {"text": element, "metadata": {}}
+                text = element.get("text") if isinstance(element, dict) else None
+                if not text:
+                    continue
+                if 0 <= reported < len(units) and text in units[reported]:
+                    add(reported, category, element)
+                else:
+                    for index, content in enumerate(units):
+                        if text in content:
+                            add(index, category, element)
+    return results
+
+
+class ContentAnalyzer:
+    """
+    Class for analyzing learning content to identify important elements
+    """
+    
+    def __init__(self, config: Optional[SystemConfig] = None):
+        """
+        Initialize the content analyzer
+        
+        Args:
+            config: System configuration
+        """
+        self.config = config or SystemConfig()
+        self.mode = self.config.get("content_analysis.mode") or ANALYSIS_MODE_TIERED
+        threshold = self.config.get("content_analysis.confidence_threshold")
+        self.confidence_threshold = 0.5 if threshold is None else threshold
+        self.llm = get_llm(self.config) if self.mode != ANALYSIS_MODE_LOCAL else None
+        corpus = get_corpus_stats(self.config) if self.config.get("corpus.enabled") else None
+        self.keyword_extractor = KeywordExtractor(
+            corpus=corpus,
+            min_corpus_documents=self.config.get("corpus.min_documents") or 3
+        )
+    
+    def identify_elements_to_highlight(self, content: str, difficulty_type: str,
+                                       refine_with_llm: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Identify elements in the content that should be highlighted
+        
+        In tiered mode the local extractor runs first and the LLM is only asked when the local
+        result is below the confidence threshold or refine_with_llm is set.
+        
+        Args:
+            content: The learning content to analyze
+            difficulty_type: The user's learning difficulty type (ADHD, Dyslexia, Combined)
+            refine_with_llm: Ask the LLM even if the local result is confident (ignored in local mode)
+        
+        Returns:
+            Dictionary mapping highlight types to lists of elements to highlight
+        """
+        local_elements = self._local_identify_elements(content, refine_with_llm)
+        if local_elements is not None:
+            record_tier_hit(TIER_LOCAL)
+            return local_elements
+        
+        # Use LLM to identify important elements
+        elements = self._llm_identify_elements(content, difficulty_type) if self.mode != ANALYSIS_MODE_LOCAL else None
+        if count_elements(elements):
+            record_tier_hit(TIER_LLM)
+            return elements
+        
+        return self._fallback_elements(content)
+    
+    def _local_identify_elements(self, content: str, refine_with_llm: bool) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Run the local extractor and decide whether its result can be used without the LLM
+        
+        Args:
+            content: The learning content to analyze
+            refine_with_llm: Whether the caller asked for LLM refinement
+        
+        Returns:
+            The local elements, or None if the LLM tier should be asked
+        """
+        if self.mode == ANALYSIS_MODE_LLM:
+            return None
+        
+        result = self.keyword_extractor.extract(content)
+        if not count_elements(result["elements"]):
+            return None
+        if self.mode == ANALYSIS_MODE_LOCAL:
+            return result["elements"]
+        if not refine_with_llm and result["confidence"] >= self.confidence_threshold:
+            return result["elements"]
+        return None
+    
+    def _fallback_elements(self, content: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get elements when neither tier produced a usable result
+        
+        The local extractor is tried before the rule-based one, as its result may only have been
+        rejected for low confidence.
+        
+        Args:
+            content: The learning content to analyze
+        
+        Returns:
+            Dictionary mapping highlight types to lists of elements to highlight
+        """
+        if self.mode != ANALYSIS_MODE_LLM:
+            elements = self.keyword_extractor.extract(content)["elements"]
+            if count_elements(elements):
+                record_tier_hit(TIER_LOCAL)
+                return elements
+        
+        record_tier_hit(TIER_RULE_BASED)
+        return self._rule_based_identify_elements(content)
+    
+    def _llm_identify_elements(self, content: str, difficulty_type: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Use LLM to identify important elements in the content
+        
+        Args:
+            content: The learning content to analyze
+            difficulty_type: The user's learning difficulty type
+        
+        Returns:
+            Dictionary mapping highlight types to lists of elements to highlight
+        """
+        system_prompt = get_analysis_system_prompt(difficulty_type)
         
         # Create the prompt template
         prompt = ChatPromptTemplate.from_messages([
@@ -123,27 +369,13 @@ The "metadata" field should include "importance" (high/medium/low) for primary/s
         
         try:
             # Invoke the LLM
-            response = self.llm.invoke(prompt.format(content=content))
-            
-            # Extract the JSON response
-            import json
-            import re
+            response = invoke_llm(self.llm, prompt.format(content=content), node="content_analyzer")
             
-            # Try to extract JSON from the response
-            json_match = re.search(r'```json\n(.*?)\n```', response.content, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_str = response.content
-            
-            # Clean up the JSON string
-            json_str = re.sub(r'```.*?```', '', json_str, flags=re.DOTALL)
-            
-            # Parse the JSON
-            elements = json.loads(json_str)
+            # Parse the JSON response
+            elements = parse_json_response(response.content)
             
             # Ensure all required keys exist
-            for key in ["primary", "secondary", "key_concepts", "definitions"]:
+            for key in HIGHLIGHT_CATEGORIES:
                 if key not in elements:
                     elements[key] = []
             
@@ -151,17 +383,113 @@ The "metadata" field should include "importance" (high/medium/low) for primary/s
         
         except Exception as e:
             print(f"Error using LLM to identify elements: {str(e)}")
-            return {
-                "primary": [],
-                "secondary": [],
-                "key_concepts": [],
-                "definitions": []
-            }
+            return empty_elements()
     
+    def identify_elements_for_units(self, units: List[str], difficulty_type: str,
+                                    refine_with_llm: bool = False) -> List[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Identify the elements to highlight in every unit of a document with as few LLM requests as possible
+
+        Units the local extractor handles confidently are not sent to the LLM. The remaining units
+        are sent together in numbered batches of at most content_analysis.max_batch_tokens
+        tokens, so a typical material needs a single request instead of one per unit.
+
+        Args:
+            units: Content of each unit, in document order
+            difficulty_type: The user's learning difficulty type (ADHD, Dyslexia, Combined)
+            refine_with_llm: Ask the LLM even for confident local results (ignored in local mode)
+
+        Returns:
+            One elements dictionary per unit, in the same order as the units
+        """
+        results: List[Optional[Dict[str, List[Dict[str, Any]]]]] = [None] * len(units)
+        pending = []
+        for index, content in enumerate(units):
+            if not content.strip():
+                results[index] = empty_elements()
+                continue
+            local_elements = self._local_identify_elements(content, refine_with_llm)
+            if local_elements is not None:
+                record_tier_hit(TIER_LOCAL)
+                results[index] = local_elements
+            else:
+                pending.append(index)
+
+        if self.mode != ANALYSIS_MODE_LOCAL:
+            for batch in self._batch_units(units, pending):
+                batch_elements = self._llm_identify_unit_elements([units[i] for i in batch], difficulty_type)
+                for index, elements in zip(batch, batch_elements):
+                    if count_elements(elements):
+                        record_tier_hit(TIER_LLM)
+                        results[index] = elements
+
+        # Fall back for units the LLM returned nothing for
+        for index in pending:
+            if results[index] is None:
+                results[index] = self._fallback_elements(units[index])
+
+        return results
+
+    def _batch_units(self, units: List[str], indices: List[int]) -> List[List[int]]:
+        """
+        Group unit indices into batches that fit the per-request token budget
+
+        Args:
+            units: Content of each unit
+            indices: Indices of the units to send, in document order
+
+        Returns:
+            List of batches, each a list of unit indices in document order
+        """
+        max_tokens = self.config.get("content_analysis.max_batch_tokens") or 6000
+
+        batches, current, current_tokens = [], [], 0
+        for index in indices:
+            tokens = estimate_tokens(units[index])
+            if current and current_tokens + tokens > max_tokens:
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(index)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _llm_identify_unit_elements(self, units: List[str], difficulty_type: str) -> List[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Use a single LLM request to identify the elements of several units
+
+        Args:
+            units: Content of each unit in the batch
+            difficulty_type: The user's learning difficulty type
+
+        Returns:
+            One elements dictionary per unit (empty if the request failed)
+        """
+        system_prompt = get_analysis_system_prompt(difficulty_type) + BATCH_OUTPUT_INSTRUCTIONS
+        numbered_content = "\n\n".join(f"[Unit {number}]\n{content}" for number, content in enumerate(units, 1))
+
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", system_prompt),
+            ("human", "Please analyze the following learning content and identify elements to highlight in each unit:\n\n{content}")
+        ])
+
+        try:
+            response = invoke_llm(self.llm, prompt.format(content=numbered_content), node="content_analyzer_batch")
+            return project_unit_elements(parse_json_response(response.content), units)
+
+        except Exception as e:
+            print(f"Error using LLM to identify unit elements: {str(e)}")
+            return [empty_elements() for _ in units]
+
     def _rule_based_identify_elements(self, content: str) -> Dict[str, List[Dict[str, Any]]]:
         """
         Use rule-based approach to identify important elements in the content
         
+        Runs in a single pass per pattern over the whole text: sentence boundaries are found once
+        and matches are mapped to sentences through the array of sentence start offsets, so the
+        cost stays linear in the length of the text.
+        
         Args:
             content: The learning content to analyze
         
@@ -169,99 +497,65 @@ The "metadata" field should include "importance" (high/medium/low) for primary/s
             Dictionary mapping highlight types to lists of elements to highlight
         """
         # Initialize result structure
-        elements = {
-            "primary": [],
-            "secondary": [],
-            "key_concepts": [],
-            "definitions": []
-        }
+        elements = empty_elements()
+        if not content.strip():
+            return elements
         
-        # Split content into sentences
-        sentences = re.split(r'(?<=[.!?])\s+', content)
+        # Sentence start offsets; sentence i spans starts[i]:starts[i + 1]
+        starts = np.fromiter(
+            (0, *(match.end() for match in _SENTENCE_BOUNDARY_PATTERN.finditer(content))), dtype=np.int64
+        )
+        bounds = np.append(starts, len(content))
         
-        # Identify potential key concepts (capitalized terms, terms in quotes)
-        key_concept_pattern = r'\b[A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*\b'
-        quoted_pattern = r'"([^"]+)"'
+        def sentence(index: int) -> str:
+            return content[bounds[index]:bounds[index + 1]].strip()
         
-        key_concepts = set()
-        for sentence in sentences:
-            # Find capitalized terms
-            for match in re.finditer(key_concept_pattern, sentence):
-                if len(match.group(0).split()) <= 3:  # Limit to 3 words
-                    key_concepts.add(match.group(0))
-            
-            # Find quoted terms
-            for match in re.finditer(quoted_pattern, sentence):
-                if len(match.group(1).split()) <= 3:  # Limit to 3 words
-                    key_concepts.add(match.group(1))
+        def indicator_sentences(pattern: re.Pattern, buffer: str) -> np.ndarray:
+            # Indices of the sentences containing a match, in text order
+            positions = np.fromiter((match.start() for match in pattern.finditer(buffer)), dtype=np.int64)
+            indices = np.searchsorted(starts, positions, side="right") - 1
+            return np.unique(indices)
+        
+        lowered = content.lower()
         
-        # Add key concepts to the appropriate category
-        for concept in list(key_concepts)[:3]:  # Limit to 3 key concepts
+        # Identify potential key concepts (capitalized terms, terms in quotes) in order of appearance
+        key_concepts: Dict[str, None] = {}
+        for match in _KEY_CONCEPT_PATTERN.finditer(content):
+            concept = match.group(1) or match.group(2)
+            if len(concept.split()) <= 3:  # Limit to 3 words
+                key_concepts.setdefault(concept)
+                if len(key_concepts) == 3:  # Limit to 3 key concepts
+                    break
+        for concept in key_concepts:
             elements["key_concepts"].append({
                 "text": concept,
                 "metadata": {"importance": "high"}
             })
         
-        # Identify potential primary elements (first sentence, sentences with key phrases)
-        primary_indicators = ["important", "key", "essential", "fundamental", "critical", "significant"]
-        
-        if sentences:
-            # First sentence often contains main idea
-            first_sentence = sentences[0]
+        # First sentence often contains main idea, followed by sentences with indicator words
+        primary_indices = [0] + [int(i) for i in indicator_sentences(_PRIMARY_INDICATOR_PATTERN, lowered) if i > 0]
+        for index in primary_indices[:5]:  # Limit primary elements
             elements["primary"].append({
-                "text": first_sentence.strip(),
+                "text": sentence(index),
                 "metadata": {"importance": "high"}
             })
-            
-            # Look for sentences with indicator words
-            for sentence in sentences[1:]:
-                for indicator in primary_indicators:
-                    if indicator in sentence.lower():
-                        elements["primary"].append({
-                            "text": sentence.strip(),
-                            "metadata": {"importance": "high"}
-                        })
-                        break
-        
-        # Limit primary elements
-        elements["primary"] = elements["primary"][:5]
-        
-        # Identify potential definitions (sentences with "is", "refers to", "defined as")
-        definition_patterns = [
-            r'([A-Za-z\s]+)\s+is\s+([^.!?]+)',
-            r'([A-Za-z\s]+)\s+refers\s+to\s+([^.!?]+)',
-            r'([A-Za-z\s]+)\s+is\s+defined\s+as\s+([^.!?]+)'
-        ]
-        
-        for sentence in sentences:
-            for pattern in definition_patterns:
-                matches = re.finditer(pattern, sentence)
-                for match in matches:
-                    term = match.group(1).strip()
-                    definition = match.group(2).strip()
-                    if len(term.split()) <= 3:  # Limit to 3 words
-                        elements["definitions"].append({
-                            "text": term,
-                            "metadata": {"definition": definition}
-                        })
-        
-        # Limit definitions
-        elements["definitions"] = elements["definitions"][:4]
         
-        # Add some secondary elements (sentences with examples, explanations)
-        secondary_indicators = ["for example", "such as", "e.g.", "i.e.", "in other words", "specifically"]
-        
-        for sentence in sentences:
-            for indicator in secondary_indicators:
-                if indicator in sentence.lower():
-                    elements["secondary"].append({
-                        "text": sentence.strip(),
-                        "metadata": {"importance": "medium"}
-                    })
-                    break
+        # Identify potential definitions ("is", "refers to", "defined as") whose term of at most
+        # three words starts a clause
+        for match in _DEFINITION_PATTERN.finditer(content):
+            elements["definitions"].append({
+                "text": match.group(1),
+                "metadata": {"definition": match.group(2).strip()}
+            })
+            if len(elements["definitions"]) == 4:  # Limit definitions
+                break
         
-        # Limit secondary elements
-        elements["secondary"] = elements["secondary"][:3]
+        # Add some secondary elements (sentences with examples, explanations)
+        for index in indicator_sentences(_SECONDARY_INDICATOR_PATTERN, lowered)[:3]:  # Limit secondary elements
+            elements["secondary"].append({
+                "text": sentence(int(index)),
+                "metadata": {"importance": "medium"}
+            })
         
         return elements
 
@@ -340,7 +634,8 @@ Training a neural network requires a large amount of labeled data and computatio
 ]
 
 
-def get_elements_to_highlight(content: str, difficulty_type: str, config: Optional[SystemConfig] = None) -> Dict[str, List[Dict[str, Any]]]:
+def get_elements_to_highlight(content: str, difficulty_type: str, config: Optional[SystemConfig] = None,
+                              refine_with_llm: bool = False) -> Dict[str, List[Dict[str, Any]]]:
     """
     Identify elements in the content that should be highlighted
     
@@ -348,12 +643,31 @@ def get_elements_to_highlight(content: str, difficulty_type: str, config: Option
         content: The learning content to analyze
         difficulty_type: The user's learning difficulty type
         config: System configuration
+        refine_with_llm: Ask the LLM even if the local result is confident
     
     Returns:
         Dictionary mapping highlight types to lists of elements to highlight
     """
     analyzer = ContentAnalyzer(config)
-    return analyzer.identify_elements_to_highlight(content, difficulty_type)
+    return analyzer.identify_elements_to_highlight(content, difficulty_type, refine_with_llm)
+
+
+def get_elements_for_units(units: List[str], difficulty_type: str, config: Optional[SystemConfig] = None,
+                           refine_with_llm: bool = False) -> List[Dict[str, List[Dict[str, Any]]]]:
+    """
+    Identify elements to highlight in every unit of a document using batched analyzer requests
+    
+    Args:
+        units: Content of each unit, in document order
+        difficulty_type: The user's learning difficulty type
+        config: System configuration
+        refine_with_llm: Ask the LLM even for confident local results
+    
+    Returns:
+        One dictionary mapping highlight types to lists of elements per unit
+    """
+    analyzer = ContentAnalyzer(config)
+    return analyzer.identify_elements_for_units(units, difficulty_type, refine_with_llm)
 
 
 if __name__ == "__main__":
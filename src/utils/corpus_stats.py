@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Corpus statistics for AI4FairEdu
+Document frequencies and term counts over all uploaded materials, kept in growable arrays and saved as one .npz file
+"""
+
+from typing import Dict, List, Any, Iterable, Optional
+import atexit
+import glob
+import os
+import threading
+import numpy as np
+from src.config import SystemConfig
+from src.utils.keyword_extractor import KeywordExtractor
+
+
+class CorpusStats:
+    """
+    Class for incrementally maintained term statistics over a corpus of materials
+
+    Terms are the candidate words and phrases of the keyword extractor. Each term has an index
+    into two count arrays: the number of documents containing it and its total number of
+    occurrences. Documents are identified by id so that adding one twice has no effect.
+
+    One process (the web app) is expected to add documents; other processes pick up the saved
+    file the next time they read statistics. With a save delay, added documents are written
+    by a background timer, so uploads that arrive close together share one save.
+    """
+
+    def __init__(self, path: str, extractor: Optional[KeywordExtractor] = None, save_delay: float = 0.0):
+        """
+        Initialize the store, loading the saved statistics if the file exists
+
+        Args:
+            path: Path of the .npz file
+            extractor: Keyword extractor that defines the terms of a document
+            save_delay: Seconds to wait before saving added documents (0 saves immediately)
+        """
+        self.path = path
+        self.extractor = extractor or KeywordExtractor()
+        self.save_delay = save_delay
+
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._reset()
+        self._loaded_mtime: Optional[float] = None
+        self._load()
+
+    def _reset(self) -> None:
+        """Clear the in-memory statistics"""
+        self._term_index: Dict[str, int] = {}
+        self._document_ids: set = set()
+        self._document_frequency = np.zeros(1024, dtype=np.int32)
+        self._term_counts = np.zeros(1024, dtype=np.int64)
+
+    @property
+    def document_count(self) -> int:
+        """Number of documents in the corpus"""
+        self._refresh_if_changed()
+        return len(self._document_ids)
+
+    @property
+    def term_count(self) -> int:
+        """Number of distinct terms in the corpus"""
+        self._refresh_if_changed()
+        return len(self._term_index)
+
+    def has_document(self, document_id: str) -> bool:
+        """Check whether a document has already been counted"""
+        self._refresh_if_changed()
+        return document_id in self._document_ids
+
+    def add_document(self, document_id: str, content: str, save: bool = True) -> bool:
+        """
+        Count the terms of a document
+
+        Args:
+            document_id: Unique document identifier
+            content: Document text
+            save: Whether to write the statistics to disk afterwards (after save_delay, if set)
+
+        Returns:
+            False if the document had already been counted
+        """
+        term_counts = self.extractor.count_terms(content)
+        with self._lock:
+            self._refresh_if_changed_locked()
+            if document_id in self._document_ids:
+                return False
+
+            indices = np.fromiter((self._get_or_add_term(term) for term in term_counts), dtype=np.int64,
+                                  count=len(term_counts))
+            self._document_frequency[indices] += 1
+            self._term_counts[indices] += np.fromiter(term_counts.values(), dtype=np.int64, count=len(term_counts))
+            self._document_ids.add(document_id)
+            self._dirty = True
+
+            if save:
+                if self.save_delay > 0:
+                    self._schedule_save_locked()
+                else:
+                    self._save_locked()
+        return True
+
+    def sync_directory(self, directory: str, pattern: str = "*.txt") -> int:
+        """
+        Count every material file in a directory that is not in the corpus yet
+
+        The file name without extension is used as the document id.
+
+        Args:
+            directory: Directory with the stored materials
+            pattern: Glob pattern of material files
+
+        Returns:
+            Number of newly counted documents
+        """
+        added = 0
+        for file_path in sorted(glob.glob(os.path.join(directory, pattern))):
+            document_id = os.path.splitext(os.path.basename(file_path))[0]
+            if self.has_document(document_id):
+                continue
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Error reading material {file_path}: {e}")
+                continue
+            if self.add_document(document_id, content, save=False):
+                added += 1
+        if added:
+            self.save()
+        return added
+
+    def document_frequencies(self, terms: Iterable[str]) -> np.ndarray:
+        """
+        Get the number of corpus documents containing each term
+
+        Args:
+            terms: Lowercase terms
+
+        Returns:
+            Document frequency per term (0 for unknown terms)
+        """
+        self._refresh_if_changed()
+        with self._lock:
+            indices = np.array([self._term_index.get(term, -1) for term in terms], dtype=np.int64)
+            frequencies = np.zeros(len(indices), dtype=np.int32)
+            known = indices >= 0
+            frequencies[known] = self._document_frequency[indices[known]]
+        return frequencies
+
+    def idf(self, terms: Iterable[str]) -> np.ndarray:
+        """
+        Get the smoothed inverse document frequency of each term over the corpus
+
+        Args:
+            terms: Lowercase terms
+
+        Returns:
+            IDF weight per term
+        """
+        frequencies = self.document_frequencies(terms)
+        document_count = len(self._document_ids)
+        return np.log((1.0 + document_count) / (1.0 + frequencies)) + 1.0
+
+    def most_common(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Get the terms that occur in the most documents
+
+        Args:
+            limit: Number of terms to return
+
+        Returns:
+            List of dictionaries with term, document_frequency and count
+        """
+        self._refresh_if_changed()
+        with self._lock:
+            terms = list(self._term_index)
+            frequencies = self._document_frequency[:len(terms)]
+            order = np.argsort(-frequencies, kind="stable")[:limit]
+            return [
+                {"term": terms[i], "document_frequency": int(frequencies[i]), "count": int(self._term_counts[i])}
+                for i in order
+            ]
+
+    def save(self) -> None:
+        """Write the statistics to disk"""
+        with self._lock:
+            self._cancel_save_timer_locked()
+            self._save_locked()
+
+    def flush(self) -> None:
+        """Write added documents that have not been saved yet to disk"""
+        with self._lock:
+            self._cancel_save_timer_locked()
+            if self._dirty:
+                self._save_locked()
+
+    def _schedule_save_locked(self) -> None:
+        """Start the delayed save unless one is already pending (caller holds the lock)"""
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self._save_in_background)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _cancel_save_timer_locked(self) -> None:
+        """Cancel the pending delayed save (caller holds the lock)"""
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+
+    def _save_in_background(self) -> None:
+        """Run the delayed save"""
+        try:
+            self.flush()
+        except OSError as e:
+            print(f"Error saving corpus statistics to {self.path}: {e}")
+
+    def _get_or_add_term(self, term: str) -> int:
+        """Get the index of a term, growing the count arrays when needed (caller holds the lock)"""
+        index = self._term_index.get(term)
+        if index is None:
+            index = len(self._term_index)
+            self._term_index[term] = index
+            if index >= len(self._document_frequency):
+                capacity = len(self._document_frequency) * 2
+                self._document_frequency = np.resize(self._document_frequency, capacity)
+                self._document_frequency[index:] = 0
+                self._term_counts = np.resize(self._term_counts, capacity)
+                self._term_counts[index:] = 0
+        return index
+
+    def _save_locked(self) -> None:
+        """Write the statistics to disk atomically (caller holds the lock)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        size = len(self._term_index)
+        temp_path = f"{self.path}.tmp.npz"
+        np.savez_compressed(
+            temp_path,
+            terms=np.array(list(self._term_index), dtype=str),
+            document_frequency=self._document_frequency[:size],
+            term_counts=self._term_counts[:size],
+            document_ids=np.array(sorted(self._document_ids), dtype=str)
+        )
+        os.replace(temp_path, self.path)
+        self._loaded_mtime = os.path.getmtime(self.path)
+        self._dirty = False
+
+    def _load(self) -> None:
+        """Load the saved statistics, if any"""
+        with self._lock:
+            self._load_locked()
+
+    def _load_locked(self) -> None:
+        """Load the saved statistics (caller holds the lock)"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                terms = data["terms"].tolist()
+                document_frequency = data["document_frequency"]
+                term_counts = data["term_counts"]
+                document_ids = data["document_ids"].tolist()
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Error loading corpus statistics from {self.path}: {e}")
+            return
+
+        capacity = max(1024, 1 << max(0, len(terms) - 1).bit_length())
+        self._reset()
+        self._term_index = {term: index for index, term in enumerate(terms)}
+        self._document_ids = set(document_ids)
+        self._document_frequency = np.zeros(capacity, dtype=np.int32)
+        self._document_frequency[:len(terms)] = document_frequency
+        self._term_counts = np.zeros(capacity, dtype=np.int64)
+        self._term_counts[:len(terms)] = term_counts
+        self._loaded_mtime = os.path.getmtime(self.path)
+
+    def _refresh_if_changed(self) -> None:
+        """Reload the statistics if another process has saved a newer file"""
+        with self._lock:
+            self._refresh_if_changed_locked()
+
+    def _refresh_if_changed_locked(self) -> None:
+        """Reload the statistics if the file changed (caller holds the lock)"""
+        if self._dirty:
+            # Reloading would drop the documents that are waiting for the delayed save
+            return
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._loaded_mtime:
+            self._load_locked()
+
+
+_stats_instance: Optional[CorpusStats] = None
+_stats_lock = threading.Lock()
+
+
+def get_corpus_stats(config: Optional[SystemConfig] = None) -> CorpusStats:
+    """
+    Get the process-wide corpus statistics
+
+    Args:
+        config: System configuration
+
+    Returns:
+        Shared CorpusStats instance
+    """
+    global _stats_instance
+    with _stats_lock:
+        if _stats_instance is None:
+            config = config or SystemConfig()
+            _stats_instance = CorpusStats(path=config.get("corpus.path") or "data/corpus/corpus_stats.npz",
+                                          save_delay=config.get("corpus.save_delay") or 0.0)
+            atexit.register(_stats_instance.flush)
+        return _stats_instance
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Glossary store for AI4FairEdu
+SQLite-backed glossary of term definitions collected from every simplified material, so known terms are not re-defined by the LLM
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import os
+import sqlite3
+import threading
+import time
+from src.config import SystemConfig
+from src.utils.pattern_matcher import PatternMatcher
+
+
+def normalize_term(term: str) -> str:
+    """Normalize a term for lookups: collapsed whitespace, lowercase, without surrounding punctuation"""
+    return " ".join(term.split()).strip(" \t*•-–—:：,，.。").lower()
+
+
+class GlossaryStore:
+    """
+    Class for a persistent term → definition glossary per language
+
+    Each entry records how many materials it was used for. Lookups are counted so the share of
+    terms answered from the glossary instead of the LLM can be reported.
+    """
+
+    def __init__(self, path: str, enabled: bool = True):
+        """
+        Initialize the glossary store
+
+        Args:
+            path: Path of the SQLite database file
+            enabled: Whether the glossary is used at all
+        """
+        self.path = path
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "misses": 0}
+        self._matchers: Dict[str, Tuple[Tuple[int, float], PatternMatcher]] = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS glossary (
+                term_key TEXT NOT NULL,
+                language TEXT NOT NULL,
+                term TEXT NOT NULL,
+                definition TEXT NOT NULL,
+                source_count INTEGER NOT NULL DEFAULT 1,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (term_key, language)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_glossary_language ON glossary (language, updated_at)")
+        self._conn.commit()
+
+    def lookup(self, terms: List[str], language: str) -> Dict[str, str]:
+        """
+        Look up the definitions of specific terms
+
+        Args:
+            terms: Terms to look up
+            language: Language of the terms
+
+        Returns:
+            Dictionary mapping each known term (as given) to its definition
+        """
+        if not self.enabled or not terms:
+            return {}
+
+        keys = {normalize_term(term): term for term in terms}
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT term_key, definition FROM glossary WHERE language = ? AND term_key IN ({placeholders})",
+                (language, *keys)
+            ).fetchall()
+            self._stats["lookups"] += len(keys)
+            self._stats["hits"] += len(rows)
+            self._stats["misses"] += len(keys) - len(rows)
+        return {keys[term_key]: definition for term_key, definition in rows}
+
+    def find_in_text(self, text: str, language: str, limit: Optional[int] = None) -> Dict[str, str]:
+        """
+        Find the glossary terms that occur in a text
+
+        Every occurrence is found in one scan with a multi-pattern matcher over all glossary
+        terms of the language, rebuilt only when new terms have been added.
+
+        Args:
+            text: Text to scan
+            language: Language of the text
+            limit: Maximum number of terms to return, most frequently used terms first
+
+        Returns:
+            Dictionary mapping each found term (as stored) to its definition
+        """
+        if not self.enabled or not text:
+            return {}
+
+        matcher = self._get_matcher(language)
+        found = {}
+        for _, _, payload in matcher.find_non_overlapping(text.lower()):
+            found.setdefault(payload[0], payload)
+        if not found:
+            return {}
+
+        # Usage counts change with every material, so they are read fresh instead of kept in the matcher
+        placeholders = ",".join("?" * len(found))
+        with self._lock:
+            counts = dict(self._conn.execute(
+                f"SELECT term_key, source_count FROM glossary WHERE language = ? AND term_key IN ({placeholders})",
+                (language, *found)
+            ))
+        ranked = sorted(found.values(), key=lambda entry: -counts.get(entry[0], 0))[:limit]
+
+        with self._lock:
+            self._stats["lookups"] += len(ranked)
+            self._stats["hits"] += len(ranked)
+        return {term: definition for _, term, definition in ranked}
+
+    def record_misses(self, count: int) -> None:
+        """Count terms that were not in the glossary and had to be defined by the LLM"""
+        with self._lock:
+            self._stats["lookups"] += count
+            self._stats["misses"] += count
+
+    def add(self, definitions: Dict[str, str], language: str) -> None:
+        """
+        Add the vocabulary of one material
+
+        New terms are inserted; for known terms the source count is increased and the stored
+        definition is kept.
+
+        Args:
+            definitions: Dictionary mapping terms to definitions
+            language: Language of the terms
+        """
+        if not self.enabled or not definitions:
+            return
+
+        now = time.time()
+        rows = [
+            (normalize_term(term), language, term.strip(), definition.strip(), now, now)
+            for term, definition in definitions.items()
+            if normalize_term(term) and definition.strip()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO glossary (term_key, language, term, definition, source_count, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 1, ?, ?) "
+                "ON CONFLICT(term_key, language) DO UPDATE SET source_count = source_count + 1, "
+                "updated_at = excluded.updated_at",
+                rows
+            )
+            self._conn.commit()
+
+    def size(self, language: Optional[str] = None) -> int:
+        """Count the glossary entries, optionally for one language"""
+        with self._lock:
+            if language is None:
+                return self._conn.execute("SELECT COUNT(*) FROM glossary").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM glossary WHERE language = ?", (language,)).fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get size and hit statistics for the glossary
+
+        Returns:
+            Dictionary with the entry count per language, lookups, hits, misses and hit rate
+        """
+        with self._lock:
+            by_language = dict(self._conn.execute("SELECT language, COUNT(*) FROM glossary GROUP BY language"))
+            stats = dict(self._stats)
+        return {
+            "enabled": self.enabled,
+            "entries": sum(by_language.values()),
+            "entries_by_language": by_language,
+            **stats,
+            "hit_rate": stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+        }
+
+    def _get_matcher(self, language: str) -> PatternMatcher:
+        """Get the matcher over all terms of a language, rebuilding it only if new terms were added"""
+        with self._lock:
+            # Known terms only change their count and updated_at, so the term set is identified by
+            # its size and newest creation time
+            version = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(MAX(created_at), 0) FROM glossary WHERE language = ?", (language,)
+            ).fetchone()
+            cached = self._matchers.get(language)
+            if cached and cached[0] == tuple(version):
+                return cached[1]
+
+            matcher = PatternMatcher()
+            for term_key, term, definition in self._conn.execute(
+                "SELECT term_key, term, definition FROM glossary WHERE language = ?", (language,)
+            ):
+                matcher.add(term_key, payload=(term_key, term, definition))
+            matcher.build()
+            self._matchers[language] = (tuple(version), matcher)
+            return matcher
+
+
+_glossary_instance: Optional[GlossaryStore] = None
+_glossary_lock = threading.Lock()
+
+
+def get_glossary_store(config: Optional[SystemConfig] = None) -> GlossaryStore:
+    """
+    Get the process-wide glossary store
+
+    Args:
+        config: System configuration
+
+    Returns:
+        Shared GlossaryStore instance
+    """
+    global _glossary_instance
+    with _glossary_lock:
+        if _glossary_instance is None:
+            config = config or SystemConfig()
+            _glossary_instance = GlossaryStore(
+                path=config.get("glossary.path") or "data/glossary/glossary.sqlite3",
+                enabled=bool(config.get("glossary.enabled"))
+            )
+        return _glossary_instance
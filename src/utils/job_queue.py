@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Durable job queue for AI4FairEdu
+SQLite-backed queue with time-limited leases, shared by the web process and any number of worker processes
+"""
+
+from typing import Dict, List, Any, Optional
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from src.config import SystemConfig
+from src.job_scheduler import QueueFullError
+
+# Queue entry statuses
+STATUS_QUEUED = "queued"
+STATUS_LEASED = "leased"
+STATUS_COMPLETE = "complete"
+STATUS_ERROR = "error"
+
+
+class DurableJobQueue:
+    """
+    Class for a multi-process job queue where workers lease jobs and must renew the lease while working
+
+    A job whose lease expires (because its worker died) becomes available to other workers again.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300.0, max_attempts: int = 3):
+        """
+        Initialize the queue
+
+        Args:
+            path: Path of the SQLite database file, which may live on storage shared between hosts
+            lease_seconds: How long a leased job stays reserved without a heartbeat
+            max_attempts: Number of leases after which an unfinished job is marked as failed
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Autocommit mode so that leasing can use an explicit write transaction
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_queue (
+                job_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                lease_owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                enqueued_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_job_queue_status ON job_queue (status, enqueued_at)")
+
+    def enqueue(self, job_id: str, payload: Dict[str, Any], max_queued: Optional[int] = None,
+                workers: int = 1) -> None:
+        """
+        Add a job to the queue, replacing any earlier entry with the same id
+
+        The capacity check and the insert run in one write transaction, so concurrent web
+        processes cannot overfill the queue between checking and adding.
+
+        Args:
+            job_id: Unique job identifier
+            payload: JSON-serialisable job arguments
+            max_queued: Number of waiting jobs at which new jobs are rejected, or None for no limit
+            workers: Number of worker processes, used to estimate the retry delay
+
+        Raises:
+            QueueFullError: If max_queued jobs are already waiting
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if max_queued is not None:
+                    queued = self._conn.execute(
+                        "SELECT COUNT(*) FROM job_queue WHERE status = ? AND job_id != ?", (STATUS_QUEUED, job_id)
+                    ).fetchone()[0]
+                    if queued >= max_queued:
+                        self._conn.execute("ROLLBACK")
+                        raise QueueFullError(self._retry_after(queued, max_queued, workers, 600.0, now))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO job_queue "
+                    "(job_id, payload, status, lease_owner, lease_expires, attempts, error, enqueued_at, updated_at) "
+                    "VALUES (?, ?, ?, NULL, NULL, 0, NULL, ?, ?)",
+                    (job_id, json.dumps(payload, ensure_ascii=False, default=str), STATUS_QUEUED, now, now)
+                )
+                self._conn.execute("COMMIT")
+            except QueueFullError:
+                raise
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def abandon_expired(self) -> List[Dict[str, Any]]:
+        """
+        Give up on jobs whose lease expired max_attempts times, because their workers kept dying
+
+        Returns:
+            The given-up jobs, each with job_id and payload, so the caller can record their failure
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT job_id, payload FROM job_queue WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                    (STATUS_LEASED, now, self.max_attempts)
+                ).fetchall()
+                self._conn.execute(
+                    "UPDATE job_queue SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, "
+                    "updated_at = ? WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                    (STATUS_ERROR, "Lease expired too many times", now, STATUS_LEASED, now, self.max_attempts)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [{"job_id": job_id, "payload": json.loads(payload)} for job_id, payload in rows]
+
+    def lease(self, owner: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically claim the oldest available job
+
+        Available jobs are queued jobs and leased jobs whose lease has expired with attempts left;
+        jobs out of attempts are left for abandon_expired.
+
+        Args:
+            owner: Identifier of the worker taking the lease
+
+        Returns:
+            Dictionary with job_id, payload and attempts, or None if no job is available
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT job_id, payload, attempts FROM job_queue "
+                    "WHERE status = ? OR (status = ? AND lease_expires < ? AND attempts < ?) "
+                    "ORDER BY enqueued_at LIMIT 1",
+                    (STATUS_QUEUED, STATUS_LEASED, now, self.max_attempts)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+
+                job_id, payload, attempts = row
+                self._conn.execute(
+                    "UPDATE job_queue SET status = ?, lease_owner = ?, lease_expires = ?, attempts = ?, updated_at = ? "
+                    "WHERE job_id = ?",
+                    (STATUS_LEASED, owner, now + self.lease_seconds, attempts + 1, now, job_id)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return {"job_id": job_id, "payload": json.loads(payload), "attempts": attempts + 1}
+
+    def heartbeat(self, job_id: str, owner: str) -> bool:
+        """
+        Extend the lease on a job
+
+        Args:
+            job_id: Unique job identifier
+            owner: Worker holding the lease
+
+        Returns:
+            True if the lease is still held by this worker
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE job_queue SET lease_expires = ?, updated_at = ? "
+                "WHERE job_id = ? AND lease_owner = ? AND status = ?",
+                (now + self.lease_seconds, now, job_id, owner, STATUS_LEASED)
+            )
+            return cursor.rowcount > 0
+
+    def complete(self, job_id: str, owner: str) -> None:
+        """Mark a leased job as successfully finished"""
+        self._finish(job_id, owner, STATUS_COMPLETE, None)
+
+    def fail(self, job_id: str, owner: str, error: str) -> None:
+        """Mark a leased job as failed"""
+        self._finish(job_id, owner, STATUS_ERROR, error)
+
+    def _finish(self, job_id: str, owner: str, status: str, error: Optional[str]) -> None:
+        """Record the outcome of a job if the worker still holds its lease"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE job_queue SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE job_id = ? AND lease_owner = ?",
+                (status, error, time.time(), job_id, owner)
+            )
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the status of a job
+
+        Args:
+            job_id: Unique job identifier
+
+        Returns:
+            Dictionary with the status, attempts, error and, for queued jobs, the 1-based
+            queue position, or None if the job is unknown
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, attempts, error, enqueued_at FROM job_queue WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            status, attempts, error, enqueued_at = row
+            result = {"status": status, "attempts": attempts, "error": error}
+            if status == STATUS_QUEUED:
+                ahead = self._conn.execute(
+                    "SELECT COUNT(*) FROM job_queue WHERE status = ? AND enqueued_at < ?",
+                    (STATUS_QUEUED, enqueued_at)
+                ).fetchone()[0]
+                result["queue_position"] = ahead + 1
+            return result
+
+    def get_queue_position(self, job_id: str) -> Optional[int]:
+        """Get the 1-based queue position of a waiting job, or None if it is not waiting"""
+        status = self.get_status(job_id)
+        return status.get("queue_position") if status else None
+
+    def count(self, status: str = STATUS_QUEUED) -> int:
+        """Count the jobs with the given status"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM job_queue WHERE status = ?", (status,)).fetchone()[0]
+
+    def retry_after(self, max_queued: int, workers: int, window_seconds: float = 600.0) -> int:
+        """
+        Estimate how many seconds a client rejected because the queue is full should wait before retrying
+
+        Throughput is measured from the jobs the workers finished within the window; before any job
+        has finished, each worker is assumed to finish one job per lease period.
+
+        Args:
+            max_queued: Number of waiting jobs at which new jobs are rejected
+            workers: Number of worker processes leasing from this queue
+            window_seconds: How far back finished jobs are counted
+
+        Returns:
+            Seconds until a queue slot is expected to free up
+        """
+        now = time.time()
+        with self._lock:
+            queued = self._conn.execute(
+                "SELECT COUNT(*) FROM job_queue WHERE status = ?", (STATUS_QUEUED,)
+            ).fetchone()[0]
+            return self._retry_after(queued, max_queued, workers, window_seconds, now)
+
+    def _retry_after(self, queued: int, max_queued: int, workers: int, window_seconds: float, now: float) -> int:
+        """Estimate the retry delay for the given queue length (caller holds the lock)"""
+        finished = self._conn.execute(
+            "SELECT COUNT(*) FROM job_queue WHERE status IN (?, ?) AND updated_at >= ?",
+            (STATUS_COMPLETE, STATUS_ERROR, now - window_seconds)
+        ).fetchone()[0]
+
+        jobs_per_second = finished / window_seconds if finished else max(1, workers) / self.lease_seconds
+        # Jobs that must leave the queue before a new one fits
+        excess = max(1, queued - max_queued + 1)
+        return max(1, math.ceil(excess / jobs_per_second))
+
+    def purge_finished(self, older_than_seconds: float) -> int:
+        """
+        Remove finished jobs older than the given age
+
+        Returns:
+            Number of removed jobs
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM job_queue WHERE status IN (?, ?) AND updated_at < ?",
+                (STATUS_COMPLETE, STATUS_ERROR, time.time() - older_than_seconds)
+            )
+            return cursor.rowcount
+
+
+_queue_instance: Optional[DurableJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue(config: Optional[SystemConfig] = None) -> DurableJobQueue:
+    """
+    Get the process-wide durable job queue
+
+    Args:
+        config: System configuration
+
+    Returns:
+        Shared DurableJobQueue instance
+    """
+    global _queue_instance
+    with _queue_lock:
+        if _queue_instance is None:
+            config = config or SystemConfig()
+            _queue_instance = DurableJobQueue(
+                path=config.get("jobs.queue_path") or "data/jobs/job_queue.sqlite3",
+                lease_seconds=config.get("jobs.lease_seconds") or 300.0,
+                max_attempts=config.get("jobs.max_attempts") or 3
+            )
+        return _queue_instance
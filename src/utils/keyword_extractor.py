@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Local keyword extractor for AI4FairEdu
+Finds highlight elements with TF-IDF term weighting and TextRank sentence ranking, without an LLM call
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+from collections import Counter
+import re
+import numpy as np
+from src.utils.source_retriever import STOP_WORDS
+
+# Additional function words that never start or end a key phrase
+PHRASE_STOP_WORDS = STOP_WORDS | {
+    "about", "after", "all", "also", "any", "because", "been", "before", "being", "between", "both", "but",
+    "can", "could", "did", "do", "does", "each", "even", "every", "first", "how", "if", "into", "just",
+    "many", "may", "more", "most", "much", "must", "new", "no", "not", "now", "only", "other", "our",
+    "over", "same", "should", "so", "some", "such", "than", "their", "them", "then", "there", "these",
+    "they", "those", "through", "thus", "under", "up", "use", "used", "using", "very", "we", "what",
+    "when", "where", "while", "who", "why", "would", "you", "your"
+}
+
+_SENTENCE_PATTERN = re.compile(r"[^.!?。！？\n]+[.!?。！？]*")
+_CLAUSE_PATTERN = re.compile(r"[,;:()\"“”，；：（）、]")
+_TOKEN_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9\-]*|[一-鿿]+")
+_DEFINITION_PATTERN = re.compile(
+    r"^\s*(?:(?:A|An|The)\s+)?((?:[A-Za-z][\w\-]*\s+){0,2}[A-Za-z][\w\-]*)\s+(?:is defined as|refers to|is|are)\s+([^.!?]+)"
+)
+
+
+class KeywordExtractor:
+    """
+    Class for extracting highlight elements from a text locally
+
+    Candidate terms are words and phrases of up to three words (character bigrams for Chinese).
+    Terms are weighted by TF-IDF and boosted by the TextRank score of the sentences they occur in.
+    The IDF comes from the corpus statistics of all uploaded materials once the corpus is large
+    enough; before that each sentence of the text acts as a document.
+    """
+
+    def __init__(self,
+                 max_phrase_words: int = 3,
+                 min_tokens: int = 40,
+                 damping: float = 0.85,
+                 iterations: int = 30,
+                 max_textrank_sentences: int = 500,
+                 max_ranked_terms: int = 50,
+                 corpus: Optional[Any] = None,
+                 min_corpus_documents: int = 3):
+        """
+        Initialize the extractor
+
+        Args:
+            max_phrase_words: Longest candidate phrase in words
+            min_tokens: Number of tokens below which the confidence is scaled down
+            damping: TextRank damping factor
+            iterations: Number of TextRank power iterations
+            max_textrank_sentences: Largest number of sentences ranked with TextRank
+            max_ranked_terms: Number of top-scoring terms considered for the elements
+            corpus: CorpusStats instance used for the IDF
+            min_corpus_documents: Number of corpus documents needed before the corpus IDF is used
+        """
+        self.max_phrase_words = max_phrase_words
+        self.min_tokens = min_tokens
+        self.damping = damping
+        self.iterations = iterations
+        self.max_textrank_sentences = max_textrank_sentences
+        self.max_ranked_terms = max_ranked_terms
+        self.corpus = corpus
+        self.min_corpus_documents = min_corpus_documents
+
+    def extract(self, content: str) -> Dict[str, Any]:
+        """
+        Extract the elements to highlight in a text
+
+        Args:
+            content: The learning content to analyze
+
+        Returns:
+            Dictionary with "elements" (highlight types mapped to element lists) and
+            "confidence" (0-1, how clearly the top terms stand out from the rest)
+        """
+        elements = {"primary": [], "secondary": [], "key_concepts": [], "definitions": []}
+        sentences = [match.group(0).strip() for match in _SENTENCE_PATTERN.finditer(content)]
+        sentences = [sentence for sentence in sentences if sentence]
+        if not sentences:
+            return {"elements": elements, "confidence": 0.0}
+
+        surface_forms, rows, cols, token_count = self._collect_terms(sentences)
+        if not surface_forms:
+            return {"elements": elements, "confidence": 0.0}
+
+        keys = list(surface_forms)
+        rows, cols = np.asarray(rows), np.asarray(cols)
+        term_frequency = np.bincount(cols, minlength=len(keys)).astype(np.float32)
+
+        # Each (sentence, term) pair counts once towards the document frequency
+        pairs = np.unique(rows * len(keys) + cols)
+        pair_rows, pair_cols = pairs // len(keys), pairs % len(keys)
+        document_frequency = np.bincount(pair_cols, minlength=len(keys))
+
+        idf = self._idf(keys, document_frequency, len(sentences))
+        sentence_ranks = self._textrank(rows, cols, idf, len(sentences))
+
+        word_counts = np.array([len(key.split()) if key.isascii() else 1 for key in keys], dtype=np.float32)
+        sentence_support = np.bincount(pair_cols, weights=sentence_ranks[pair_rows], minlength=len(keys))
+        term_scores = term_frequency * idf * np.sqrt(word_counts) * (1.0 + sentence_support)
+
+        order = np.argsort(-term_scores, kind="stable")[:self.max_ranked_terms]
+        ranked_terms = self._drop_nested_terms([surface_forms[keys[i]] for i in order])
+
+        for term in ranked_terms[:5]:
+            elements["primary"].append({"text": term, "metadata": {"importance": "high"}})
+        for term in [term for term in ranked_terms if " " in term or not term.isascii()][:3] or ranked_terms[:2]:
+            elements["key_concepts"].append({"text": term, "metadata": {"importance": "high"}})
+
+        for index in np.argsort(-sentence_ranks, kind="stable")[:2]:
+            if len(sentences) > 2 and len(sentences[index]) <= 200:
+                elements["secondary"].append({"text": sentences[index], "metadata": {"importance": "medium"}})
+
+        top_terms = {term.lower() for term in ranked_terms[:10]}
+        for sentence in sentences:
+            match = _DEFINITION_PATTERN.match(sentence)
+            if match and match.group(1).lower() in top_terms:
+                elements["definitions"].append({
+                    "text": match.group(1),
+                    "metadata": {"definition": match.group(2).strip()}
+                })
+        elements["definitions"] = elements["definitions"][:4]
+
+        return {"elements": elements, "confidence": self._confidence(term_scores, token_count)}
+
+    def count_terms(self, content: str) -> Dict[str, int]:
+        """
+        Count the candidate terms of a text
+
+        Args:
+            content: Text to count
+
+        Returns:
+            Dictionary mapping lowercase terms to their number of occurrences
+        """
+        sentences = [match.group(0) for match in _SENTENCE_PATTERN.finditer(content)]
+        surface_forms, _, cols, _ = self._collect_terms(sentences)
+        keys = list(surface_forms)
+        return {keys[index]: count for index, count in Counter(cols).items()}
+
+    def _collect_terms(self, sentences: List[str]) -> Tuple[Dict[str, str], List[int], List[int], int]:
+        """
+        Find the candidate terms of every sentence
+
+        Args:
+            sentences: Sentences of the text
+
+        Returns:
+            Tuple of (lowercase term -> first surface form, sentence index per occurrence,
+            term index per occurrence, total number of tokens)
+        """
+        surface_forms: Dict[str, str] = {}
+        term_index: Dict[str, int] = {}
+        rows, cols = [], []
+        token_count = 0
+
+        for row, sentence in enumerate(sentences):
+            for clause in _CLAUSE_PATTERN.split(sentence):
+                tokens = _TOKEN_PATTERN.findall(clause)
+                token_count += len(tokens)
+                for candidate in self._candidates(tokens):
+                    key = candidate.lower()
+                    if key not in term_index:
+                        term_index[key] = len(term_index)
+                        surface_forms[key] = candidate
+                    rows.append(row)
+                    cols.append(term_index[key])
+        return surface_forms, rows, cols, token_count
+
+    def _candidates(self, tokens: List[str]) -> List[str]:
+        """
+        Generate the candidate terms of a tokenized clause
+
+        Phrases are runs of up to max_phrase_words consecutive content words, so they never
+        contain a stop word.
+        """
+        candidates = []
+        run: List[str] = []
+        for token in tokens + [""]:
+            if token and not token.isascii():
+                # Chinese runs have no word boundaries, so character bigrams stand in for words
+                candidates.extend(token[i:i + 2] for i in range(max(1, len(token) - 1)))
+                token = ""
+            if token and token.lower() not in PHRASE_STOP_WORDS and len(token) >= 3:
+                run.append(token)
+                continue
+            for start in range(len(run)):
+                for length in range(1, min(self.max_phrase_words, len(run) - start) + 1):
+                    candidates.append(" ".join(run[start:start + length]))
+            run = []
+        return candidates
+
+    def _idf(self, terms: List[str], document_frequency: np.ndarray, sentence_count: int) -> np.ndarray:
+        """
+        Compute the inverse document frequency of every term
+
+        Uses the corpus statistics when the corpus has enough documents, otherwise treats the
+        sentences of the text as documents.
+
+        Args:
+            terms: Lowercase terms in column order
+            document_frequency: Number of sentences containing each term
+            sentence_count: Number of sentences in the text
+
+        Returns:
+            IDF weight per term
+        """
+        if self.corpus is not None and self.corpus.document_count >= self.min_corpus_documents:
+            return self.corpus.idf(terms)
+        return np.log((1.0 + sentence_count) / (1.0 + document_frequency)) + 1.0
+
+    def _textrank(self, rows: np.ndarray, cols: np.ndarray, idf: np.ndarray, sentence_count: int) -> np.ndarray:
+        """
+        Rank sentences by TextRank over their cosine similarity graph
+
+        Texts with more than max_textrank_sentences sentences get uniform ranks, as the
+        similarity matrix grows quadratically.
+
+        Args:
+            rows: Sentence index of every term occurrence
+            cols: Term index of every term occurrence
+            idf: IDF weight per term
+            sentence_count: Number of sentences in the text
+
+        Returns:
+            Score per sentence, summing to 1
+        """
+        if sentence_count == 1 or sentence_count > self.max_textrank_sentences:
+            return np.full(sentence_count, 1.0 / sentence_count, dtype=np.float32)
+
+        # TF-IDF weighted sentence-term matrix
+        weighted = np.zeros((sentence_count, len(idf)), dtype=np.float32)
+        np.add.at(weighted, (rows, cols), 1.0)
+        weighted *= idf
+
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        normalized = weighted / np.maximum(norms, 1e-9)
+        similarity = normalized @ normalized.T
+        np.fill_diagonal(similarity, 0.0)
+
+        out_weight = similarity.sum(axis=1, keepdims=True)
+        transition = np.divide(similarity, out_weight, out=np.zeros_like(similarity), where=out_weight > 0)
+
+        ranks = np.full(sentence_count, 1.0 / sentence_count, dtype=np.float32)
+        for _ in range(self.iterations):
+            ranks = (1.0 - self.damping) / sentence_count + self.damping * (transition.T @ ranks)
+        return ranks / ranks.sum()
+
+    def _confidence(self, term_scores: np.ndarray, token_count: int) -> float:
+        """
+        Estimate how trustworthy the extracted terms are
+
+        The score is high when the top terms clearly stand out from the average term and the text
+        is long enough for the statistics to mean something.
+
+        Args:
+            term_scores: Score per candidate term
+            token_count: Number of tokens in the text
+
+        Returns:
+            Confidence between 0 and 1
+        """
+        if len(term_scores) < 3:
+            return 0.0
+        top = np.sort(term_scores)[::-1][:5]
+        separation = 1.0 - float(term_scores.mean()) / float(top.mean())
+        coverage = min(1.0, token_count / self.min_tokens)
+        return round(max(0.0, separation) * coverage, 3)
+
+    @staticmethod
+    def _drop_nested_terms(terms: List[str]) -> List[str]:
+        """Remove terms contained in a higher-ranked term, keeping rank order"""
+        kept: List[str] = []
+        for term in terms:
+            lowered = term.lower()
+            if not any(lowered in other.lower() or other.lower() in lowered for other in kept):
+                kept.append(term)
+        return kept
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Word lexicon for AI4FairEdu
+Familiar-word ranks and a synonym table held in sorted NumPy arrays, for local complex-word detection and substitution
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import os
+import re
+import threading
+import numpy as np
+
+# Directory with the bundled word lists
+RESOURCES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources")
+
+_WORD_PATTERN = re.compile(r"[A-Za-z]+(?:'[a-z]+)?")
+_VOWEL_GROUP_PATTERN = re.compile(r"[aeiouy]+")
+
+# Suffixes stripped to find the base form of an inflected word, with the text put back
+_INFLECTIONS: Tuple[Tuple[str, str], ...] = (
+    ("ies", "y"), ("ied", "y"), ("ing", ""), ("ing", "e"), ("ed", ""), ("ed", "e"),
+    ("es", ""), ("s", ""), ("ly", ""), ("er", ""), ("est", "")
+)
+
+
+def estimate_syllables(words: List[str]) -> np.ndarray:
+    """
+    Estimate the number of syllables of English words
+
+    Counts groups of vowels, not counting a silent final "e"; every word has at least one syllable.
+
+    Args:
+        words: Lowercase words
+
+    Returns:
+        Syllable estimate per word
+    """
+    counts = np.fromiter((len(_VOWEL_GROUP_PATTERN.findall(word)) for word in words), dtype=np.int32, count=len(words))
+    silent_e = np.fromiter(
+        (word.endswith("e") and not word.endswith(("le", "ee", "ye")) for word in words), dtype=bool, count=len(words)
+    )
+    return np.maximum(1, counts - (silent_e & (counts > 1)))
+
+
+def _sorted_lookup(keys: np.ndarray, words: np.ndarray) -> np.ndarray:
+    """Find each word in a sorted key array, returning its index or -1"""
+    if len(keys) == 0 or len(words) == 0:
+        return np.full(len(words), -1, dtype=np.int64)
+    positions = np.searchsorted(keys, words)
+    positions = np.minimum(positions, len(keys) - 1)
+    return np.where(keys[positions] == words, positions, -1)
+
+
+class Lexicon:
+    """
+    Class for looking up word familiarity and simpler synonyms
+
+    Familiar words are kept as a sorted array with a parallel array of frequency ranks and the
+    synonym table as a sorted key array with a parallel value array, so a whole text's words are
+    looked up at once with binary search.
+    """
+
+    def __init__(self, familiar_words: List[str], synonyms: Dict[str, str],
+                 min_complex_syllables: int = 3, min_complex_length: int = 10):
+        """
+        Initialize the lexicon
+
+        Args:
+            familiar_words: Familiar words, most frequent first
+            synonyms: Dictionary mapping complex words to simpler replacements
+            min_complex_syllables: Syllable count from which an unfamiliar word is complex
+            min_complex_length: Length from which an unfamiliar word is complex
+        """
+        words = np.array([word.lower() for word in familiar_words], dtype=str)
+        order = np.argsort(words, kind="stable")
+        self._words = words[order]
+        self._ranks = order.astype(np.int32)
+
+        synonym_keys = np.array([key.lower() for key in synonyms], dtype=str)
+        synonym_values = np.array(list(synonyms.values()), dtype=str)
+        order = np.argsort(synonym_keys, kind="stable")
+        self._synonym_keys = synonym_keys[order]
+        self._synonym_values = synonym_values[order]
+
+        self.min_complex_syllables = min_complex_syllables
+        self.min_complex_length = min_complex_length
+
+    @classmethod
+    def load(cls, directory: str = RESOURCES_DIR, language: str = "en") -> "Lexicon":
+        """
+        Load the bundled word lists of a language
+
+        Args:
+            directory: Directory with <language>_familiar_words.txt and <language>_synonyms.tsv
+            language: Language code
+
+        Returns:
+            Lexicon instance
+        """
+        familiar_words = []
+        with open(os.path.join(directory, f"{language}_familiar_words.txt"), encoding="utf-8") as f:
+            for line in f:
+                word = line.strip()
+                if word and not word.startswith("#"):
+                    familiar_words.append(word)
+
+        synonyms = {}
+        with open(os.path.join(directory, f"{language}_synonyms.tsv"), encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("#") or "\t" not in line:
+                    continue
+                word, replacement = line.rstrip("\n").split("\t", 1)
+                synonyms[word.strip()] = replacement.strip()
+
+        return cls(familiar_words, synonyms)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def ranks(self, words: np.ndarray) -> np.ndarray:
+        """
+        Get the familiarity rank of each word, trying base forms of inflected words
+
+        Args:
+            words: Array of lowercase words
+
+        Returns:
+            Rank per word (0 is the most familiar), -1 for unfamiliar words
+        """
+        words = np.asarray(words, dtype=str)
+        indices = _sorted_lookup(self._words, words)
+        ranks = np.where(indices >= 0, self._ranks[np.maximum(indices, 0)], -1)
+
+        for suffix, replacement in _INFLECTIONS:
+            missing = np.flatnonzero((ranks < 0) & (np.char.str_len(words) > len(suffix) + 2)
+                                     & np.char.endswith(words, suffix))
+            if len(missing) == 0:
+                continue
+            stems = np.char.add(np.array([word[:-len(suffix)] for word in words[missing]], dtype=str), replacement)
+            stem_indices = _sorted_lookup(self._words, stems)
+            found = stem_indices >= 0
+            ranks[missing[found]] = self._ranks[stem_indices[found]]
+        return ranks
+
+    def synonyms(self, words: np.ndarray) -> np.ndarray:
+        """
+        Get the simpler replacement of each word
+
+        Args:
+            words: Array of lowercase words
+
+        Returns:
+            Replacement per word, empty string for words without one
+        """
+        words = np.asarray(words, dtype=str)
+        indices = _sorted_lookup(self._synonym_keys, words)
+        if len(self._synonym_values) == 0:
+            return np.full(len(words), "", dtype=str)
+        return np.where(indices >= 0, self._synonym_values[np.maximum(indices, 0)], "")
+
+    def complex_mask(self, words: np.ndarray) -> np.ndarray:
+        """
+        Decide which words are likely hard to decode
+
+        A word is complex if it has a simpler synonym, or if it is unfamiliar and long
+        (many syllables or many letters).
+
+        Args:
+            words: Array of lowercase words
+
+        Returns:
+            Boolean mask of complex words
+        """
+        words = np.asarray(words, dtype=str)
+        if len(words) == 0:
+            return np.zeros(0, dtype=bool)
+        unfamiliar = self.ranks(words) < 0
+        long_words = ((estimate_syllables(list(words)) >= self.min_complex_syllables)
+                      | (np.char.str_len(words) >= self.min_complex_length))
+        return (unfamiliar & long_words) | (self.synonyms(words) != "")
+
+
+def substitute_vocabulary(text: str, lexicon: Lexicon) -> Dict[str, Any]:
+    """
+    Replace complex words with simpler synonyms and list the complex words left in place
+
+    Every distinct word is looked up once. Only exact word forms are replaced, so inflected
+    forms keep their grammar and are listed as complex words instead.
+
+    Args:
+        text: English text
+        lexicon: Lexicon to use
+
+    Returns:
+        Dictionary with the substituted "content", the "substitutions" as
+        [start, end, original, replacement] spans in the original text, and the distinct
+        "complex_words" without a replacement, in order of appearance
+    """
+    matches = list(_WORD_PATTERN.finditer(text))
+    if not matches:
+        return {"content": text, "substitutions": [], "complex_words": []}
+
+    unique_words, inverse = np.unique(np.array([match.group(0).lower() for match in matches], dtype=str),
+                                      return_inverse=True)
+    is_complex = lexicon.complex_mask(unique_words)
+    replacements = lexicon.synonyms(unique_words)
+
+    pieces: List[str] = []
+    substitutions = []
+    complex_words: Dict[str, None] = {}
+    last_end = 0
+    for position in np.flatnonzero(is_complex[inverse]):
+        match = matches[position]
+        replacement = str(replacements[inverse[position]])
+        if not replacement:
+            complex_words.setdefault(str(unique_words[inverse[position]]))
+            continue
+        original = match.group(0)
+        if original[0].isupper():
+            replacement = replacement[0].upper() + replacement[1:]
+        pieces.append(text[last_end:match.start()])
+        pieces.append(replacement)
+        substitutions.append([match.start(), match.end(), original, replacement])
+        last_end = match.end()
+    pieces.append(text[last_end:])
+
+    return {"content": "".join(pieces), "substitutions": substitutions, "complex_words": list(complex_words)}
+
+
+_lexicons: Dict[str, Lexicon] = {}
+_lexicon_lock = threading.Lock()
+
+
+def get_lexicon(language: str = "en") -> Optional[Lexicon]:
+    """
+    Get the process-wide lexicon of a language
+
+    Args:
+        language: Language code
+
+    Returns:
+        Shared Lexicon instance, or None if no word lists exist for the language
+    """
+    with _lexicon_lock:
+        if language not in _lexicons:
+            try:
+                _lexicons[language] = Lexicon.load(language=language)
+            except FileNotFoundError:
+                return None
+        return _lexicons[language]
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+LLM response cache for AI4FairEdu
+Content-addressed, SQLite-backed cache for LLM responses with LRU and per-node TTL eviction
+"""
+
+from typing import Dict, List, Any, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from src.config import SystemConfig
+
+
+class LLMResponseCache:
+    """
+    Class for caching LLM responses on disk, keyed by a hash of the model, its parameters and the rendered prompt
+    """
+
+    def __init__(self,
+                 path: str,
+                 max_bytes: int = 256 * 1024 * 1024,
+                 default_ttl: Optional[float] = None,
+                 node_ttls: Optional[Dict[str, float]] = None,
+                 disabled_nodes: Optional[List[str]] = None,
+                 enabled: bool = True):
+        """
+        Initialize the response cache
+
+        Args:
+            path: Path of the SQLite database file
+            max_bytes: Maximum total size of cached responses before LRU eviction
+            default_ttl: Default time-to-live in seconds (None means never expire)
+            node_ttls: Per-node time-to-live overrides in seconds
+            disabled_nodes: Nodes that should bypass the cache entirely
+            enabled: Whether the cache is enabled at all
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.node_ttls = node_ttls or {}
+        self.disabled_nodes = set(disabled_nodes or [])
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                node TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        self._total_bytes = row[0]
+
+    @staticmethod
+    def make_key(model_params: Dict[str, Any], messages: List[List[str]]) -> str:
+        """
+        Build the content address for a request
+
+        Args:
+            model_params: Model name and generation parameters
+            messages: Fully rendered prompt as a list of [role, content] pairs
+
+        Returns:
+            Hex digest identifying the request
+        """
+        payload = json.dumps({"params": model_params, "messages": messages},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def is_enabled_for(self, node: str) -> bool:
+        """Check whether caching is active for the given node"""
+        return self.enabled and node not in self.disabled_nodes
+
+    def get(self, key: str, node: str) -> Optional[str]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Content address of the request
+            node: Name of the pipeline node issuing the request
+
+        Returns:
+            The cached response text, or None on a miss
+        """
+        if not self.is_enabled_for(node):
+            return None
+
+        now = time.time()
+        ttl = self.node_ttls.get(node, self.default_ttl)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, size, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self._record(node, "misses")
+                return None
+
+            response, size, created_at = row
+            if ttl is not None and now - created_at > ttl:
+                # Entry is stale for this node, drop it and treat as a miss
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self._total_bytes -= size
+                self._record(node, "expired")
+                self._record(node, "misses")
+                return None
+
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._record(node, "hits")
+            return response
+
+    def put(self, key: str, node: str, response: str) -> None:
+        """
+        Store a response and evict least recently used entries if the cache is over budget
+
+        Args:
+            key: Content address of the request
+            node: Name of the pipeline node issuing the request
+            response: Response text to store
+        """
+        if not self.is_enabled_for(node):
+            return
+
+        now = time.time()
+        size = len(response.encode("utf-8"))
+
+        with self._lock:
+            existing = self._conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if existing:
+                self._total_bytes -= existing[0]
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, node, response, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, node, response, size, now, now)
+            )
+            self._total_bytes += size
+            self._record(node, "stores")
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes (caller holds the lock)"""
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        cursor = self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access ASC")
+        to_delete = []
+        for key, size in cursor:
+            if self._total_bytes <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            self._total_bytes -= size
+
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", to_delete)
+        for _ in to_delete:
+            self._record("_cache", "evictions")
+
+    def _record(self, node: str, counter: str) -> None:
+        """Increment a statistics counter (caller holds the lock)"""
+        node_stats = self._stats.setdefault(node, {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0})
+        node_stats[counter] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss statistics for the cache
+
+        Returns:
+            Dictionary with totals, per-node counters, entry count and stored bytes
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            by_node = {node: dict(counters) for node, counters in self._stats.items() if node != "_cache"}
+            hits = sum(counters["hits"] for counters in by_node.values())
+            misses = sum(counters["misses"] for counters in by_node.values())
+            return {
+                "enabled": self.enabled,
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "evictions": self._stats.get("_cache", {}).get("evictions", 0),
+                "by_node": by_node
+            }
+
+    def clear(self) -> None:
+        """Remove every cached response"""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+            self._total_bytes = 0
+
+
+def _parse_node_ttls(value: str) -> Dict[str, float]:
+    """Parse 'node=seconds,node=seconds' into a dictionary"""
+    ttls = {}
+    for item in (value or "").split(","):
+        if "=" not in item:
+            continue
+        node, seconds = item.split("=", 1)
+        try:
+            ttls[node.strip()] = float(seconds)
+        except ValueError:
+            print(f"Invalid cache TTL for node {node.strip()}: {seconds}")
+    return ttls
+
+
+_cache_instance: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache(config: Optional[SystemConfig] = None) -> LLMResponseCache:
+    """
+    Get the process-wide LLM response cache
+
+    Args:
+        config: System configuration
+
+    Returns:
+        Shared LLMResponseCache instance
+    """
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is None:
+            config = config or SystemConfig()
+            default_ttl = config.get("cache.default_ttl_seconds")
+            _cache_instance = LLMResponseCache(
+                path=config.get("cache.path") or "data/cache/llm_cache.sqlite3",
+                max_bytes=int((config.get("cache.max_size_mb") or 256) * 1024 * 1024),
+                default_ttl=default_ttl if default_ttl and default_ttl > 0 else None,
+                node_ttls=_parse_node_ttls(config.get("cache.node_ttls")),
+                disabled_nodes=[n.strip() for n in (config.get("cache.disabled_nodes") or "").split(",") if n.strip()],
+                enabled=bool(config.get("cache.enabled"))
+            )
+        return _cache_instance
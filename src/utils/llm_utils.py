@@ -1,33 +1,223 @@
 """LLM配置与实例化工具"""
 
+import asyncio
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import httpx
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.prompt_values import PromptValue
 from langchain_openai import ChatOpenAI
 from src.config import SystemConfig
+from src.utils.llm_cache import LLMResponseCache, get_llm_cache
+
+# 进程级LLM客户端注册表
+# 键为 (model, temperature, max_tokens, base_url, api_key)，值为共享的ChatOpenAI实例
+_llm_registry: Dict[Tuple, ChatOpenAI] = {}
+_registry_lock = threading.Lock()
+_registry_stats = {"created": 0, "reused": 0}
+
 
-def get_llm(config: SystemConfig = None):
+def _build_http_clients(config: SystemConfig) -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """创建带连接池和keep-alive的HTTP客户端"""
+    limits = httpx.Limits(
+        max_connections=config.get("llm.max_connections") or 20,
+        max_keepalive_connections=config.get("llm.max_keepalive_connections") or 10,
+        keepalive_expiry=config.get("llm.keepalive_expiry") or 60.0
+    )
+    timeout = httpx.Timeout(config.get("llm.timeout") or 120.0)
+    return (
+        httpx.Client(limits=limits, timeout=timeout),
+        httpx.AsyncClient(limits=limits, timeout=timeout)
+    )
+
+
+def get_llm(config: SystemConfig = None, **overrides: Any) -> ChatOpenAI:
     """
     根据配置获取LLM实例
-    
+
+    相同 (model, temperature, max_tokens, base_url, api_key) 的调用共享同一个客户端，
+    避免每次节点调用都重新创建客户端并进行TLS握手。ChatOpenAI实例是线程安全的，
+    可以在多个工作线程之间共享。
+
     Args:
         config: 系统配置实例，如果为None则创建新实例
-        
+        **overrides: 覆盖配置中的参数（如temperature、max_tokens）
+
     Returns:
         初始化好的ChatOpenAI实例
     """
     if config is None:
         config = SystemConfig()
-    
+
     # 从配置中获取LLM设置
-    model = config.get("llm.model")
-    temperature = config.get("llm.temperature")
-    max_tokens = config.get("llm.max_tokens")
-    base_url = config.get("llm.base_url")
+    params = {
+        "model": config.get("llm.model"),
+        "temperature": config.get("llm.temperature"),
+        "max_tokens": config.get("llm.max_tokens"),
+        "base_url": config.get("llm.base_url")
+    }
+    params.update(overrides)
     api_key = config.get("llm.api_key")
+    key = (params["model"], params["temperature"], params["max_tokens"], params["base_url"], api_key)
+
+    with _registry_lock:
+        llm = _llm_registry.get(key)
+        if llm is not None:
+            _registry_stats["reused"] += 1
+            return llm
+
+        http_client, http_async_client = _build_http_clients(config)
+
+        # 创建并缓存LLM实例
+        llm = ChatOpenAI(
+            api_key=api_key,
+            model=params["model"],
+            temperature=params["temperature"],
+            max_tokens=params["max_tokens"],
+            base_url=params["base_url"],
+            http_client=http_client,
+            http_async_client=http_async_client
+        )
+        _llm_registry[key] = llm
+        _registry_stats["created"] += 1
+        return llm
+
+
+def _render_prompt(prompt: Any) -> List[List[str]]:
+    """将字符串、PromptValue或消息列表渲染为 [角色, 内容] 列表"""
+    if isinstance(prompt, str):
+        messages = [HumanMessage(content=prompt)]
+    elif isinstance(prompt, PromptValue):
+        messages = prompt.to_messages()
+    else:
+        messages = list(prompt)
+    return [
+        [message.type, message.content if isinstance(message.content, str) else str(message.content)]
+        if isinstance(message, BaseMessage) else ["raw", str(message)]
+        for message in messages
+    ]
+
+
+def _cache_key(cache: LLMResponseCache, llm: ChatOpenAI, prompt: Any) -> str:
+    """由模型、生成参数和完整渲染后的提示计算缓存键"""
+    model_params = {
+        "model": getattr(llm, "model_name", None),
+        "temperature": getattr(llm, "temperature", None),
+        "max_tokens": getattr(llm, "max_tokens", None),
+        "base_url": getattr(llm, "openai_api_base", None)
+    }
+    return cache.make_key(model_params, _render_prompt(prompt))
+
+
+def invoke_llm(llm: ChatOpenAI, prompt: Any, node: str, cache: Optional[LLMResponseCache] = None) -> AIMessage:
+    """
+    调用LLM，并在响应缓存中查找或保存结果
+
+    缓存键由模型、生成参数和完整渲染后的提示计算得出，因此重复处理同一份材料或问卷
+    不会再次产生LLM延迟和费用。
+
+    Args:
+        llm: LLM实例
+        prompt: 已格式化的提示（字符串、PromptValue或消息列表）
+        node: 发起调用的流程节点名称，用于按节点配置TTL和开关
+        cache: 响应缓存，默认为进程级共享缓存
+
+    Returns:
+        LLM响应消息
+    """
+    cache = cache or get_llm_cache()
+    if not cache.is_enabled_for(node):
+        return llm.invoke(prompt)
+
+    key = _cache_key(cache, llm, prompt)
+
+    cached = cache.get(key, node)
+    if cached is not None:
+        return AIMessage(content=cached, response_metadata={"cache_hit": True})
+
+    response = llm.invoke(prompt)
+    if isinstance(response.content, str) and response.content:
+        cache.put(key, node, response.content)
+    return response
+
+
+def stream_llm(llm: ChatOpenAI, prompt: Any, node: str, cache: Optional[LLMResponseCache] = None) -> Iterator[str]:
+    """
+    流式调用LLM，逐段返回生成的文本
+
+    与invoke_llm使用同一个响应缓存：缓存命中时一次返回完整响应，否则在流结束后保存完整响应。
+
+    Args:
+        llm: LLM实例
+        prompt: 已格式化的提示（字符串、PromptValue或消息列表）
+        node: 发起调用的流程节点名称，用于按节点配置TTL和开关
+        cache: 响应缓存，默认为进程级共享缓存
+
+    Yields:
+        生成的文本片段
+    """
+    cache = cache or get_llm_cache()
+    key = None
+    if cache.is_enabled_for(node):
+        key = _cache_key(cache, llm, prompt)
+        cached = cache.get(key, node)
+        if cached is not None:
+            yield cached
+            return
+
+    pieces = []
+    for chunk in llm.stream(prompt):
+        if isinstance(chunk.content, str) and chunk.content:
+            pieces.append(chunk.content)
+            yield chunk.content
+    if key is not None and pieces:
+        cache.put(key, node, "".join(pieces))
+
+
+def get_llm_registry_stats() -> Dict[str, int]:
+    """
+    获取LLM客户端注册表的统计信息
+
+    Returns:
+        包含创建次数、复用次数和当前客户端数量的字典
+    """
+    with _registry_lock:
+        return {
+            "created": _registry_stats["created"],
+            "reused": _registry_stats["reused"],
+            "clients": len(_llm_registry)
+        }
+
+
+# 交由事件循环完成的关闭任务；事件循环只保留任务的弱引用，需在完成前持有引用以免被垃圾回收
+_pending_close_tasks: Set[asyncio.Task] = set()
+
+
+def _close_async_client(client: httpx.AsyncClient) -> None:
+    """关闭异步HTTP客户端；在运行中的事件循环里调用时交由该循环完成关闭"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(client.aclose())
+    else:
+        task = loop.create_task(client.aclose())
+        _pending_close_tasks.add(task)
+        task.add_done_callback(_pending_close_tasks.discard)
+
 
-    # 创建并返回LLM实例
-    return ChatOpenAI(
-        api_key=api_key,
-        model=model,
-        temperature=temperature,
-        max_tokens=max_tokens,
-        base_url=base_url
-    )
\ No newline at end of file
+def reset_llm_registry() -> None:
+    """关闭并清空所有共享的LLM客户端（主要用于测试和配置变更）"""
+    with _registry_lock:
+        for llm in _llm_registry.values():
+            try:
+                llm.http_client.close()
+            except Exception as e:
+                print(f"Error closing LLM http client: {e}")
+            try:
+                _close_async_client(llm.http_async_client)
+            except Exception as e:
+                print(f"Error closing LLM async http client: {e}")
+        _llm_registry.clear()
+        _registry_stats["created"] = 0
+        _registry_stats["reused"] = 0
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Multi-pattern matcher for AI4FairEdu
+Aho-Corasick automaton that finds every highlight element in a single left-to-right scan of the text
+"""
+
+from typing import Any, Dict, List, Tuple
+from collections import deque
+import re
+
+# Markup in the input text, which is never matched into
+_TAG_PATTERN = re.compile(r"<[^>]*>")
+
+
+def _is_ascii_word_char(char: str) -> bool:
+    """Check whether a character is an ASCII letter, digit or underscore"""
+    return char.isascii() and (char.isalnum() or char == "_")
+
+
+class PatternMatcher:
+    """
+    Class for matching many literal patterns at once
+
+    Overlap policy: matches are taken left to right; among matches starting at the same
+    position the longest wins, and among equally long matches the one with the lowest
+    priority value wins. A match never starts inside an earlier selected match.
+
+    Word boundaries are only enforced at pattern edges that are ASCII word characters, so
+    "net" does not match inside "network" while CJK terms still match inside CJK text.
+    """
+
+    def __init__(self):
+        """Initialize an empty matcher"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[int]] = [[]]
+        self._patterns: List[Tuple[str, int, Any]] = []
+        self._built = False
+
+    def add(self, pattern: str, priority: int = 0, payload: Any = None) -> None:
+        """
+        Add a pattern to the matcher
+
+        Args:
+            pattern: Literal text to find
+            priority: Tie-breaker for equally long matches at the same position (lower wins)
+            payload: Value returned with every match of this pattern
+        """
+        if not pattern:
+            return
+        pattern_id = len(self._patterns)
+        self._patterns.append((pattern, priority, payload))
+
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append(pattern_id)
+        self._built = False
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def build(self) -> None:
+        """Compute the failure links (called automatically before the first search)"""
+        queue = deque()
+        for next_state in self._goto[0].values():
+            self._fail[next_state] = 0
+            queue.append(next_state)
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # Patterns that end at the fallback state also end here
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+        self._built = True
+
+    def find_all(self, text: str) -> List[Tuple[int, int, int, Any]]:
+        """
+        Find every occurrence of every pattern, respecting word boundaries and skipping markup
+
+        Args:
+            text: Text to search
+
+        Returns:
+            List of (start, end, priority, payload) tuples, possibly overlapping
+        """
+        if not self._patterns or not text:
+            return []
+        if not self._built:
+            self.build()
+
+        goto, fail, outputs, patterns = self._goto, self._fail, self._outputs, self._patterns
+        matches = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in outputs[state]:
+                pattern, priority, payload = patterns[pattern_id]
+                end = index + 1
+                start = end - len(pattern)
+                if self._at_word_boundary(text, start, end, pattern):
+                    matches.append((start, end, priority, payload))
+
+        tags = [(m.start(), m.end()) for m in _TAG_PATTERN.finditer(text)]
+        if tags:
+            matches = [match for match in matches if not self._overlaps_any(match[0], match[1], tags)]
+        return matches
+
+    def find_non_overlapping(self, text: str) -> List[Tuple[int, int, Any]]:
+        """
+        Find the matches selected by the overlap policy
+
+        Args:
+            text: Text to search
+
+        Returns:
+            List of (start, end, payload) tuples in text order
+        """
+        candidates = sorted(self.find_all(text), key=lambda m: (m[0], -(m[1] - m[0]), m[2]))
+        selected = []
+        last_end = 0
+        for start, end, _, payload in candidates:
+            if start >= last_end:
+                selected.append((start, end, payload))
+                last_end = end
+        return selected
+
+    @staticmethod
+    def _at_word_boundary(text: str, start: int, end: int, pattern: str) -> bool:
+        """Check the ASCII word boundaries at both edges of a match"""
+        if _is_ascii_word_char(pattern[0]) and start > 0 and _is_ascii_word_char(text[start - 1]):
+            return False
+        if _is_ascii_word_char(pattern[-1]) and end < len(text) and _is_ascii_word_char(text[end]):
+            return False
+        return True
+
+    @staticmethod
+    def _overlaps_any(start: int, end: int, regions: List[Tuple[int, int]]) -> bool:
+        """Check whether a match overlaps any of the (sorted) regions"""
+        low, high = 0, len(regions)
+        while low < high:
+            middle = (low + high) // 2
+            if regions[middle][1] <= start:
+                low = middle + 1
+            else:
+                high = middle
+        return low < len(regions) and regions[low][0] < end
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Readability metrics for AI4FairEdu
+Sentence length, syllable estimates and Flesch-style scores for English, a character-level complexity grade for Chinese
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import os
+import re
+import numpy as np
+from src.config import SystemConfig
+from src.utils.lexicon import RESOURCES_DIR, estimate_syllables
+
+# Candidate sentence ends: Western terminators followed by whitespace and an uppercase or CJK
+# start, Chinese terminators, and line breaks. A period inside a token ("3.14", "example.com")
+# is never followed by whitespace, so decimals and URLs are not cut.
+_SENTENCE_END_PATTERN = re.compile(
+    r"[.!?]+[\"'”’)\]]*(?=\s+[\"'“‘(\[]?[A-Z一-鿿])"
+    r"|[。！？]+[”’」』）]*"
+    r"|\n"
+)
+_INITIALISM_PATTERN = re.compile(r"(?:[a-z]\.)+[a-z]")
+# Abbreviations whose period does not end a sentence
+_ABBREVIATIONS = frozenset({
+    "dr", "mr", "mrs", "ms", "prof", "sr", "jr", "st", "mt", "vs", "etc", "fig", "figs", "no", "nos", "vol",
+    "eq", "eqs", "ch", "sec", "p", "pp", "cf", "al", "approx", "dept", "est", "inc", "ltd", "co", "corp",
+    "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec"
+})
+_PARAGRAPH_PATTERN = re.compile(r"\n\s*\n")
+_WORD_PATTERN = re.compile(r"[A-Za-z]+(?:'[a-z]+)?")
+_CJK_PATTERN = re.compile(r"[一-鿿]")
+
+
+def _load_common_chars() -> frozenset:
+    """Load the bundled list of common Chinese characters"""
+    try:
+        with open(os.path.join(RESOURCES_DIR, "zh_common_chars.txt"), encoding="utf-8") as f:
+            return frozenset(_CJK_PATTERN.findall("".join(line for line in f if not line.startswith("#"))))
+    except FileNotFoundError:
+        return frozenset()
+
+
+COMMON_CHINESE_CHARS = _load_common_chars()
+
+
+def detect_language(text: str) -> str:
+    """
+    Guess the language of a text
+
+    Args:
+        text: Text to inspect
+
+    Returns:
+        "zh" if at least a fifth of the letters are Chinese characters, otherwise "en"
+    """
+    letters = sum(1 for char in text if char.isalpha())
+    if not letters:
+        return "en"
+    return "zh" if len(_CJK_PATTERN.findall(text)) / letters >= 0.2 else "en"
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """Split a text into its non-empty paragraphs (separated by blank lines)"""
+    return [paragraph.strip() for paragraph in _PARAGRAPH_PATTERN.split(text) if paragraph.strip()]
+
+
+def _is_abbreviation(text: str, period: int) -> bool:
+    """Whether the period at the given offset closes an abbreviation or an initial rather than a sentence"""
+    start = period
+    while start > 0 and not text[start - 1].isspace():
+        start -= 1
+    token = text[start:period].lstrip("\"'“‘([").lower()
+    return token in _ABBREVIATIONS or (len(token) == 1 and token.isalpha()) or \
+        bool(_INITIALISM_PATTERN.fullmatch(token))
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    Find the sentences of a text as offsets into it
+
+    Slicing the text by these offsets keeps every sentence exactly as written, and the text
+    between consecutive spans is the original separator.
+
+    Args:
+        text: Text to split
+
+    Returns:
+        (start, end) offsets of the non-empty sentences, without surrounding whitespace
+    """
+    cuts = [0]
+    for match in _SENTENCE_END_PATTERN.finditer(text):
+        terminator = match.group(0).rstrip("\"'”’)]")
+        if terminator == "." and _is_abbreviation(text, match.start()):
+            continue
+        cuts.append(match.end())
+    cuts.append(len(text))
+
+    spans = []
+    for start, end in zip(cuts, cuts[1:]):
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            spans.append((start, end))
+    return spans
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a text into its non-empty sentences"""
+    return [text[start:end] for start, end in sentence_spans(text)]
+
+
+def english_sentence_metrics(sentences: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Count the words and syllables of every English sentence
+
+    All words are collected in one pass and the syllables of each distinct word are estimated once.
+
+    Args:
+        sentences: Sentences to measure
+
+    Returns:
+        Dictionary with "words" and "syllables" arrays, one entry per sentence
+    """
+    words, sentence_ids = [], []
+    for index, sentence in enumerate(sentences):
+        sentence_words = _WORD_PATTERN.findall(sentence.lower())
+        words.extend(sentence_words)
+        sentence_ids.extend([index] * len(sentence_words))
+
+    if not words:
+        zeros = np.zeros(len(sentences), dtype=np.float64)
+        return {"words": zeros, "syllables": zeros.copy()}
+
+    unique_words, inverse = np.unique(np.array(words, dtype=str), return_inverse=True)
+    syllables = estimate_syllables(list(unique_words))[inverse]
+    sentence_ids = np.asarray(sentence_ids)
+    return {
+        "words": np.bincount(sentence_ids, minlength=len(sentences)).astype(np.float64),
+        "syllables": np.bincount(sentence_ids, weights=syllables, minlength=len(sentences))
+    }
+
+
+def chinese_sentence_metrics(sentences: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Count the characters and uncommon characters of every Chinese sentence
+
+    Args:
+        sentences: Sentences to measure
+
+    Returns:
+        Dictionary with "chars" and "uncommon" arrays, one entry per sentence
+    """
+    chars = [_CJK_PATTERN.findall(sentence) for sentence in sentences]
+    return {
+        "chars": np.fromiter((len(c) for c in chars), dtype=np.float64, count=len(chars)),
+        "uncommon": np.fromiter((sum(1 for char in c if char not in COMMON_CHINESE_CHARS) for c in chars),
+                                dtype=np.float64, count=len(chars))
+    }
+
+
+def flesch_kincaid_grade(words: np.ndarray, sentences: np.ndarray, syllables: np.ndarray) -> np.ndarray:
+    """Flesch-Kincaid grade level from word, sentence and syllable counts (elementwise)"""
+    words = np.maximum(words, 1.0)
+    return 0.39 * (words / np.maximum(sentences, 1.0)) + 11.8 * (syllables / words) - 15.59
+
+
+def flesch_reading_ease(words: np.ndarray, sentences: np.ndarray, syllables: np.ndarray) -> np.ndarray:
+    """Flesch reading ease from word, sentence and syllable counts (elementwise); higher is easier"""
+    words = np.maximum(words, 1.0)
+    return 206.835 - 1.015 * (words / np.maximum(sentences, 1.0)) - 84.6 * (syllables / words)
+
+
+def chinese_grade(chars: np.ndarray, sentences: np.ndarray, uncommon: np.ndarray) -> np.ndarray:
+    """
+    Approximate school grade of Chinese text (elementwise)
+
+    Grows with the average sentence length in characters and with the share of characters
+    outside the common-character list, on roughly the same scale as the Flesch-Kincaid grade.
+    """
+    chars = np.maximum(chars, 1.0)
+    return 0.25 * (chars / np.maximum(sentences, 1.0)) + 10.0 * (uncommon / chars)
+
+
+def paragraph_grades(paragraphs: List[str], language: Optional[str] = None) -> np.ndarray:
+    """
+    Compute the readability grade of every paragraph
+
+    The sentences of all paragraphs are measured together and their counts summed per
+    paragraph, so the cost is one pass over the text.
+
+    Args:
+        paragraphs: Paragraphs to grade
+        language: "en" or "zh", detected from the text when omitted
+
+    Returns:
+        Grade level per paragraph
+    """
+    if not paragraphs:
+        return np.zeros(0, dtype=np.float64)
+    language = language or detect_language("\n".join(paragraphs))
+
+    sentences, paragraph_ids = [], []
+    for index, paragraph in enumerate(paragraphs):
+        paragraph_sentences = split_sentences(paragraph)
+        sentences.extend(paragraph_sentences)
+        paragraph_ids.extend([index] * len(paragraph_sentences))
+    paragraph_ids = np.asarray(paragraph_ids, dtype=np.int64)
+    sentence_counts = np.bincount(paragraph_ids, minlength=len(paragraphs)).astype(np.float64)
+
+    if language == "zh":
+        metrics = chinese_sentence_metrics(sentences)
+        totals = {key: np.bincount(paragraph_ids, weights=values, minlength=len(paragraphs))
+                  for key, values in metrics.items()}
+        return chinese_grade(totals["chars"], sentence_counts, totals["uncommon"])
+
+    metrics = english_sentence_metrics(sentences)
+    totals = {key: np.bincount(paragraph_ids, weights=values, minlength=len(paragraphs))
+              for key, values in metrics.items()}
+    return flesch_kincaid_grade(totals["words"], sentence_counts, totals["syllables"])
+
+
+def analyze_readability(text: str, language: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compute the readability metrics of a text
+
+    Args:
+        text: Text to analyze
+        language: "en" or "zh", detected from the text when omitted
+
+    Returns:
+        Dictionary with the language, sentence count, average sentence length, grade level and
+        per-sentence grades; English texts also get syllables per word and Flesch reading ease,
+        Chinese texts the share of uncommon characters
+    """
+    language = language or detect_language(text)
+    sentences = split_sentences(text)
+    ones = np.ones(len(sentences), dtype=np.float64)
+    report: Dict[str, Any] = {"language": language, "sentence_count": len(sentences)}
+
+    if language == "zh":
+        metrics = chinese_sentence_metrics(sentences)
+        chars, uncommon = metrics["chars"].sum(), metrics["uncommon"].sum()
+        report.update({
+            "avg_sentence_length": float(chars / max(len(sentences), 1)),
+            "uncommon_char_ratio": float(uncommon / max(chars, 1)),
+            "grade_level": float(chinese_grade(np.array(chars), np.array(len(sentences)), np.array(uncommon))),
+            "sentence_grades": chinese_grade(metrics["chars"], ones, metrics["uncommon"]).tolist()
+        })
+        return report
+
+    metrics = english_sentence_metrics(sentences)
+    words, syllables = metrics["words"].sum(), metrics["syllables"].sum()
+    totals = (np.array(words), np.array(len(sentences)), np.array(syllables))
+    report.update({
+        "avg_sentence_length": float(words / max(len(sentences), 1)),
+        "avg_syllables_per_word": float(syllables / max(words, 1)),
+        "flesch_reading_ease": float(flesch_reading_ease(*totals)),
+        "grade_level": float(flesch_kincaid_grade(*totals)),
+        "sentence_grades": flesch_kincaid_grade(metrics["words"], ones, metrics["syllables"]).tolist()
+    })
+    return report
+
+
+def target_grade(user_profile: Dict, config: Optional[SystemConfig] = None) -> float:
+    """
+    Get the reading grade a learner's material should not exceed
+
+    The target drops by a fixed step per severity level, starting from the target for the
+    mildest level, and never falls below the configured minimum.
+
+    Args:
+        user_profile: User profile with an optional "analysis" containing "severity_level"
+        config: System configuration
+
+    Returns:
+        Target grade level
+    """
+    config = config or SystemConfig()
+    analysis = (user_profile or {}).get("analysis") or {}
+    try:
+        severity = int(analysis.get("severity_level") or 3)
+    except (TypeError, ValueError):
+        severity = 3
+    grade = (config.get("readability.max_target_grade") or 9) \
+        - (config.get("readability.grade_step_per_severity") or 1) * (min(max(severity, 1), 5) - 1)
+    return float(max(grade, config.get("readability.min_target_grade") or 4))
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Material segmenter for AI4FairEdu
+Cuts a material into micro-unit segments locally, at headings and paragraph boundaries, sized by reading time
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import re
+import numpy as np
+from src.utils.readability import detect_language, sentence_spans
+
+_PARAGRAPH_PATTERN = re.compile(r"\n\s*\n")
+_WORD_PATTERN = re.compile(r"[A-Za-z0-9]+(?:['\-][A-Za-z0-9]+)*")
+_CJK_PATTERN = re.compile(r"[一-鿿]")
+
+# Markdown headings, numbered section titles and Chinese chapter/section titles
+_HEADING_PATTERN = re.compile(
+    r"^(?:#{1,6}\s+\S.*"
+    r"|(?:chapter|section|part|unit|lesson)\s+[\dIVXivx]+\b.*"
+    r"|第[一二三四五六七八九十百零\d]+[章节部分课单元].*"
+    r"|[一二三四五六七八九十]+、.*"
+    r"|\d+(?:\.\d+)*\.?\s+\S.*)$",
+    re.IGNORECASE
+)
+
+
+def is_heading(block: str, max_length: int = 80) -> bool:
+    """
+    Decide whether a block is a heading
+
+    Headings are single short lines that look like a title (Markdown "#", "Chapter 2",
+    "第三章", "1.2 Title") and do not end like a sentence.
+
+    Args:
+        block: Paragraph-level block of text
+        max_length: Longest heading in characters
+
+    Returns:
+        True if the block is a heading
+    """
+    block = block.strip()
+    if not block or "\n" in block or len(block) > max_length:
+        return False
+    if block.startswith("#"):
+        return True
+    return bool(_HEADING_PATTERN.match(block)) and not block.endswith((".", "。", "!", "！", "?", "？", ";", "；"))
+
+
+def reading_minutes(blocks: List[str], language: str, words_per_minute: float = 200.0,
+                    chars_per_minute: float = 300.0) -> np.ndarray:
+    """
+    Estimate the reading time of every block
+
+    Args:
+        blocks: Blocks of text
+        language: "en" (words are counted) or "zh" (characters are counted)
+        words_per_minute: English reading speed
+        chars_per_minute: Chinese reading speed
+
+    Returns:
+        Reading time in minutes per block
+    """
+    if language == "zh":
+        counts = np.fromiter((len(_CJK_PATTERN.findall(block)) + len(_WORD_PATTERN.findall(block)) for block in blocks),
+                             dtype=np.float64, count=len(blocks))
+        return counts / chars_per_minute
+    counts = np.fromiter((len(_WORD_PATTERN.findall(block)) for block in blocks), dtype=np.float64, count=len(blocks))
+    return counts / words_per_minute
+
+
+class MaterialSegmenter:
+    """
+    Class for cutting a material into micro-unit segments without an LLM call
+
+    A segment never crosses a heading and stays within the learner's attention span; only a
+    single over-long sentence, or a short section tail merged into its predecessor (up to one
+    and a half spans), goes beyond it. Paragraphs longer than the span are cut at sentence
+    boundaries.
+    """
+
+    def __init__(self, words_per_minute: float = 200.0, chars_per_minute: float = 300.0,
+                 min_fill: float = 0.5):
+        """
+        Initialize the segmenter
+
+        Args:
+            words_per_minute: English reading speed
+            chars_per_minute: Chinese reading speed
+            min_fill: Share of the attention span a trailing segment must reach before it is
+                kept on its own instead of being merged into the previous segment of its section
+        """
+        self.words_per_minute = words_per_minute
+        self.chars_per_minute = chars_per_minute
+        self.min_fill = min_fill
+
+    def segment(self, text: str, attention_span_minutes: float = 10.0,
+                language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Cut a material into segments
+
+        Args:
+            text: Material to segment
+            attention_span_minutes: Reading time budget per segment
+            language: "en" or "zh", detected from the text when omitted
+
+        Returns:
+            Segments in reading order, each with "unit_number", "title" (the heading of its
+            section or None), "content" and "estimated_time_minutes"
+        """
+        language = language or detect_language(text)
+        try:
+            budget = max(float(attention_span_minutes or 10), 1.0)
+        except (TypeError, ValueError):
+            budget = 10.0
+        blocks = [block.strip() for block in _PARAGRAPH_PATTERN.split(text) if block.strip()]
+        if not blocks:
+            return []
+
+        sections = self._sections(blocks)
+        segments: List[Dict[str, Any]] = []
+        for title, paragraphs in sections:
+            pieces, minutes = self._pieces(paragraphs, language, budget)
+            for content, time_minutes in self._pack(pieces, minutes, budget):
+                segments.append({
+                    "unit_number": len(segments) + 1,
+                    "title": title,
+                    "content": content,
+                    "estimated_time_minutes": max(1, int(np.ceil(time_minutes)))
+                })
+        return segments
+
+    @staticmethod
+    def _sections(blocks: List[str]) -> List[Tuple[Optional[str], List[str]]]:
+        """Group blocks into (heading, paragraphs) sections; consecutive headings keep the last one"""
+        sections: List[Tuple[Optional[str], List[str]]] = []
+        title: Optional[str] = None
+        paragraphs: List[str] = []
+        for block in blocks:
+            if is_heading(block):
+                if paragraphs:
+                    sections.append((title, paragraphs))
+                    paragraphs = []
+                title = block.lstrip("#").strip()
+            else:
+                paragraphs.append(block)
+        if paragraphs:
+            sections.append((title, paragraphs))
+        return sections
+
+    def _pieces(self, paragraphs: List[str], language: str, budget: float) -> Tuple[List[str], np.ndarray]:
+        """
+        Cut paragraphs longer than the budget at sentence boundaries and time every piece
+
+        Pieces are sliced out of the paragraph at the sentence offsets, so their text is
+        exactly the original.
+        """
+        minutes = reading_minutes(paragraphs, language, self.words_per_minute, self.chars_per_minute)
+        if not (minutes > budget).any():
+            return paragraphs, minutes
+
+        pieces: List[str] = []
+        for paragraph, paragraph_minutes in zip(paragraphs, minutes):
+            if paragraph_minutes <= budget:
+                pieces.append(paragraph)
+                continue
+            spans = sentence_spans(paragraph)
+            sentence_minutes = reading_minutes([paragraph[start:end] for start, end in spans], language,
+                                               self.words_per_minute, self.chars_per_minute)
+            for group, _ in self._group(sentence_minutes, budget):
+                pieces.append(paragraph[spans[group[0]][0]:spans[group[-1]][1]])
+        return pieces, reading_minutes(pieces, language, self.words_per_minute, self.chars_per_minute)
+
+    def _pack(self, pieces: List[str], minutes: np.ndarray, budget: float) -> List[Tuple[str, float]]:
+        """Pack consecutive pieces into segments of at most budget minutes, separated by blank lines"""
+        return [("\n\n".join(pieces[index] for index in group), total)
+                for group, total in self._group(minutes, budget)]
+
+    def _group(self, minutes: np.ndarray, budget: float) -> List[Tuple[List[int], float]]:
+        """
+        Greedily group consecutive items into groups of at most budget minutes
+
+        A short trailing group is merged into the previous one when the result stays within
+        one and a half budgets, so sections do not end in a tiny unit.
+
+        Returns:
+            (item indices, total minutes) of every group
+        """
+        groups: List[List[int]] = []
+        totals: List[float] = []
+        for index, piece_minutes in enumerate(minutes):
+            if groups and totals[-1] + piece_minutes <= budget:
+                groups[-1].append(index)
+                totals[-1] += float(piece_minutes)
+            else:
+                groups.append([index])
+                totals.append(float(piece_minutes))
+
+        if len(groups) > 1 and totals[-1] < self.min_fill * budget and totals[-2] + totals[-1] <= 1.5 * budget:
+            tail_group, tail_total = groups.pop(), totals.pop()
+            groups[-1].extend(tail_group)
+            totals[-1] += tail_total
+
+        return list(zip(groups, totals))
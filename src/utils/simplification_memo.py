@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Sentence simplification memo for AI4FairEdu
+SQLite-backed memo of simplified sentences shared across materials and users, with LRU eviction by entry count
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from src.config import SystemConfig
+
+
+def normalize_sentence(sentence: str) -> str:
+    """Normalize a source sentence for lookups: NFKC, collapsed whitespace, lowercase"""
+    return " ".join(unicodedata.normalize("NFKC", sentence).split()).lower()
+
+
+def profile_class(difficulty_type: Optional[str], target_grade: float) -> str:
+    """
+    Group learners whose simplified sentences are interchangeable
+
+    Args:
+        difficulty_type: Learning difficulty type of the learner
+        target_grade: Reading grade the learner's material should not exceed
+
+    Returns:
+        Profile class such as "Dyslexia:7"
+    """
+    return f"{difficulty_type or 'Dyslexia'}:{int(round(target_grade))}"
+
+
+class SimplificationMemo:
+    """
+    Class for remembering the simplification of individual sentences
+
+    Entries are keyed by the normalized source sentence, its language and the learner's profile
+    class. When the memo holds more than max_entries sentences, the least recently used ones
+    are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000, enabled: bool = True):
+        """
+        Initialize the memo
+
+        Args:
+            path: Path of the SQLite database file
+            max_entries: Maximum number of memoized sentences before LRU eviction
+            enabled: Whether the memo is used at all
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sentence_memo (
+                source_key TEXT NOT NULL,
+                language TEXT NOT NULL,
+                profile_class TEXT NOT NULL,
+                simplified TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (source_key, language, profile_class)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sentence_memo_last_access ON sentence_memo (last_access)")
+        self._conn.commit()
+
+    def get_many(self, sentences: List[str], language: str, profile: str) -> Dict[int, str]:
+        """
+        Look up the simplifications of several sentences at once
+
+        Args:
+            sentences: Source sentences
+            language: Language of the sentences
+            profile: Profile class of the learner
+
+        Returns:
+            Dictionary mapping the index of every memoized sentence to its simplification
+        """
+        if not self.enabled or not sentences:
+            return {}
+
+        keys = [normalize_sentence(sentence) for sentence in sentences]
+        unique_keys = list(dict.fromkeys(keys))
+        now = time.time()
+        found: Dict[str, str] = {}
+        with self._lock:
+            # Stay below SQLite's limit on query parameters
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._conn.execute(
+                    f"SELECT source_key, simplified FROM sentence_memo WHERE language = ? AND profile_class = ? "
+                    f"AND source_key IN ({placeholders})",
+                    (language, profile, *batch)
+                ).fetchall())
+            self._conn.executemany(
+                "UPDATE sentence_memo SET last_access = ? WHERE source_key = ? AND language = ? AND profile_class = ?",
+                [(now, key, language, profile) for key in found]
+            )
+            self._conn.commit()
+            hits = {index: found[key] for index, key in enumerate(keys) if key in found}
+            self._stats["hits"] += len(hits)
+            self._stats["misses"] += len(keys) - len(hits)
+        return hits
+
+    def put_many(self, simplifications: List[Tuple[str, str]], language: str, profile: str) -> None:
+        """
+        Store the simplifications of several sentences and evict old entries if the memo is full
+
+        Args:
+            simplifications: (source sentence, simplified sentence) pairs
+            language: Language of the sentences
+            profile: Profile class of the learner
+        """
+        if not self.enabled or not simplifications:
+            return
+
+        now = time.time()
+        rows = [
+            (normalize_sentence(source), language, profile, simplified.strip(), now, now)
+            for source, simplified in simplifications
+            if normalize_sentence(source) and simplified.strip()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sentence_memo "
+                "(source_key, language, profile_class, simplified, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._stats["stores"] += len(rows)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the memo fits in max_entries (caller holds the lock)"""
+        excess = self._conn.execute("SELECT COUNT(*) FROM sentence_memo").fetchone()[0] - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM sentence_memo WHERE rowid IN "
+            "(SELECT rowid FROM sentence_memo ORDER BY last_access ASC LIMIT ?)",
+            (excess,)
+        )
+        self._stats["evictions"] += excess
+
+    def size(self) -> int:
+        """Count the memoized sentences"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sentence_memo").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get size and hit statistics for the memo
+
+        Returns:
+            Dictionary with the entry count, hits, misses, stores, evictions and hit rate
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM sentence_memo").fetchone()[0]
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            **stats,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0
+        }
+
+    def clear(self) -> None:
+        """Remove every memoized sentence"""
+        with self._lock:
+            self._conn.execute("DELETE FROM sentence_memo")
+            self._conn.commit()
+
+
+_memo_instance: Optional[SimplificationMemo] = None
+_memo_lock = threading.Lock()
+
+
+def get_simplification_memo(config: Optional[SystemConfig] = None) -> SimplificationMemo:
+    """
+    Get the process-wide sentence simplification memo
+
+    Args:
+        config: System configuration
+
+    Returns:
+        Shared SimplificationMemo instance
+    """
+    global _memo_instance
+    with _memo_lock:
+        if _memo_instance is None:
+            config = config or SystemConfig()
+            _memo_instance = SimplificationMemo(
+                path=config.get("simplification.memo_path") or "data/cache/sentence_memo.sqlite3",
+                max_entries=config.get("simplification.memo_max_entries") or 100000,
+                enabled=bool(config.get("simplification.memo_enabled"))
+            )
+        return _memo_instance
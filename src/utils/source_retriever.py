@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Source retriever for AI4FairEdu
+Maps micro units back to the passages of the original material they cover using a small BM25 index
+"""
+
+from typing import Dict, List, Any
+import math
+import re
+from collections import Counter
+
+from src.utils.readability import sentence_spans
+
+# Stop words that carry no retrieval signal
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "its", "of", "on", "or", "that", "the", "this", "to", "was", "were", "which", "with", "will"
+}
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]+")
+_CJK_PATTERN = re.compile(r"[\u4e00-\u9fff]")
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the number of LLM tokens in a text
+
+    CJK characters count as one token each, other text as one token per four characters.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+    cjk_count = len(_CJK_PATTERN.findall(text))
+    return cjk_count + math.ceil((len(text) - cjk_count) / 4)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize text for retrieval: lowercase words for alphabetic text and character bigrams for Chinese
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms
+    """
+    terms = []
+    for match in _WORD_PATTERN.finditer(_TAG_PATTERN.sub(" ", text).lower()):
+        word = match.group(0)
+        if _CJK_PATTERN.match(word):
+            if len(word) == 1:
+                terms.append(word)
+            else:
+                terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+        elif word not in STOP_WORDS:
+            terms.append(word)
+    return terms
+
+
+def split_passages(text: str, max_passage_chars: int = 800) -> List[str]:
+    """
+    Split a material into paragraph-aligned passages, breaking very long paragraphs at sentence ends
+
+    Args:
+        text: The original material
+        max_passage_chars: Soft upper bound on passage length
+
+    Returns:
+        List of passages in document order
+    """
+    passages = []
+    for paragraph in re.split(r"\n\s*\n", text or ""):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_passage_chars:
+            passages.append(paragraph)
+            continue
+
+        # Passages are slices of the paragraph, so they keep its original spacing between sentences
+        passage_start = passage_end = None
+        for start, end in sentence_spans(paragraph):
+            if passage_start is not None and end - passage_start > max_passage_chars:
+                passages.append(paragraph[passage_start:passage_end])
+                passage_start = None
+            if passage_start is None:
+                passage_start = start
+            passage_end = end
+        if passage_start is not None:
+            passages.append(paragraph[passage_start:passage_end])
+    return passages
+
+
+class SourceIndex:
+    """
+    BM25 index over the passages of one learning material, built once and queried per micro unit
+    """
+
+    def __init__(self, text: str, k1: float = 1.5, b: float = 0.75, max_passage_chars: int = 800):
+        """
+        Build the index
+
+        Args:
+            text: The original material
+            k1: BM25 term frequency saturation
+            b: BM25 length normalisation
+            max_passage_chars: Soft upper bound on passage length
+        """
+        self.text = text or ""
+        self.k1 = k1
+        self.b = b
+        self.passages = split_passages(self.text, max_passage_chars)
+        self.passage_tokens = [estimate_tokens(passage) for passage in self.passages]
+        self.total_tokens = estimate_tokens(self.text)
+
+        self._term_freqs = [Counter(tokenize(passage)) for passage in self.passages]
+        self._lengths = [sum(freqs.values()) for freqs in self._term_freqs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+        doc_freqs: Counter = Counter()
+        for freqs in self._term_freqs:
+            doc_freqs.update(freqs.keys())
+        n = len(self.passages)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freqs.items()}
+
+    def score(self, query: str) -> List[float]:
+        """
+        Score every passage against a query
+
+        Args:
+            query: Query text
+
+        Returns:
+            BM25 score for each passage
+        """
+        query_terms = set(tokenize(query))
+        scores = []
+        for freqs, length in zip(self._term_freqs, self._lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / self._avg_length) if self._avg_length else self.k1
+            for term in query_terms:
+                tf = freqs.get(term)
+                if tf:
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+    def retrieve(self, query: str, max_tokens: int = 1500, context_window: int = 1) -> str:
+        """
+        Select the passages relevant to a query within a token budget
+
+        The best-scoring passages are taken first, each together with up to context_window
+        neighbouring passages on either side, and the selection is returned in document order.
+        Materials that already fit in the budget are returned whole.
+
+        Args:
+            query: Query text, typically the micro unit content, objective and key points
+            max_tokens: Token budget for the returned slice
+            context_window: Number of neighbouring passages to include around each hit
+
+        Returns:
+            The selected source slice
+        """
+        if self.total_tokens <= max_tokens or not self.passages:
+            return self.text
+
+        scores = self.score(query)
+        ranked = sorted(range(len(self.passages)), key=lambda i: scores[i], reverse=True)
+
+        selected = set()
+        used_tokens = 0
+        for index in ranked:
+            if scores[index] <= 0 and selected:
+                break
+            window = range(max(0, index - context_window), min(len(self.passages), index + context_window + 1))
+            # The hit itself is always preferred over its neighbours
+            for candidate in [index] + [i for i in window if i != index]:
+                if candidate in selected:
+                    continue
+                if used_tokens + self.passage_tokens[candidate] > max_tokens:
+                    continue
+                selected.add(candidate)
+                used_tokens += self.passage_tokens[candidate]
+            if used_tokens >= max_tokens:
+                break
+
+        if not selected:
+            # Even the best passage is over budget, send a truncated version of it
+            best = self.passages[ranked[0]]
+            return best[:max_tokens * 4]
+
+        return "\n\n".join(self.passages[i] for i in sorted(selected))
+
+
+def build_unit_query(unit: Dict[str, Any]) -> str:
+    """
+    Build the retrieval query for a micro unit
+
+    Args:
+        unit: Micro unit with content and optional objective and key points
+
+    Returns:
+        Query text
+    """
+    parts = [str(unit.get("content", "")), str(unit.get("learning_objective", ""))]
+    parts.extend(str(point) for point in unit.get("key_points", []) or [])
+    return "\n".join(parts)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Structured LLM output for AI4FairEdu
+Schema instructions, JSON extraction with local repair, Pydantic validation and one repair round-trip to the LLM
+"""
+
+from typing import Dict, List, Any, Optional, Tuple, Type, TypeVar
+from collections import Counter
+import json
+import re
+import threading
+from pydantic import BaseModel, ValidationError
+from src.utils.llm_utils import invoke_llm
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+_TRAILING_COMMA_PATTERN = re.compile(r",(\s*[}\]])")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"', "＂": '"'})
+
+# Sent back to the LLM together with its output when local repair is not enough
+REPAIR_PROMPT = """Your previous answer could not be used because it is not valid JSON for the required schema.
+
+Error:
+{error}
+
+Previous answer:
+{output}
+
+Return only the corrected JSON object, with no other text. It must match this JSON Schema:
+{schema}"""
+
+# Validation outcomes per node: "valid" (parsed as returned), "locally_repaired" (fixed without
+# another request), "repaired" (fixed by the repair request) and "failed"
+_outcomes: Dict[str, Counter] = {}
+_outcomes_lock = threading.Lock()
+
+
+class StructuredOutputError(ValueError):
+    """Raised when an LLM response cannot be turned into the requested schema"""
+
+    def __init__(self, message: str, output: str = ""):
+        super().__init__(message)
+        self.output = output
+
+
+def schema_json(model: Type[BaseModel]) -> str:
+    """Render the JSON Schema of a model for inclusion in a prompt"""
+    return json.dumps(model.model_json_schema(), ensure_ascii=False)
+
+
+def extract_json(text: str) -> str:
+    """
+    Cut the JSON value out of an LLM response
+
+    Code fences and any prose before or after the outermost object or array are dropped. A
+    value that is never closed (a truncated response) is returned up to the end of the text.
+
+    Args:
+        text: LLM response text
+
+    Returns:
+        Text of the JSON value, possibly still malformed
+    """
+    fenced = _FENCE_PATTERN.search(text)
+    if fenced:
+        text = fenced.group(1)
+    stripped = text.strip()
+    if stripped[:1] in "{[" and stripped[-1:] in "}]" and stripped:
+        return stripped
+    starts = [position for position in (text.find("{"), text.find("[")) if position >= 0]
+    if not starts:
+        return text.strip()
+    start = min(starts)
+    depth = 0
+    in_string = escaped = False
+    for position in range(start, len(text)):
+        char = text[position]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:position + 1]
+    return text[start:]
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix the syntax errors LLMs commonly make in JSON
+
+    Replaces typographic quotes, drops trailing commas and escapes raw newlines inside strings.
+    For a truncated response, the unfinished string and any key left without a value are
+    dropped and the open arrays and objects are closed, so a cut-off value never passes for a
+    complete one.
+
+    Args:
+        text: Malformed JSON text
+
+    Returns:
+        Repaired JSON text
+    """
+    text = _TRAILING_COMMA_PATTERN.sub(r"\1", text.translate(_SMART_QUOTES))
+    try:
+        json.loads(text)
+        return text
+    except json.JSONDecodeError:
+        pass
+
+    repaired: List[str] = []
+    closers: List[str] = []
+    in_string = escaped = False
+    string_start = 0
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                char = "\\n"
+        elif char == '"':
+            in_string = True
+            string_start = len(repaired)
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]" and closers:
+            closers.pop()
+        repaired.append(char)
+
+    if in_string:
+        del repaired[string_start:]
+    tail = "".join(repaired).rstrip()
+    # Without the unfinished string, a truncated response can end after a comma or a key
+    tail = re.sub(r',?\s*"[^"]*"\s*:\s*$', "", tail).rstrip().rstrip(",")
+    return _TRAILING_COMMA_PATTERN.sub(r"\1", tail + "".join(reversed(closers)))
+
+
+def _validate(data: Any, model: Type[ModelT]) -> ModelT:
+    """Validate parsed JSON, wrapping a bare list when the model has a single list field"""
+    if isinstance(data, list):
+        list_fields = [name for name, field in model.model_fields.items()
+                       if getattr(field.annotation, "__origin__", None) is list]
+        if len(list_fields) == 1:
+            data = {list_fields[0]: data}
+    return model.model_validate(data)
+
+
+def parse_structured(text: str, model: Type[ModelT]) -> ModelT:
+    """
+    Parse and validate an LLM response against a schema, repairing its JSON locally if needed
+
+    Args:
+        text: LLM response text
+        model: Pydantic model describing the expected output
+
+    Returns:
+        Validated model instance
+
+    Raises:
+        StructuredOutputError: If the response is not valid for the model even after repair
+    """
+    return _parse(text, model)[0]
+
+
+def _parse(text: str, model: Type[ModelT]) -> Tuple[ModelT, bool]:
+    """Parse a response, returning the model and whether local repair was needed"""
+    candidate = extract_json(text or "")
+    try:
+        return _validate(json.loads(candidate), model), False
+    except (json.JSONDecodeError, ValidationError) as error:
+        first_error = error
+    try:
+        return _validate(json.loads(repair_json(candidate)), model), True
+    except json.JSONDecodeError:
+        raise StructuredOutputError(f"Invalid JSON: {first_error}", text) from first_error
+    except ValidationError as error:
+        raise StructuredOutputError(f"Schema validation failed: {error}", text) from error
+
+
+class JsonArrayStreamParser:
+    """
+    Class for picking complete elements out of a JSON array while it is still being streamed
+
+    The array is the first one in the stream, either the top-level value or a field of the
+    top-level object such as {"units": [...]}. Each object or array element is returned as
+    soon as its closing bracket arrives, so consumers can start on it before the rest of the
+    response exists. Every character is scanned once.
+    """
+
+    def __init__(self):
+        """Initialize an empty parser"""
+        self._buffer = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._array_depth: Optional[int] = None
+        self._element_start: Optional[int] = None
+        self._done = False
+        self.count = 0
+
+    def feed(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Add streamed text
+
+        Args:
+            text: Next piece of the response
+
+        Returns:
+            (index, JSON text) of the array elements completed by this piece, in order
+        """
+        self._buffer += text
+        completed: List[Tuple[int, str]] = []
+        for position in range(self._position, len(self._buffer)):
+            char = self._buffer[position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._array_depth is None and char == "[" and self._depth <= 1:
+                    self._array_depth = self._depth + 1
+                elif self._depth == self._array_depth and self._element_start is None and not self._done:
+                    self._element_start = position
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._element_start is not None and self._depth == self._array_depth:
+                    completed.append((self.count, self._buffer[self._element_start:position + 1]))
+                    self.count += 1
+                    self._element_start = None
+                elif self._array_depth is not None and self._depth < self._array_depth:
+                    self._done = True
+        self._position = len(self._buffer)
+        return completed
+
+    @property
+    def text(self) -> str:
+        """All text fed so far"""
+        return self._buffer
+
+
+def _record(node: str, outcome: str) -> None:
+    """Count one validation outcome of a node"""
+    with _outcomes_lock:
+        _outcomes.setdefault(node, Counter())[outcome] += 1
+
+
+def invoke_structured(llm, prompt: Any, model: Type[ModelT], node: str, max_repairs: int = 1,
+                      output: Optional[str] = None) -> ModelT:
+    """
+    Call the LLM and return its response validated against a schema
+
+    The prompt must already ask for JSON matching the model (see schema_json). Responses are
+    first repaired locally; if they still fail validation, the error and the response are sent
+    back to the LLM up to max_repairs times.
+
+    Args:
+        llm: Language model
+        prompt: Formatted prompt
+        model: Pydantic model describing the expected output
+        node: Workflow node making the call, used for caching and statistics
+        max_repairs: Maximum number of repair requests
+        output: Response already received for the prompt (for example assembled from a stream);
+            the LLM is then only called for repairs
+
+    Returns:
+        Validated model instance
+
+    Raises:
+        StructuredOutputError: If no valid output was obtained
+    """
+    if output is None:
+        output = invoke_llm(llm, prompt, node=node).content
+    try:
+        result, repaired = _parse(output, model)
+        _record(node, "locally_repaired" if repaired else "valid")
+        return result
+    except StructuredOutputError as error:
+        last_error = error
+
+    for _ in range(max_repairs):
+        output = invoke_llm(llm, REPAIR_PROMPT.format(error=str(last_error)[:1000], output=output,
+                                                      schema=schema_json(model)),
+                            node=node).content
+        try:
+            result, _ = _parse(output, model)
+            _record(node, "repaired")
+            return result
+        except StructuredOutputError as error:
+            last_error = error
+
+    _record(node, "failed")
+    raise last_error
+
+
+def get_structured_output_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the validation outcomes of structured LLM calls per node
+
+    Returns:
+        Dictionary mapping node names to outcome counts, the call count and the failure rate
+    """
+    with _outcomes_lock:
+        outcomes = {node: dict(counts) for node, counts in _outcomes.items()}
+    stats = {}
+    for node, counts in outcomes.items():
+        calls = sum(counts.values())
+        stats[node] = {**counts, "calls": calls, "failure_rate": counts.get("failed", 0) / calls if calls else 0.0}
+    return stats
+
+
+def reset_structured_output_stats() -> None:
+    """Clear the validation outcome counters"""
+    with _outcomes_lock:
+        _outcomes.clear()
@@ -5,8 +5,8 @@ Provides functions to highlight text in different ways based on user preferences
 """
 
 from typing import Dict, List, Any, Optional, Tuple
-import re
 import html
+from src.utils.pattern_matcher import PatternMatcher
 
 class TextHighlighter:
     """
@@ -38,6 +38,28 @@ class TextHighlighter:
         }
     }
     
+    # Named highlight_style presets that a learner can switch between without reprocessing
+    HIGHLIGHT_STYLE_PRESETS = {
+        "default": {
+            "primary": {"type": "background", "style": "yellow"},
+            "secondary": {"type": "text", "style": "bold"},
+            "key_concepts": {"type": "special", "style": "key_concept"},
+            "definitions": {"type": "special", "style": "definition"}
+        },
+        "visual": {
+            "primary": {"type": "background", "style": "yellow"},
+            "secondary": {"type": "background", "style": "blue"},
+            "key_concepts": {"type": "special", "style": "key_concept"},
+            "definitions": {"type": "special", "style": "definition"}
+        },
+        "kinesthetic": {
+            "primary": {"type": "text", "style": "bold"},
+            "secondary": {"type": "text", "style": "underline"},
+            "key_concepts": {"type": "special", "style": "key_concept"},
+            "definitions": {"type": "special", "style": "definition"}
+        }
+    }
+    
     # CSS styles for the highlighting
     CSS_STYLES = """
     /* Background highlighting styles */
@@ -96,12 +118,21 @@ class TextHighlighter:
         
         # Default highlighting preferences if not specified
         if not self.user_preferences.get("highlight_style"):
-            self.user_preferences["highlight_style"] = {
-                "primary": {"type": "background", "style": "yellow"},
-                "secondary": {"type": "text", "style": "bold"},
-                "key_concepts": {"type": "special", "style": "key_concept"},
-                "definitions": {"type": "special", "style": "definition"}
-            }
+            self.user_preferences["highlight_style"] = self.get_style_preset("default")
+    
+    @classmethod
+    def get_style_preset(cls, name: str) -> Dict[str, Dict[str, str]]:
+        """
+        Get a copy of a named highlight_style preset
+        
+        Args:
+            name: Preset name (default, visual, kinesthetic); unknown names give the default preset
+        
+        Returns:
+            highlight_style dictionary
+        """
+        preset = cls.HIGHLIGHT_STYLE_PRESETS.get(name, cls.HIGHLIGHT_STYLE_PRESETS["default"])
+        return {highlight_type: dict(style) for highlight_type, style in preset.items()}
     
     def get_css(self) -> str:
         """
@@ -112,20 +143,19 @@ class TextHighlighter:
         """
         return self.CSS_STYLES
     
-    def highlight_text(self, text: str, highlight_type: str, elements: List[Dict[str, Any]]) -> str:
+    def render_element(self, highlight_type: str, element: Dict[str, Any]) -> str:
         """
-        Highlight elements in the text
+        Render one highlighted element as HTML
         
         Args:
-            text: The text to highlight
             highlight_type: The type of highlighting to apply (primary, secondary, key_concepts, definitions)
-            elements: List of elements to highlight, each with 'text' and optional 'metadata'
+            element: Element with 'text' and optional 'metadata'
         
         Returns:
-            Text with highlighted elements
+            HTML markup for the element
         """
-        # Make a copy of the text to avoid modifying the original
-        highlighted_text = text
+        # Escape HTML in the element text for safe highlighting
+        escaped_text = html.escape(element.get("text", ""))
         
         # Get the highlighting style from user preferences
         highlight_pref = self.user_preferences.get("highlight_style", {}).get(highlight_type)
@@ -133,45 +163,119 @@ class TextHighlighter:
             # Default to yellow background highlighting if preference not found
             highlight_pref = {"type": "background", "style": "yellow"}
         
-        # Sort elements by length (descending) to avoid highlighting issues
-        sorted_elements = sorted(elements, key=lambda x: len(x.get("text", "")), reverse=True)
+        # Get the highlighting template
+        if highlight_pref["type"] == "special" and highlight_pref["style"] == "definition":
+            # Special case for definitions which need a tooltip
+            definition = element.get("metadata", {}).get("definition", "")
+            escaped_definition = html.escape(definition)
+            return self.HIGHLIGHT_STYLES["special"]["definition"].format(escaped_definition, escaped_text)
+        if highlight_pref["type"] == "text" and highlight_pref["style"] in self.HIGHLIGHT_STYLES["text"].get("color", {}):
+            # Special case for text color
+            color = highlight_pref["style"]
+            return self.HIGHLIGHT_STYLES["text"]["color"][color].format(escaped_text)
         
-        for element in sorted_elements:
-            element_text = element.get("text", "")
-            if not element_text:
+        # Standard highlighting
+        style_type = highlight_pref["type"]
+        style = highlight_pref["style"]
+        if style_type in self.HIGHLIGHT_STYLES and style in self.HIGHLIGHT_STYLES[style_type]:
+            return self.HIGHLIGHT_STYLES[style_type][style].format(escaped_text)
+        # Fallback to yellow background highlighting
+        return self.HIGHLIGHT_STYLES["background"]["yellow"].format(escaped_text)
+    
+    def get_css_class(self, highlight_type: str) -> str:
+        """
+        Get the CSS class this highlighter uses for a highlight type
+        
+        Args:
+            highlight_type: The type of highlighting (primary, secondary, key_concepts, definitions)
+        
+        Returns:
+            CSS class name from CSS_STYLES
+        """
+        highlight_pref = self.user_preferences.get("highlight_style", {}).get(highlight_type)
+        if not highlight_pref:
+            return "highlight-yellow"
+        
+        style_type = highlight_pref["type"]
+        style = highlight_pref["style"]
+        if style_type == "text" and style in self.HIGHLIGHT_STYLES["text"].get("color", {}):
+            return f"highlight-text-{style}"
+        if style_type in self.HIGHLIGHT_STYLES and style in self.HIGHLIGHT_STYLES[style_type] and style != "color":
+            return "highlight-" + style.replace("_", "-")
+        return "highlight-yellow"
+    
+    @classmethod
+    def get_preset_css_classes(cls) -> Dict[str, Dict[str, str]]:
+        """
+        Get the CSS class of every highlight type for every style preset
+        
+        Returns:
+            Dictionary mapping preset names to {highlight_type: css_class}
+        """
+        classes = {}
+        for name in cls.HIGHLIGHT_STYLE_PRESETS:
+            highlighter = cls({"highlight_style": cls.get_style_preset(name)})
+            classes[name] = {
+                highlight_type: highlighter.get_css_class(highlight_type)
+                for highlight_type in highlighter.user_preferences["highlight_style"]
+            }
+        return classes
+    
+    def render_spans(self, text: str, spans: List[List[Any]]) -> str:
+        """
+        Render highlight spans into HTML using this highlighter's style preferences
+        
+        Spans that are out of range or overlap an earlier span are ignored, so stale
+        annotations never corrupt the text.
+        
+        Args:
+            text: The plain text the spans refer to
+            spans: List of [start, end, highlight_type, metadata] spans
+        
+        Returns:
+            Text with highlighted elements
+        """
+        parts = []
+        position = 0
+        for start, end, highlight_type, metadata in sorted(spans, key=lambda span: span[0]):
+            if start < position or end > len(text) or start >= end:
                 continue
-            
-            # Escape HTML in the element text for safe highlighting
-            escaped_text = html.escape(element_text)
-            
-            # Get the highlighting template
-            if highlight_pref["type"] == "special" and highlight_pref["style"] == "definition":
-                # Special case for definitions which need a tooltip
-                definition = element.get("metadata", {}).get("definition", "")
-                escaped_definition = html.escape(definition)
-                highlighted_element = self.HIGHLIGHT_STYLES["special"]["definition"].format(
-                    escaped_definition, escaped_text
-                )
-            elif highlight_pref["type"] == "text" and highlight_pref["style"] in self.HIGHLIGHT_STYLES["text"].get("color", {}):
-                # Special case for text color
-                color = highlight_pref["style"]
-                highlighted_element = self.HIGHLIGHT_STYLES["text"]["color"][color].format(escaped_text)
-            else:
-                # Standard highlighting
-                style_type = highlight_pref["type"]
-                style = highlight_pref["style"]
-                if style_type in self.HIGHLIGHT_STYLES and style in self.HIGHLIGHT_STYLES[style_type]:
-                    highlighted_element = self.HIGHLIGHT_STYLES[style_type][style].format(escaped_text)
-                else:
-                    # Fallback to yellow background highlighting
-                    highlighted_element = self.HIGHLIGHT_STYLES["background"]["yellow"].format(escaped_text)
-            
-            # Replace the text with the highlighted version
-            # Use regex with word boundaries to avoid partial matches
-            pattern = re.compile(r'\b' + re.escape(element_text) + r'\b')
-            highlighted_text = pattern.sub(highlighted_element, highlighted_text)
+            element = {"text": text[start:end], "metadata": metadata or {}}
+            parts.append(text[position:start])
+            parts.append(self.render_element(highlight_type, element))
+            position = end
+        parts.append(text[position:])
+        return "".join(parts)
+    
+    def highlight_elements(self, text: str, elements_to_highlight: Dict[str, List[Dict[str, Any]]]) -> str:
+        """
+        Highlight the elements of every highlight type in a single pass over the text
         
-        return highlighted_text
+        The longest element starting at the leftmost position wins; matches never nest and
+        never fall inside markup already present in the text.
+        
+        Args:
+            text: The text to highlight
+            elements_to_highlight: Dictionary mapping highlight types to lists of elements to highlight
+        
+        Returns:
+            Text with highlighted elements
+        """
+        return self.render_spans(text, find_highlight_spans(text, elements_to_highlight))
+    
+    def highlight_text(self, text: str, highlight_type: str, elements: List[Dict[str, Any]]) -> str:
+        """
+        Highlight elements in the text
+        
+        Args:
+            text: The text to highlight
+            highlight_type: The type of highlighting to apply (primary, secondary, key_concepts, definitions)
+            elements: List of elements to highlight, each with 'text' and optional 'metadata'
+        
+        Returns:
+            Text with highlighted elements
+        """
+        return self.highlight_elements(text, {highlight_type: elements})
 
     @staticmethod
     def extract_highlight_preferences(questionnaire_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -199,28 +303,14 @@ class TextHighlighter:
             # Determine primary highlighting style based on learning modality
             if modality_preference.get("visual", 0) > 0.6:
                 # Visual learners prefer color highlighting
-                preferences["highlight_style"] = {
-                    "primary": {"type": "background", "style": "yellow"},
-                    "secondary": {"type": "background", "style": "blue"},
-                    "key_concepts": {"type": "special", "style": "key_concept"},
-                    "definitions": {"type": "special", "style": "definition"}
-                }
+                preferences["highlight_preset"] = "visual"
             elif modality_preference.get("kinesthetic", 0) > 0.6:
                 # Kinesthetic learners prefer bold and underline
-                preferences["highlight_style"] = {
-                    "primary": {"type": "text", "style": "bold"},
-                    "secondary": {"type": "text", "style": "underline"},
-                    "key_concepts": {"type": "special", "style": "key_concept"},
-                    "definitions": {"type": "special", "style": "definition"}
-                }
+                preferences["highlight_preset"] = "kinesthetic"
             else:
                 # Default highlighting style
-                preferences["highlight_style"] = {
-                    "primary": {"type": "background", "style": "yellow"},
-                    "secondary": {"type": "text", "style": "bold"},
-                    "key_concepts": {"type": "special", "style": "key_concept"},
-                    "definitions": {"type": "special", "style": "definition"}
-                }
+                preferences["highlight_preset"] = "default"
+            preferences["highlight_style"] = TextHighlighter.get_style_preset(preferences["highlight_preset"])
         else:
             # User has not indicated highlighting as a comprehension aid
             preferences["use_highlighting"] = False
@@ -311,6 +401,84 @@ FEW_SHOT_SAMPLES = [
 ]
 
 
+def build_highlight_matcher(elements_to_highlight: Dict[str, List[Dict[str, Any]]]) -> PatternMatcher:
+    """
+    Build one matcher for all elements of all highlight types
+    
+    When the same text appears under several types, the type listed first wins;
+    within a type the first element with a given text wins.
+    
+    Args:
+        elements_to_highlight: Dictionary mapping highlight types to lists of elements to highlight
+    
+    Returns:
+        PatternMatcher whose payloads are (highlight_type, metadata) pairs
+    """
+    matcher = PatternMatcher()
+    seen = set()
+    for priority, (highlight_type, elements) in enumerate(elements_to_highlight.items()):
+        for element in elements:
+            element_text = element.get("text", "")
+            if not element_text or element_text in seen:
+                continue
+            seen.add(element_text)
+            matcher.add(element_text, priority, (highlight_type, element.get("metadata") or {}))
+    return matcher
+
+
+def find_highlight_spans(content: str, elements_to_highlight: Dict[str, List[Dict[str, Any]]]) -> List[List[Any]]:
+    """
+    Locate the elements to highlight in the content without rendering them
+    
+    Spans do not depend on the user's style preferences, so they are computed once in the
+    pipeline and rendered on demand with TextHighlighter.render_spans.
+    
+    Args:
+        content: The plain content
+        elements_to_highlight: Dictionary mapping highlight types to lists of elements to highlight
+    
+    Returns:
+        Non-overlapping [start, end, highlight_type, metadata] spans in text order
+    """
+    matcher = build_highlight_matcher(elements_to_highlight)
+    if not len(matcher):
+        return []
+    return [
+        [start, end, highlight_type, metadata]
+        for start, end, (highlight_type, metadata) in matcher.find_non_overlapping(content)
+    ]
+
+
+def span_highlights(text: str, spans: List[List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Resolve highlight spans to the highlighted phrases, for rendering in the browser
+    
+    The learning view renders the content as HTML and wraps these phrases in order, so
+    the page receives each highlight once instead of marker-expanded HTML. Phrases are
+    sent instead of offsets because the offsets refer to the stored plain text.
+    
+    Args:
+        text: The plain text the spans refer to
+        spans: List of [start, end, highlight_type, metadata] spans
+    
+    Returns:
+        {"text", "type"} dictionaries in text order (with "definition" for definitions);
+        out-of-range and overlapping spans are skipped
+    """
+    highlights = []
+    position = 0
+    for start, end, highlight_type, metadata in sorted(spans, key=lambda span: span[0]):
+        if start < position or end > len(text) or start >= end:
+            continue
+        highlight = {"text": text[start:end], "type": highlight_type}
+        definition = (metadata or {}).get("definition")
+        if definition:
+            highlight["definition"] = definition
+        highlights.append(highlight)
+        position = end
+    return highlights
+
+
 def get_highlighter_for_user(questionnaire_data: Dict[str, Any]) -> TextHighlighter:
     """
     Get a text highlighter configured for a specific user based on questionnaire data
@@ -340,13 +508,8 @@ def apply_highlighting_to_content(content: str, highlighter: TextHighlighter, el
     Returns:
         Content with highlighting applied
     """
-    highlighted_content = content
-    
-    # Apply each type of highlighting
-    for highlight_type, elements in elements_to_highlight.items():
-        highlighted_content = highlighter.highlight_text(highlighted_content, highlight_type, elements)
-    
-    return highlighted_content
+    # All highlight types are matched and rendered in one pass
+    return highlighter.highlight_elements(content, elements_to_highlight)
 
 
 if __name__ == "__main__":
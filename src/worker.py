@@ -0,0 +1,139 @@
+"""
+独立的任务处理进程
+
+从持久化任务队列中租用任务并运行支持系统工作流，Web进程只负责入队和读取状态。
+可以在同一台机器上启动多个进程利用所有CPU核心，也可以在共享存储的多台机器上运行。
+
+用法:
+    python -m src.worker --processes 4
+"""
+
+from typing import Optional
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+from src.config import SystemConfig
+from src.support_job import record_job_failure, run_support_job
+from src.utils.job_queue import get_job_queue
+
+
+def _keep_lease_alive(job_id: str, owner: str, interval: float, stop: threading.Event) -> None:
+    """在任务运行期间定期续租，避免被其他进程重复领取"""
+    queue = get_job_queue()
+    while not stop.wait(interval):
+        if not queue.heartbeat(job_id, owner):
+            logging.warning(f"任务 {job_id} 的租约已丢失")
+            return
+
+
+def process_next_job(owner: str) -> bool:
+    """
+    领取并运行一个任务
+
+    Args:
+        owner: 当前工作进程的标识
+
+    Returns:
+        是否领取到了任务
+    """
+    queue = get_job_queue()
+    # 工作进程反复崩溃的任务不再重试，需要把失败写入状态文件和检查点，否则前端会一直等待
+    for abandoned in queue.abandon_expired():
+        logging.error(f"任务 {abandoned['job_id']} 的租约多次过期，已放弃")
+        try:
+            record_job_failure(abandoned["payload"]["initial_state"], "Processing was interrupted too many times and has been stopped.")
+        except Exception as e:
+            logging.error(f"记录任务 {abandoned['job_id']} 的失败状态时出错: {e}")
+
+    job = queue.lease(owner)
+    if job is None:
+        return False
+
+    job_id = job["job_id"]
+    payload = job["payload"]
+    logging.info(f"{owner} 开始处理任务 {job_id}（第 {job['attempts']} 次尝试）")
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=_keep_lease_alive,
+        args=(job_id, owner, max(1.0, queue.lease_seconds / 3), stop),
+        daemon=True
+    )
+    heartbeat.start()
+    try:
+        run_support_job(payload["initial_state"], tuple(payload["execution_plan"]))
+        queue.complete(job_id, owner)
+        logging.info(f"任务 {job_id} 处理完成")
+    except Exception as e:
+        queue.fail(job_id, owner, str(e))
+        logging.error(f"任务 {job_id} 处理失败: {e}")
+    finally:
+        stop.set()
+        heartbeat.join()
+    return True
+
+
+def worker_loop(worker_index: int, poll_interval: float, max_jobs: Optional[int] = None) -> None:
+    """
+    工作进程主循环：不断领取任务，队列为空时等待
+
+    Args:
+        worker_index: 工作进程编号
+        poll_interval: 队列为空时的轮询间隔（秒）
+        max_jobs: 处理指定数量的任务后退出，为None时一直运行
+    """
+    owner = f"{socket.gethostname()}-{os.getpid()}-{worker_index}"
+    logging.info(f"工作进程 {owner} 已启动")
+
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        if process_next_job(owner):
+            processed += 1
+        else:
+            time.sleep(poll_interval)
+
+
+def main():
+    """启动工作进程"""
+    config = SystemConfig()
+
+    parser = argparse.ArgumentParser(description="AI4FairEdu 任务处理进程")
+    parser.add_argument("--processes", type=int, default=config.get("jobs.worker_processes") or os.cpu_count() or 1,
+                        help="并行工作进程数量")
+    parser.add_argument("--poll-interval", type=float, default=config.get("jobs.poll_interval") or 1.0,
+                        help="队列为空时的轮询间隔（秒）")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, config.get("logging.level")),
+        format=config.get("logging.format")
+    )
+
+    if args.processes <= 1:
+        worker_loop(0, args.poll_interval)
+        return
+
+    # 每个子进程在启动后各自打开队列和检查点数据库连接
+    processes = [
+        multiprocessing.Process(target=worker_loop, args=(i, args.poll_interval), name=f"support-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    logging.info(f"已启动 {len(processes)} 个工作进程")
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()